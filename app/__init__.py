@@ -1,11 +1,19 @@
-from flask import Flask, render_template
+import click
+import hmac
+import os
+from flask import Flask, abort, current_app, jsonify, render_template, request
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
 from app.config import config
+from app.replica import SessaoRoteada
 
-db = SQLAlchemy()
-migrate = Migrate()
+# A sessão escolhe, por instrução, entre o banco principal e a réplica
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
+
+
+def _carregado_pelo_cli():
+    """Indica se a aplicação está sendo carregada por um comando flask (db, agregados...)"""
+    return click.get_current_context(silent=True) is not None
 
 
 def create_app(config_name='development'):
@@ -15,23 +23,85 @@ def create_app(config_name='development'):
     
     # Inicializa extensões
     db.init_app(app)
-    migrate.init_app(app, db)
     CORS(app)
     
+    from app.serializacao import ProvedorJSON
+    app.json = ProvedorJSON(app)
+    
+    from app.cache import cache
+    cache.init_app(app)
+    
+    from app.replica import replica
+    replica.init_app(app)
+    
+    from app.catalogo import catalogo
+    catalogo.init_app(app)
+    
+    from app.telemetria import telemetria_pool
+    telemetria_pool.init_app(app)
+    
+    from app.instrumentacao import instrumentacao
+    instrumentacao.init_app(app)
+    
     # Registra blueprints
     from app.routes.gastos import gastos_bp
     from app.routes.categorias import categorias_bp
     from app.routes.relatorios import relatorios_bp
+    from app.routes.orcamentos import orcamentos_bp
     
     app.register_blueprint(gastos_bp, url_prefix='/api/gastos')
     app.register_blueprint(categorias_bp, url_prefix='/api/categorias')
     app.register_blueprint(relatorios_bp, url_prefix='/api/relatorios')
+    app.register_blueprint(orcamentos_bp, url_prefix='/api/orcamentos')
+    
+    from app.prontidao import aquecedor
+    
+    if _carregado_pelo_cli():
+        # Migrações (alembic) e comandos só são carregados no CLI, deixando o
+        # arranque do servidor mais rápido
+        from flask_migrate import Migrate
+        from app.commands import registrar_comandos
+        Migrate(app, db)
+        registrar_comandos(app)
+    elif app.config['AQUECER_BANCO']:
+        aquecedor.iniciar(app)
     
-    # Rota de health check
+    # Rota de health check (liveness): não depende do banco
     @app.route('/health')
     def health():
         return {'status': 'healthy', 'message': 'Sistema de Controle de Gastos funcionando!'}
     
+    # Rota de prontidão (readiness): 200 só depois que o pool de conexões foi aquecido
+    @app.route('/ready')
+    def ready():
+        aquecedor.iniciar(current_app._get_current_object())
+        estado = aquecedor.estado()
+        return estado, 200 if aquecedor.pronto else 503
+    
+    # Métricas internas do processo (pool de conexões, cache, réplica e catálogo)
+    @app.route('/internal/metricas')
+    def metricas():
+        token = app.config.get('METRICAS_TOKEN')
+        if not token:
+            # Em produção, sem token o endpoint nem aparece
+            if not app.config.get('METRICAS_SEM_TOKEN', True):
+                abort(404)
+        elif not hmac.compare_digest(
+            request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()
+        ):
+            return jsonify({'success': False, 'error': 'Não autorizado'}), 401
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'pid': os.getpid(),
+                'pool': telemetria_pool.estatisticas(),
+                'cache': cache.estatisticas(),
+                'replica': replica.estatisticas(),
+                'catalogo': catalogo.estatisticas()
+            }
+        })
+    
     # Rota principal - Frontend
     @app.route('/')
     def index():
@@ -47,7 +117,9 @@ def create_app(config_name='development'):
                 'gastos': '/api/gastos',
                 'categorias': '/api/categorias',
                 'relatorios': '/api/relatorios',
-                'health': '/health'
+                'orcamentos': '/api/orcamentos',
+                'health': '/health',
+                'ready': '/ready'
             }
         }
     
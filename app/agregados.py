@@ -0,0 +1,205 @@
+"""Manutenção incremental da tabela de agregados mensais (agregados_mensais).
+
+Cada escrita em gastos aplica um delta (total, quantidade) na linha de chave
+(ano, mes, tipo, categoria_id, forma_pagamento) dentro da mesma transação.
+Categoria e forma de pagamento ausentes são gravadas como 0 e ''.
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy import delete, extract, func, insert, select, union_all
+from app import db, arquivo
+from app.models import AgregadoMensal, Gasto
+from app.periodos import intervalo_mes
+from app.sql import inserir_ou_somar
+
+COLUNAS_CHAVE = ('ano', 'mes', 'tipo', 'categoria_id', 'forma_pagamento')
+
+
+def contribuicao(gasto):
+    """Retorna a chave do agregado e o valor com que um gasto contribui"""
+    chave = (
+        gasto.data.year,
+        gasto.data.month,
+        gasto.tipo or '',
+        gasto.categoria_id or 0,
+        gasto.forma_pagamento or '',
+    )
+    return chave, Decimal(str(gasto.valor))
+
+
+def aplicar_delta(chave, valor, quantidade):
+    """Soma valor e quantidade à linha do agregado, criando-a se necessário"""
+    linha = dict(zip(COLUNAS_CHAVE, chave), total=valor, quantidade=quantidade)
+    inserir_ou_somar(AgregadoMensal.__table__, linha, COLUNAS_CHAVE, ('total', 'quantidade'))
+
+
+def registrar_gasto(gasto):
+    """Inclui um gasto novo nos agregados"""
+    chave, valor = contribuicao(gasto)
+    aplicar_delta(chave, valor, 1)
+
+
+def registrar_linhas(linhas):
+    """Inclui nos agregados um lote de gastos (dicionários), com um delta por chave"""
+    deltas = {}
+    for linha in linhas:
+        chave, valor = contribuicao(SimpleNamespace(**linha))
+        total, quantidade = deltas.get(chave, (0, 0))
+        deltas[chave] = (total + valor, quantidade + 1)
+    
+    for chave, (total, quantidade) in deltas.items():
+        aplicar_delta(chave, total, quantidade)
+
+
+def remover_gasto(gasto):
+    """Retira dos agregados um gasto que será excluído"""
+    chave, valor = contribuicao(gasto)
+    aplicar_delta(chave, -valor, -1)
+
+
+def atualizar_gasto(anterior, gasto):
+    """Move a contribuição de um gasto alterado; anterior vem de contribuicao()"""
+    chave_anterior, valor_anterior = anterior
+    chave, valor = contribuicao(gasto)
+    
+    if chave == chave_anterior:
+        if valor != valor_anterior:
+            aplicar_delta(chave, valor - valor_anterior, 0)
+        return
+    
+    aplicar_delta(chave_anterior, -valor_anterior, -1)
+    aplicar_delta(chave, valor, 1)
+
+
+def _consulta_agregacao(*filtros):
+    """Agrega gastos diretamente da tabela gastos, no formato dos agregados"""
+    chave = [
+        extract('year', Gasto.data).label('ano'),
+        extract('month', Gasto.data).label('mes'),
+        func.coalesce(Gasto.tipo, '').label('tipo'),
+        func.coalesce(Gasto.categoria_id, 0).label('categoria_id'),
+        func.coalesce(Gasto.forma_pagamento, '').label('forma_pagamento'),
+    ]
+    return select(
+        *chave,
+        func.sum(Gasto.valor).label('total'),
+        func.count(Gasto.id).label('quantidade')
+    ).where(*filtros).group_by(*chave)
+
+
+def _com_arquivo(consulta):
+    """Soma à agregação de gastos a mesma agregação sobre gastos_arquivo"""
+    partes = union_all(consulta, arquivo.no_arquivo(consulta)).subquery()
+    chave = [partes.c[coluna] for coluna in COLUNAS_CHAVE]
+    return select(
+        *chave,
+        func.sum(partes.c.total).label('total'),
+        func.sum(partes.c.quantidade).label('quantidade')
+    ).group_by(*chave)
+
+
+def _agregacao(*filtros):
+    """Agregação dos gastos, incluindo os arquivados quando houver anos arquivados"""
+    consulta = _consulta_agregacao(*filtros)
+    return _com_arquivo(consulta) if arquivo.anos_arquivados() else consulta
+
+
+def recalcular(meses=None):
+    """Recalcula os agregados a partir de gastos.
+    
+    Sem meses, reconstrói a tabela inteira; caso contrário, apenas os pares
+    (ano, mes) informados. Executa na transação corrente, sem commit.
+    """
+    tabela = AgregadoMensal.__table__
+    colunas = list(COLUNAS_CHAVE) + ['total', 'quantidade']
+    
+    if meses is None:
+        db.session.execute(delete(tabela))
+        db.session.execute(insert(tabela).from_select(colunas, _agregacao()))
+        return
+    
+    for ano, mes in sorted(set(meses)):
+        inicio, fim = intervalo_mes(mes, ano)
+        db.session.execute(delete(tabela).where(tabela.c.ano == ano, tabela.c.mes == mes))
+        db.session.execute(insert(tabela).from_select(
+            colunas, _agregacao(Gasto.data >= inicio, Gasto.data < fim)
+        ))
+
+
+def contribuicoes(*filtros, incluir_arquivo=False, bloquear=False):
+    """Retorna, por chave do agregado, o (total, quantidade) com que os gastos
+    que atendem aos filtros contribuem, calculado em uma única query.
+    
+    Com bloquear, a leitura trava as linhas (SELECT ... FOR UPDATE) até o fim
+    da transação, para que o UPDATE/DELETE seguinte atinja exatamente os
+    gastos somados; não se aplica a incluir_arquivo.
+    """
+    if incluir_arquivo:
+        consulta = _agregacao(*filtros)
+    else:
+        consulta = _consulta_agregacao(*filtros)
+        if bloquear:
+            consulta = consulta.with_for_update()
+    return {
+        (int(linha.ano), int(linha.mes), linha.tipo, int(linha.categoria_id), linha.forma_pagamento):
+            (Decimal(linha.total), int(linha.quantidade))
+        for linha in db.session.execute(consulta)
+    }
+
+
+def remover_contribuicoes(anteriores):
+    """Retira dos agregados as contribuições (de contribuicoes()) de gastos
+    excluídos em lote; retorna os meses (ano, mes) afetados"""
+    for chave, (total, quantidade) in anteriores.items():
+        aplicar_delta(chave, -total, -quantidade)
+    return {chave[:2] for chave in anteriores}
+
+
+def mover_contribuicoes(anteriores, alteracoes):
+    """Move as contribuições (de contribuicoes()) de gastos alterados em lote
+    para as chaves resultantes das alterações (campos de Gasto com os novos
+    valores); retorna os meses (ano, mes) afetados, antes e depois"""
+    deltas = {}
+    for chave, (total, quantidade) in anteriores.items():
+        ano, mes, tipo, categoria_id, forma_pagamento = chave
+        if 'data' in alteracoes:
+            ano, mes = alteracoes['data'].year, alteracoes['data'].month
+        nova = (
+            ano,
+            mes,
+            alteracoes.get('tipo', tipo) or '',
+            alteracoes.get('categoria_id', categoria_id) or 0,
+            alteracoes.get('forma_pagamento', forma_pagamento) or '',
+        )
+        novo_total = Decimal(str(alteracoes['valor'])) * quantidade if 'valor' in alteracoes else total
+        
+        # Chaves de origem e destino são somadas antes, um delta por chave
+        for destino, valor, qtd in ((chave, -total, -quantidade), (nova, novo_total, quantidade)):
+            soma, contagem = deltas.get(destino, (0, 0))
+            deltas[destino] = (soma + valor, contagem + qtd)
+    
+    for chave, (total, quantidade) in deltas.items():
+        if total or quantidade:
+            aplicar_delta(chave, total, quantidade)
+    return {chave[:2] for chave in deltas}
+
+
+def verificar():
+    """Compara os agregados com gastos e retorna a lista de divergências"""
+    esperado = contribuicoes(incluir_arquivo=True)
+    # Linhas zeradas (todos os gastos da chave removidos) não são divergência
+    atual = {
+        (a.ano, a.mes, a.tipo, a.categoria_id, a.forma_pagamento): (Decimal(a.total), a.quantidade)
+        for a in AgregadoMensal.query.all()
+        if a.quantidade != 0 or a.total != 0
+    }
+    
+    divergencias = []
+    for chave in sorted(set(esperado) | set(atual), key=str):
+        if esperado.get(chave) != atual.get(chave):
+            divergencias.append({
+                'chave': dict(zip(COLUNAS_CHAVE, chave)),
+                'esperado': esperado.get(chave),
+                'atual': atual.get(chave)
+            })
+    return divergencias
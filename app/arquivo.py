@@ -0,0 +1,161 @@
+"""Arquivamento dos gastos de anos fechados.
+
+Arquivar um ano move, em uma transação, todos os gastos dele de gastos para
+gastos_arquivo (mesmas colunas e ids) e o registra em anos_arquivados;
+restaurar faz o caminho inverso. Assim os índices, varreduras e backups de
+gastos acompanham apenas os anos em uso. Os agregados mensais não mudam com
+o arquivamento, então os relatórios baseados neles não leem o arquivo.
+
+As consultas que leem gastos linha a linha recebem o período pedido e só
+consultam também o arquivo quando ele inclui um ano arquivado (alcanca()).
+Como só anos anteriores ao atual podem ser arquivados, períodos do ano
+corrente, como o mês atual, não geram nenhuma query a mais. A consulta ao
+arquivo é a mesma query com gastos trocado por gastos_arquivo (no_arquivo()),
+e os dois resultados, já ordenados, são mesclados (consultar()).
+
+Os gastos arquivados são somente leitura: alterações e exclusões que os
+atingiriam, por id ou em lote, são recusadas (verificar_escrita()), em vez
+de passarem por gastos inexistentes. Gastos novos com data em um ano
+arquivado vão para gastos e aparecem junto com os arquivados.
+"""
+import heapq
+from datetime import date, datetime
+from itertools import islice
+from flask import has_request_context, request
+from sqlalchemy import Column, delete, func, insert, select
+from sqlalchemy.sql import visitors
+from app import db, versoes
+from app.models import AnoArquivado, Gasto, GastoArquivo
+from app.sql import inserir_ou_somar
+
+_gastos = Gasto.__table__
+_arquivo = GastoArquivo.__table__
+COLUNAS = [coluna.name for coluna in _gastos.columns]
+
+
+def _trocar(elemento):
+    if elemento is _gastos:
+        return _arquivo
+    if isinstance(elemento, Column) and elemento.table is _gastos:
+        return _arquivo.c[elemento.name]
+    return None
+
+
+def no_arquivo(consulta):
+    """A mesma consulta (select ou Query) lendo gastos_arquivo no lugar de gastos"""
+    if hasattr(consulta, 'statement'):
+        consulta = consulta.statement
+    return visitors.replacement_traverse(consulta, {}, _trocar)
+
+
+CONSULTA_ANOS = select(AnoArquivado.ano)
+
+
+def anos_arquivados():
+    """Anos arquivados; dentro de uma requisição, lidos uma única vez"""
+    if has_request_context() and hasattr(request, 'anos_arquivados'):
+        return request.anos_arquivados
+    
+    anos = set(db.session.scalars(CONSULTA_ANOS))
+    if has_request_context():
+        request.anos_arquivados = anos
+    return anos
+
+
+def fora_do_arquivo(inicio):
+    """Indica se um período que começa em inicio certamente não alcança o
+    arquivo (começa no ano atual ou depois), sem consultar o banco"""
+    return inicio is not None and inicio.year >= date.today().year
+
+
+def alcanca(inicio=None, fim=None, anos=None):
+    """Indica se o período [inicio, fim) inclui algum ano arquivado (None: sem
+    limite); anos são os anos arquivados, lidos do banco se não informados"""
+    if fora_do_arquivo(inicio):
+        return False
+    return any(
+        (inicio is None or ano >= inicio.year) and (fim is None or date(ano, 1, 1) < fim)
+        for ano in (anos_arquivados() if anos is None else anos)
+    )
+
+
+def consultar(query, chave, query_arquivo=None, limite=None):
+    """Executa uma query de gastos ordenada de forma decrescente pela chave
+    (função da linha) e, com query_arquivo, essa outra query sobre o arquivo,
+    mesclando os dois resultados na mesma ordem; limite vale para o resultado
+    mesclado (cada query já deve ter o seu)."""
+    linhas = query.all()
+    if query_arquivo is None:
+        return linhas
+    
+    arquivadas = db.session.execute(no_arquivo(query_arquivo)).all()
+    return mesclar(linhas, arquivadas, chave, limite)
+
+
+def mesclar(linhas, arquivadas, chave, limite=None):
+    """Mescla dois resultados em ordem decrescente pela chave (ver consultar())"""
+    mescladas = heapq.merge(linhas, arquivadas, key=chave, reverse=True)
+    # Limite negativo, como no LIMIT do SQLite, não limita
+    return list(islice(mescladas, limite if limite is None or limite >= 0 else None))
+
+
+class GastoArquivado(ValueError):
+    """Escrita que atingiria gastos arquivados, que são somente leitura"""
+
+
+def verificar_escrita(*condicoes):
+    """Levanta GastoArquivado se algum gasto arquivado atende às condições
+    (sobre gastos) de uma alteração ou exclusão"""
+    if not anos_arquivados():
+        return
+    
+    quantidade = db.session.scalar(no_arquivo(select(func.count()).select_from(_gastos).where(*condicoes)))
+    if quantidade == 1:
+        raise GastoArquivado('Gasto de ano arquivado; restaure o ano para alterá-lo')
+    if quantidade:
+        raise GastoArquivado(f'{quantidade} gastos são de anos arquivados; restaure os anos para alterá-los')
+
+
+def _intervalo_ano(ano, tabela):
+    return tabela.c.data >= date(ano, 1, 1), tabela.c.data < date(ano + 1, 1, 1)
+
+
+def _mover(origem, destino, ano):
+    """Copia os gastos do ano de uma tabela para a outra e os remove da origem"""
+    db.session.execute(insert(destino).from_select(
+        COLUNAS, select(*(origem.c[nome] for nome in COLUNAS)).where(*_intervalo_ano(ano, origem))
+    ))
+    return db.session.execute(delete(origem).where(*_intervalo_ano(ano, origem))).rowcount
+
+
+def _incrementar_versoes(ano):
+    versoes.incrementar(*(versoes.chave_mes(ano, mes) for mes in range(1, 13)))
+
+
+def arquivar(ano):
+    """Move os gastos de um ano fechado para o arquivo. Executa na transação
+    corrente, sem commit; arquivar de novo um ano move os gastos incluídos
+    nele depois do arquivamento."""
+    if ano >= date.today().year:
+        raise ValueError('Apenas anos anteriores ao atual podem ser arquivados')
+    
+    movidos = _mover(_gastos, _arquivo, ano)
+    inserir_ou_somar(AnoArquivado.__table__, {
+        'ano': ano,
+        'quantidade': movidos,
+        'arquivado_em': datetime.utcnow()
+    }, ('ano',), ('quantidade',))
+    _incrementar_versoes(ano)
+    return {'ano': ano, 'movidos': movidos}
+
+
+def restaurar(ano):
+    """Devolve os gastos arquivados de um ano para gastos. Executa na
+    transação corrente, sem commit."""
+    if ano not in anos_arquivados():
+        raise ValueError(f'O ano {ano} não está arquivado')
+    
+    movidos = _mover(_arquivo, _gastos, ano)
+    db.session.execute(delete(AnoArquivado.__table__).where(AnoArquivado.ano == ano))
+    _incrementar_versoes(ano)
+    return {'ano': ano, 'movidos': movidos}
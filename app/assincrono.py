@@ -0,0 +1,489 @@
+"""Modo ASGI (assíncrono) das leituras de gastos, categorias e relatórios.
+
+create_asgi_app() monta uma aplicação Starlette em que as listagens de
+gastos e categorias, as consultas por id e os relatórios são atendidos por
+handlers assíncronos, com um driver de banco assíncrono (aiosqlite ou
+aiomysql). As demais rotas (escritas, busca, importação, exportação,
+orçamentos, frontend...) seguem para a aplicação Flask pelo adaptador WSGI,
+que a executa em threads.
+
+Os handlers reaproveitam as queries e a montagem das respostas das views
+Flask (consulta_*/montar_* de app.routes.relatorios, filtros e paginação de
+app.routes.gastos, a projeção de app.serializacao), o mesmo provedor JSON,
+ETag, cache dos relatórios e roteamento para a réplica, de modo que as
+respostas são idênticas byte a byte. Queries independentes de uma
+requisição, como as seções do dashboard, executam em paralelo, cada uma em
+uma conexão do pool (asyncio.gather), e uma requisição aguardando o banco
+não ocupa uma thread.
+
+Não há instrumentação de SQL (Server-Timing) nem telemetria do pool nos
+handlers assíncronos. Dependências opcionais em requirements-asgi.txt.
+"""
+import asyncio
+import contextlib
+from datetime import datetime
+from functools import wraps
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import NotFound
+from werkzeug.http import parse_etags
+from app import arquivo, create_app, serializacao, versoes
+from app.cache import BackendLocal, cache
+from app.etag import aplicar_cabecalhos, calcular_etag
+from app.models import Categoria, Gasto
+from app.periodos import filtro_mes, intervalo_mes, meses_anteriores
+from app.replica import BIND, replica
+from app.routes import gastos, relatorios
+
+try:
+    from a2wsgi import WSGIMiddleware
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.responses import Response
+    from starlette.routing import Mount, Route
+except ImportError:  # dependências opcionais
+    Starlette = None
+
+PRINCIPAL = 'principal'
+
+# Driver assíncrono de cada banco suportado
+DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def url_assincrona(url):
+    """A mesma URL de banco com o driver assíncrono correspondente"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS:
+        raise RuntimeError(f'O modo ASGI não tem driver assíncrono para o banco "{backend}"')
+    return url.set(drivername=DRIVERS[backend])
+
+
+def _criar_engine(app, url):
+    opcoes = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'pool_size' in opcoes:
+        # Sem uma thread por requisição, o pool é dimensionado à parte
+        opcoes['pool_size'] = app.config['ASGI_POOL_SIZE']
+    return create_async_engine(url_assincrona(url), **opcoes)
+
+
+class Leitura:
+    """Queries de uma requisição, todas no mesmo banco (principal ou réplica)"""
+    
+    def __init__(self, engine, app):
+        self.engine = engine
+        self.app = app
+        self._anos = None
+    
+    async def todas(self, consulta):
+        """Executa uma query e retorna as linhas.
+        
+        Cada query retira a sua conexão do pool e a devolve em seguida: uma
+        requisição nunca espera por uma conexão enquanto segura outra, o que
+        esgotaria o pool (deadlock) com muitas requisições em paralelo.
+        """
+        async with self.engine.connect() as conexao:
+            return (await conexao.execute(consulta)).all()
+    
+    async def paralelo(self, *consultas):
+        """Executa as queries ao mesmo tempo, cada uma em uma conexão"""
+        return await asyncio.gather(*(self.todas(consulta) for consulta in consultas))
+    
+    async def entidades(self, consulta):
+        """Executa uma query de entidades do ORM (sem relacionamentos carregados)"""
+        async with AsyncSession(self.engine) as sessao:
+            return (await sessao.scalars(consulta)).all()
+    
+    async def versoes(self, chaves):
+        """Equivalente a versoes.obter()"""
+        chaves = tuple(sorted(set(chaves)))
+        return versoes.completar(chaves, await self.todas(versoes.consulta(chaves)))
+    
+    async def anos_arquivados(self):
+        """Equivalente a arquivo.anos_arquivados(), lidos uma vez por requisição"""
+        if self._anos is None:
+            self._anos = {linha.ano for linha in await self.todas(arquivo.CONSULTA_ANOS)}
+        return self._anos
+    
+    async def alcanca(self, inicio=None, fim=None):
+        """Equivalente a arquivo.alcanca()"""
+        if arquivo.fora_do_arquivo(inicio):
+            return False
+        return arquivo.alcanca(inicio, fim, await self.anos_arquivados())
+    
+    async def mes_arquivado(self, mes, ano):
+        try:
+            return await self.alcanca(*intervalo_mes(mes, ano))
+        except ValueError:
+            return False
+    
+    async def mesclado(self, consulta, chave, consulta_arquivo=None, limite=None):
+        """Equivalente a arquivo.consultar(), com as duas queries em paralelo"""
+        if consulta_arquivo is None:
+            return await self.todas(consulta)
+        
+        linhas, arquivadas = await self.paralelo(consulta, arquivo.no_arquivo(consulta_arquivo))
+        return arquivo.mesclar(linhas, arquivadas, chave, limite)
+    
+    def pagina(self, consulta, limite, cursor=None, consulta_arquivo=None):
+        """Equivalente a gastos.buscar_pagina(); o ValueError de um cursor
+        inválido é lançado já na chamada, antes de qualquer query"""
+        paginas = [gastos.paginar(consulta, limite, cursor), None]
+        if consulta_arquivo is not None:
+            paginas[1] = gastos.paginar(consulta_arquivo, limite, cursor)
+        
+        async def buscar():
+            linhas = await self.mesclado(paginas[0], gastos.chave_pagina, paginas[1], limite + 1)
+            return gastos.fechar_pagina(linhas, limite)
+        return buscar()
+    
+    def json(self, dados, status=200):
+        """Equivalente a jsonify(dados), status"""
+        resposta = self.app.json.response(dados)
+        resposta.status_code = status
+        return resposta
+    
+    def projetado(self, dados):
+        """Equivalente a serializacao.responder()"""
+        return self.app.json.response(serializacao.Projetado(dados))
+
+
+async def _no_cache(operacao, *args):
+    # O backend local não faz E/S; os demais (Redis) executam fora do loop
+    if isinstance(cache.backend, BackendLocal):
+        return operacao(*args)
+    return await run_in_threadpool(operacao, *args)
+
+
+def _para_starlette(resposta, requisicao):
+    cabecalhos = dict(resposta.headers)
+    # Como o flask-cors da aplicação Flask (origens liberadas)
+    if 'origin' in requisicao.headers:
+        cabecalhos['Access-Control-Allow-Origin'] = '*'
+    return Response(resposta.get_data(), status_code=resposta.status_code, headers=cabecalhos)
+
+
+def rota_get(endpoint, escopos, em_cache=False, usa_replica=True):
+    """Transforma um handler assíncrono handler(leitura, args, **view_args)
+    em uma rota Starlette com o GET condicional (ETag) da view Flask de mesmo
+    endpoint, opcionalmente o cache dos relatórios e, com usa_replica, as
+    leituras na réplica com volta ao principal em caso de falha"""
+    def decorator(handler):
+        async def atender(requisicao, motor, args, view_args):
+            leitura = Leitura(motor, requisicao.app.state.flask)
+            versoes_lidas = await leitura.versoes(escopos(args))
+            etag = calcular_etag(endpoint, view_args, args, versoes_lidas)
+            
+            if parse_etags(requisicao.headers.get('if-none-match')).contains(etag):
+                return aplicar_cabecalhos(leitura.app.response_class(status=304), etag)
+            
+            chave = None
+            resposta = None
+            if em_cache and cache.backend is not None:
+                chave = cache.chave(endpoint, args, versoes_lidas)
+                valor = await _no_cache(cache.backend.get, chave)
+                cache.registrar(valor is not None)
+                if valor is not None:
+                    resposta = leitura.app.response_class(valor, mimetype='application/json')
+            
+            if resposta is None:
+                resposta = await handler(leitura, args, **view_args)
+                if chave is not None and resposta.status_code == 200:
+                    await _no_cache(cache.backend.set, chave, resposta.get_data())
+            
+            if resposta.status_code == 200:
+                aplicar_cabecalhos(resposta, etag)
+            return resposta
+        
+        @wraps(handler)
+        async def rota(requisicao):
+            motores = requisicao.app.state.motores
+            args = MultiDict(requisicao.query_params.multi_items())
+            view_args = dict(requisicao.path_params)
+            
+            if usa_replica and BIND in motores and replica.pode_ler(requisicao.cookies):
+                replica.registrar_uso()
+                try:
+                    resposta = await atender(requisicao, motores[BIND], args, view_args)
+                except DBAPIError as e:
+                    # Todas as queries da tentativa foram à réplica
+                    replica.registrar_falha(e)
+                    resposta = await atender(requisicao, motores[PRINCIPAL], args, view_args)
+            else:
+                resposta = await atender(requisicao, motores[PRINCIPAL], args, view_args)
+            return _para_starlette(resposta, requisicao)
+        return rota
+    return decorator
+
+
+# Gastos
+
+@rota_get('gastos.listar_gastos', gastos.escopos_listagem)
+async def listar_gastos(leitura, args):
+    consulta = serializacao.selecionar_gastos().filter(*gastos.filtros_listagem(args))
+    consulta_arquivo = consulta if await leitura.alcanca(*gastos.periodo_listagem(args)) else None
+    
+    if 'limit' in args or 'cursor' in args:
+        return await _listar_paginado(leitura, args, consulta, consulta_arquivo)
+    
+    linhas = await leitura.mesclado(
+        consulta.order_by(Gasto.data.desc()),
+        lambda linha: linha.data,
+        consulta_arquivo.order_by(Gasto.data.desc()) if consulta_arquivo is not None else None
+    )
+    return leitura.projetado({
+        'success': True,
+        **serializacao.serializar_linhas(linhas, gastos.sideload(args)),
+        'total': len(linhas)
+    })
+
+
+async def _total(leitura, consulta, consulta_arquivo):
+    contagens = [select(func.count()).select_from(consulta.order_by(None).subquery())]
+    if consulta_arquivo is not None:
+        contagens.append(select(func.count()).select_from(
+            arquivo.no_arquivo(consulta_arquivo.order_by(None)).subquery()
+        ))
+    return sum(linhas[0][0] for linhas in await leitura.paralelo(*contagens))
+
+
+async def _listar_paginado(leitura, args, consulta, consulta_arquivo):
+    limite = gastos.ler_limite(args)
+    if limite is None:
+        return leitura.json({'success': False, 'error': 'limit deve ser um inteiro positivo'}, 400)
+    
+    try:
+        pagina = leitura.pagina(consulta, limite, args.get('cursor'), consulta_arquivo)
+    except ValueError as e:
+        return leitura.json({'success': False, 'error': str(e)}, 400)
+    
+    # Página e contagem total (opcional) em paralelo
+    total = None
+    if args.get('incluir_total', 'false').lower() == 'true':
+        (linhas, next_cursor), total = await asyncio.gather(pagina, _total(leitura, consulta, consulta_arquivo))
+    else:
+        linhas, next_cursor = await pagina
+    
+    resposta = {
+        'success': True,
+        **serializacao.serializar_linhas(linhas, gastos.sideload(args)),
+        'next_cursor': next_cursor
+    }
+    if total is not None:
+        resposta['total'] = total
+    return leitura.projetado(resposta)
+
+
+@rota_get('gastos.obter_gasto', lambda args: [versoes.GASTOS, versoes.CATEGORIAS], usa_replica=False)
+async def obter_gasto(leitura, args, id):
+    consulta = serializacao.selecionar_gastos().filter(Gasto.id == id)
+    linhas = await leitura.todas(consulta)
+    if not linhas and await leitura.anos_arquivados():
+        linhas = await leitura.todas(arquivo.no_arquivo(consulta))
+    if not linhas:
+        return NotFound().get_response()
+    
+    return leitura.json({
+        'success': True,
+        'data': serializacao.serializar_linhas(linhas)['data'][0]
+    })
+
+
+# Categorias
+
+@rota_get('categorias.listar_categorias', lambda args: [versoes.CATEGORIAS])
+async def listar_categorias(leitura, args):
+    consulta = select(Categoria)
+    if args.get('ativas', 'true').lower() == 'true':
+        consulta = consulta.filter(Categoria.ativo == True)
+    categorias = await leitura.entidades(consulta.order_by(Categoria.nome))
+    
+    return leitura.json({
+        'success': True,
+        'data': [cat.to_dict() for cat in categorias],
+        'total': len(categorias)
+    })
+
+
+@rota_get('categorias.obter_categoria', lambda args: [versoes.CATEGORIAS], usa_replica=False)
+async def obter_categoria(leitura, args, id):
+    categorias = await leitura.entidades(select(Categoria).filter(Categoria.id == id))
+    if not categorias:
+        return NotFound().get_response()
+    
+    return leitura.json({
+        'success': True,
+        'data': categorias[0].to_dict()
+    })
+
+
+# Relatórios
+
+async def _evolucao(leitura, meses, tipo=None):
+    periodo = meses_anteriores(meses, datetime.now())
+    if not periodo:
+        return []
+    return relatorios.montar_evolucao(periodo, tipo, await leitura.todas(relatorios.consulta_evolucao(periodo)))
+
+
+@rota_get('relatorios.resumo_mensal', relatorios.escopos_mes, em_cache=True)
+async def resumo_mensal(leitura, args):
+    mes, ano = relatorios.mes_ano(args)
+    linhas = await leitura.todas(relatorios.consulta_resumo(mes, ano))
+    return leitura.json({
+        'success': True,
+        'data': relatorios.montar_resumo(mes, ano, linhas)
+    })
+
+
+@rota_get('relatorios.gastos_por_categoria', relatorios.escopos_mes, em_cache=True)
+async def gastos_por_categoria(leitura, args):
+    mes, ano = relatorios.mes_ano(args)
+    tipo = args.get('tipo', 'despesa')
+    linhas = await leitura.todas(relatorios.consulta_por_categoria(mes, ano, tipo))
+    return leitura.json({
+        'success': True,
+        'data': relatorios.montar_por_categoria(mes, ano, tipo, linhas)
+    })
+
+
+@rota_get('relatorios.evolucao_gastos', relatorios.escopos_evolucao, em_cache=True)
+async def evolucao_gastos(leitura, args):
+    return leitura.json({
+        'success': True,
+        'data': await _evolucao(leitura, relatorios.meses_evolucao(args), args.get('tipo'))
+    })
+
+
+@rota_get('relatorios.maiores_gastos', relatorios.escopos_mes, em_cache=True)
+async def maiores_gastos(leitura, args):
+    mes, ano = relatorios.mes_ano(args)
+    limite = args.get('limite', 10, type=int)
+    sideload = args.get('sideload', 'false').lower() == 'true'
+    
+    consulta = serializacao.selecionar_gastos().filter(
+        Gasto.tipo == 'despesa',
+        filtro_mes(Gasto.data, mes, ano)
+    ).order_by(Gasto.valor.desc()).limit(limite)
+    linhas = await leitura.mesclado(
+        consulta, lambda linha: linha.valor, consulta if await leitura.mes_arquivado(mes, ano) else None, limite
+    )
+    
+    serializado = serializacao.serializar_linhas(linhas, sideload)
+    dados = {
+        'mes': mes,
+        'ano': ano,
+        'gastos': serializado['data']
+    }
+    if sideload:
+        dados['categorias'] = serializado['categorias']
+    
+    return leitura.projetado({
+        'success': True,
+        'data': dados
+    })
+
+
+@rota_get('relatorios.gastos_por_forma_pagamento', relatorios.escopos_mes, em_cache=True)
+async def gastos_por_forma_pagamento(leitura, args):
+    mes, ano = relatorios.mes_ano(args)
+    linhas = await leitura.todas(relatorios.consulta_por_forma_pagamento(mes, ano))
+    return leitura.json({
+        'success': True,
+        'data': relatorios.montar_por_forma_pagamento(mes, ano, linhas)
+    })
+
+
+@rota_get('relatorios.orcamento_x_realizado', relatorios.escopos_orcamento, em_cache=True)
+async def orcamento_x_realizado(leitura, args):
+    mes, ano = relatorios.mes_ano(args)
+    limiar_alerta = args.get('alerta', relatorios.LIMIAR_ALERTA_ORCAMENTO, type=float)
+    linhas = await leitura.todas(relatorios.consulta_orcamento(mes, ano))
+    return leitura.json({
+        'success': True,
+        'data': relatorios.montar_orcamento(mes, ano, limiar_alerta, linhas)
+    })
+
+
+@rota_get('relatorios.dashboard', relatorios.escopos_dashboard, em_cache=True)
+async def dashboard(leitura, args):
+    mes, ano = relatorios.mes_ano(args)
+    meses = relatorios.meses_evolucao(args)
+    limite = max(1, min(args.get('limit', gastos.LIMITE_PADRAO, type=int), gastos.LIMITE_MAXIMO))
+    
+    consulta = serializacao.selecionar_gastos().filter(filtro_mes(Gasto.data, mes, ano))
+    
+    async def primeira_pagina():
+        consulta_arquivo = consulta if await leitura.mes_arquivado(mes, ano) else None
+        return await leitura.pagina(consulta, limite, consulta_arquivo=consulta_arquivo)
+    
+    # As seções do dashboard são independentes: todas as queries em paralelo
+    resumo, por_categoria, por_forma_pagamento, evolucao, (linhas, next_cursor) = await asyncio.gather(
+        leitura.todas(relatorios.consulta_resumo(mes, ano)),
+        leitura.todas(relatorios.consulta_por_categoria(mes, ano)),
+        leitura.todas(relatorios.consulta_por_forma_pagamento(mes, ano)),
+        _evolucao(leitura, meses),
+        primeira_pagina()
+    )
+    
+    return leitura.json({
+        'success': True,
+        'data': {
+            'resumo': relatorios.montar_resumo(mes, ano, resumo),
+            'por_categoria': relatorios.montar_por_categoria(mes, ano, 'despesa', por_categoria),
+            'por_forma_pagamento': relatorios.montar_por_forma_pagamento(mes, ano, por_forma_pagamento),
+            'evolucao': evolucao,
+            'gastos': {
+                **serializacao.serializar_linhas(linhas),
+                'next_cursor': next_cursor
+            }
+        }
+    })
+
+
+ROTAS = [
+    ('/api/gastos', listar_gastos),
+    ('/api/gastos/{id:int}', obter_gasto),
+    ('/api/categorias', listar_categorias),
+    ('/api/categorias/{id:int}', obter_categoria),
+    ('/api/relatorios/resumo-mensal', resumo_mensal),
+    ('/api/relatorios/por-categoria', gastos_por_categoria),
+    ('/api/relatorios/evolucao', evolucao_gastos),
+    ('/api/relatorios/maiores-gastos', maiores_gastos),
+    ('/api/relatorios/por-forma-pagamento', gastos_por_forma_pagamento),
+    ('/api/relatorios/orcamento', orcamento_x_realizado),
+    ('/api/relatorios/dashboard', dashboard),
+]
+
+
+def create_asgi_app(config_name='production'):
+    """Factory da aplicação ASGI: handlers assíncronos e, para o resto, a aplicação Flask"""
+    if Starlette is None:
+        raise RuntimeError('O modo ASGI requer as dependências de requirements-asgi.txt')
+    
+    flask_app = create_app(config_name)
+    motores = {PRINCIPAL: _criar_engine(flask_app, flask_app.config['SQLALCHEMY_DATABASE_URI'])}
+    if replica.ativa:
+        motores[BIND] = _criar_engine(flask_app, flask_app.config['SQLALCHEMY_BINDS'][BIND])
+    
+    @contextlib.asynccontextmanager
+    async def ciclo_de_vida(app):
+        yield
+        for motor in motores.values():
+            await motor.dispose()
+    
+    # Rotas de outros métodos no mesmo caminho (POST /api/gastos...) não
+    # casam com as rotas GET e seguem para a aplicação Flask
+    rotas = [Route(caminho, handler, methods=['GET']) for caminho, handler in ROTAS]
+    rotas.append(Mount('/', app=WSGIMiddleware(flask_app)))
+    
+    app = Starlette(routes=rotas, lifespan=ciclo_de_vida)
+    app.state.flask = flask_app
+    app.state.motores = motores
+    return app
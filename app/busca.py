@@ -0,0 +1,82 @@
+"""Busca textual indexada sobre descricao e observacao dos gastos.
+
+No MySQL, usa o índice FULLTEXT ix_gastos_texto (MATCH ... AGAINST em modo
+booleano); o InnoDB o mantém a cada escrita. No SQLite, usa a tabela FTS5
+gastos_fts, com conteúdo externo apontando para gastos e sincronizada por
+triggers em INSERT, UPDATE e DELETE, de modo que qualquer escrita (rotas,
+importação, recorrências) atualiza o índice na mesma transação.
+
+Cada termo da consulta casa por prefixo ("farm" encontra "Farmácia") e todos
+os termos precisam aparecer. A relevância é o score do MATCH no MySQL e o
+bm25 (com sinal invertido) no SQLite: maior é mais relevante nos dois.
+
+Migrações em lote (batch_alter_table) recriam a tabela gastos no SQLite e
+descartam os triggers; devem recriá-los com o SQL escrito na própria
+migração (como em 0008), e não com CRIAR_SQLITE, que pode mudar depois.
+"""
+import re
+from sqlalchemy import DDL, column, event, func, literal, literal_column, or_, select, table
+from sqlalchemy.dialects.mysql import match
+from app.models import Gasto
+
+# Termos considerados de uma consulta
+MAXIMO_TERMOS = 8
+
+CRIAR_SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS gastos_fts USING fts5("
+    "descricao, observacao, content='gastos', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS gastos_fts_ai AFTER INSERT ON gastos BEGIN "
+    "INSERT INTO gastos_fts(rowid, descricao, observacao) VALUES (new.id, new.descricao, new.observacao); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS gastos_fts_ad AFTER DELETE ON gastos BEGIN "
+    "INSERT INTO gastos_fts(gastos_fts, rowid, descricao, observacao) "
+    "VALUES ('delete', old.id, old.descricao, old.observacao); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS gastos_fts_au AFTER UPDATE OF descricao, observacao ON gastos BEGIN "
+    "INSERT INTO gastos_fts(gastos_fts, rowid, descricao, observacao) "
+    "VALUES ('delete', old.id, old.descricao, old.observacao); "
+    "INSERT INTO gastos_fts(rowid, descricao, observacao) VALUES (new.id, new.descricao, new.observacao); "
+    "END",
+]
+RECONSTRUIR_SQLITE = "INSERT INTO gastos_fts(gastos_fts) VALUES ('rebuild')"
+REMOVER_SQLITE = "DROP TABLE IF EXISTS gastos_fts"
+
+_fts = table('gastos_fts', column('rowid'))
+
+# db.create_all()/drop_all() (testes e modo embarcado) criam e removem o índice FTS5
+for _comando in CRIAR_SQLITE:
+    event.listen(Gasto.__table__, 'after_create', DDL(_comando).execute_if(dialect='sqlite'))
+event.listen(Gasto.__table__, 'before_drop', DDL(REMOVER_SQLITE).execute_if(dialect='sqlite'))
+
+
+def termos(consulta):
+    """Extrai as palavras da consulta, sem operadores da sintaxe de busca"""
+    return re.findall(r'\w+', (consulta or '').lower())[:MAXIMO_TERMOS]
+
+
+def aplicar(query, palavras, dialeto, ranquear=True):
+    """Restringe a query de gastos aos que contêm todas as palavras (por prefixo).
+    
+    Retorna a query e a expressão de relevância (maior é mais relevante). Sem
+    ranquear, a relevância é None e, no SQLite, o índice é consultado uma única
+    vez em uma subquery, em vez de uma vez por linha percorrida pela ordenação.
+    """
+    if dialeto == 'mysql':
+        expressao = ' '.join(f'+{palavra}*' for palavra in palavras)
+        relevancia = match(Gasto.descricao, Gasto.observacao, against=expressao).in_boolean_mode()
+        return query.filter(relevancia), relevancia if ranquear else None
+    
+    if dialeto == 'sqlite':
+        expressao = ' '.join('"{}"*'.format(palavra.replace('"', '""')) for palavra in palavras)
+        correspondencia = literal_column('gastos_fts').op('MATCH')(expressao)
+        if not ranquear:
+            return query.filter(Gasto.id.in_(select(_fts.c.rowid).where(correspondencia))), None
+        query = query.join(_fts, _fts.c.rowid == Gasto.id).filter(correspondencia)
+        return query, -func.bm25(literal_column('gastos_fts'))
+    
+    # Outros bancos: sem índice textual, busca por LIKE e sem ranking
+    for palavra in palavras:
+        padrao = f'%{palavra}%'
+        query = query.filter(or_(Gasto.descricao.ilike(padrao), Gasto.observacao.ilike(padrao)))
+    return query, literal(0) if ranquear else None
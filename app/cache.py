@@ -0,0 +1,156 @@
+"""Cache de respostas dos relatórios com invalidação por versão dos dados.
+
+A chave de cada resposta combina endpoint, parâmetros da requisição e as
+versões (app.versoes) dos escopos que ela lê. Uma escrita incrementa a versão
+do escopo, então a próxima leitura gera uma chave nova e as entradas antigas
+simplesmente deixam de ser usadas até expirarem (TTL) ou serem despejadas (LRU).
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request
+
+
+class BackendLocal:
+    """Backend em memória do processo, limitado por tamanho (LRU) e TTL"""
+    
+    def __init__(self, max_itens=512, ttl=300):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.evictions = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+    
+    def set(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.evictions += 1
+    
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+    
+    def estatisticas(self):
+        return {'itens': len(self._itens), 'max_itens': self.max_itens, 'evictions': self.evictions}
+
+
+class BackendRedis:
+    """Backend compartilhado entre instâncias; o limite LRU é o maxmemory do Redis"""
+    
+    def __init__(self, url, ttl=300, prefixo='controle-gastos:cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND=redis requer o pacote "redis" instalado')
+        self.cliente = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefixo = prefixo
+    
+    def get(self, chave):
+        return self.cliente.get(self.prefixo + chave)
+    
+    def set(self, chave, valor):
+        self.cliente.set(self.prefixo + chave, valor, ex=self.ttl)
+    
+    def limpar(self):
+        for chave in self.cliente.scan_iter(self.prefixo + '*'):
+            self.cliente.delete(chave)
+    
+    def estatisticas(self):
+        info = self.cliente.info('stats')
+        return {'evictions': info.get('evicted_keys', 0), 'expired': info.get('expired_keys', 0)}
+
+
+class CacheRelatorios:
+    """Extensão de cache das respostas de relatórios"""
+    
+    def __init__(self):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def registrar(self, acerto):
+        """Conta um acerto ou uma falta do cache (workers gthread compartilham a extensão)"""
+        with self._lock:
+            if acerto:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def init_app(self, app):
+        tipo = app.config.get('CACHE_BACKEND', 'local')
+        ttl = app.config.get('CACHE_TTL', 300)
+        
+        if tipo == 'redis':
+            self.backend = BackendRedis(app.config['CACHE_REDIS_URL'], ttl=ttl)
+        elif tipo == 'local':
+            self.backend = BackendLocal(max_itens=app.config.get('CACHE_MAX_ITENS', 512), ttl=ttl)
+        else:
+            self.backend = None
+        
+        app.extensions['cache_relatorios'] = self
+    
+    def estatisticas(self):
+        with self._lock:
+            dados = {
+                'backend': type(self.backend).__name__ if self.backend else None,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+        if self.backend:
+            dados.update(self.backend.estatisticas())
+        return dados
+    
+    def em_cache(self, escopos):
+        """Decorator de view: escopos(args) retorna as chaves de versão lidas pela resposta"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.backend is None:
+                    return view(*args, **kwargs)
+                
+                from app import versoes
+                chave = self.chave(request.endpoint, request.args, versoes.obter(escopos(request.args)))
+                
+                valor = self.backend.get(chave)
+                self.registrar(valor is not None)
+                if valor is not None:
+                    return current_app.response_class(valor, mimetype='application/json')
+                
+                resposta = current_app.make_response(view(*args, **kwargs))
+                if resposta.status_code == 200:
+                    self.backend.set(chave, resposta.get_data())
+                return resposta
+            return wrapper
+        return decorator
+    
+    @staticmethod
+    def chave(endpoint, args, versoes):
+        """Chave de uma resposta: endpoint, parâmetros (MultiDict) e versões lidas"""
+        partes = [
+            endpoint,
+            '&'.join(f'{k}={v}' for k, v in sorted(args.items(multi=True))),
+            ','.join(f'{k}={v}' for k, v in sorted(versoes.items()))
+        ]
+        return hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
+
+cache = CacheRelatorios()
@@ -0,0 +1,150 @@
+"""Catálogo das categorias em memória do processo.
+
+As categorias são poucas e quase nunca mudam, mas eram lidas do banco em
+toda requisição: na listagem, na serialização de gastos e orçamentos (uma
+query por item, pelo lazy load de .categoria) e nas verificações de nome
+único. O catálogo guarda todas elas já serializadas (Categoria.serializar(),
+o formato de to_dict()), indexadas por id e por nome (sem diferenciar
+maiúsculas de minúsculas, como a collation do MySQL), na ordem do ORDER BY
+nome do banco.
+
+A validade é dada pela versão 'categorias' (app.versoes), que toda escrita
+em categorias incrementa:
+  
+  - se a requisição já leu essa versão (ETag, cache), o catálogo é comparado
+    com ela sem nenhuma query, e a resposta sai da mesma versão do ETag;
+  - fora disso, a versão é relida no máximo a cada CATALOGO_TTL_S segundos,
+    o prazo para os demais processos e máquinas convergirem;
+  - as escritas deste processo descartam o catálogo após o commit
+    (invalidar()).
+
+Uma versão diferente da carregada recarrega todas as categorias em uma única
+query. O catálogo é só um atalho: a restrição única de nome continua no
+banco, e um id ou nome ausente força uma nova verificação da versão antes de
+ser dado como inexistente; depois disso, um id fica anotado como inexistente
+até a versão mudar, sem novas consultas.
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select
+from app import db, versoes
+from app.models import Categoria
+
+# Carga vazia, que nunca corresponde a uma versão lida do banco
+_VAZIA = (None, (), {}, {}, frozenset())
+
+# Ids inexistentes anotados por versão (limita a memória usada com ids inventados)
+MAXIMO_AUSENTES = 1024
+
+
+def chave_nome(nome):
+    """Chave do índice por nome: sem diferenciar maiúsculas de minúsculas"""
+    return nome.casefold()
+
+
+class EstadoCatalogo:
+    """Catálogo de uma aplicação; a carga é trocada inteira, sem travar leituras"""
+    
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.carga = _VAZIA  # (versão, lista ordenada, por id, por nome, ids inexistentes)
+        self.verificado_em = 0.0
+        self.recargas = 0
+        self.verificacoes = 0
+        self._lock = threading.Lock()
+
+
+class CatalogoCategorias:
+    """Extensão com o catálogo de categorias de cada aplicação"""
+    
+    def init_app(self, app):
+        app.extensions['catalogo'] = EstadoCatalogo(app.config.get('CATALOGO_TTL_S', 5))
+    
+    def _estado(self):
+        return current_app.extensions['catalogo']
+    
+    def _carregar(self, estado, versao):
+        # Apenas as colunas: nenhuma instância do ORM entra na sessão (nem é
+        # enxergada nela)
+        colunas = [Categoria.__table__.c[coluna] for coluna in Categoria.COLUNAS]
+        linhas = db.session.execute(select(*colunas).order_by(Categoria.nome)).all()
+        lista = tuple(Categoria.serializar(*linha) for linha in linhas)
+        estado.carga = (
+            versao,
+            lista,
+            {categoria['id']: categoria for categoria in lista},
+            {chave_nome(categoria['nome']): categoria for categoria in lista},
+            set(),
+        )
+        with estado._lock:
+            estado.recargas += 1
+    
+    def _atual(self, forcar=False):
+        """Carga válida do catálogo; forcar relê a versão mesmo dentro do TTL"""
+        estado = self._estado()
+        versao = versoes.lida(versoes.CATEGORIAS)
+        if versao is None:
+            agora = time.monotonic()
+            if not forcar and estado.carga is not _VAZIA and agora - estado.verificado_em < estado.ttl:
+                return estado.carga
+            versao = versoes.obter([versoes.CATEGORIAS])[versoes.CATEGORIAS]
+            with estado._lock:
+                estado.verificacoes += 1
+        
+        if versao != estado.carga[0]:
+            self._carregar(estado, versao)
+        estado.verificado_em = time.monotonic()
+        return estado.carga
+    
+    def listar(self, apenas_ativas=False):
+        """Categorias ordenadas por nome (cópias)"""
+        return [dict(categoria) for categoria in self._atual()[1] if categoria['ativo'] or not apenas_ativas]
+    
+    def categoria(self, id):
+        """Categoria serializada pelo id (cópia), ou None se não existir; aceita
+        o id como texto, como o enviado pelos formulários"""
+        try:
+            id = int(id)
+        except (TypeError, ValueError):
+            return None
+        
+        carga = self._atual()
+        categoria = carga[2].get(id)
+        if categoria is None and id not in carga[4]:
+            # Pode ter sido criada em outro processo dentro do TTL; se não, fica
+            # anotada como inexistente nesta versão
+            carga = self._atual(forcar=True)
+            categoria = carga[2].get(id)
+            if categoria is None and len(carga[4]) < MAXIMO_AUSENTES:
+                carga[4].add(id)
+        return dict(categoria) if categoria is not None else None
+    
+    def por_nome(self, nome):
+        """Categoria serializada com esse nome, sem diferenciar maiúsculas de
+        minúsculas (cópia), ou None"""
+        chave = chave_nome(nome)
+        categoria = self._atual()[3].get(chave)
+        if categoria is None:
+            # Pode ter sido criada em outro processo dentro do TTL
+            categoria = self._atual(forcar=True)[3].get(chave)
+        return dict(categoria) if categoria is not None else None
+    
+    def invalidar(self):
+        """Descarta o catálogo deste processo (após uma escrita em categorias)"""
+        self._estado().carga = _VAZIA
+    
+    def estatisticas(self):
+        """Tamanho e uso do catálogo neste processo"""
+        estado = self._estado()
+        return {
+            'itens': len(estado.carga[1]),
+            'ausentes': len(estado.carga[4]),
+            'versao': estado.carga[0],
+            'ttl_s': estado.ttl,
+            'recargas': estado.recargas,
+            'verificacoes': estado.verificacoes,
+        }
+
+
+catalogo = CatalogoCategorias()
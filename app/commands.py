@@ -0,0 +1,133 @@
+import click
+from datetime import datetime
+from flask.cli import AppGroup
+from sqlalchemy import func, select, text
+from app import db, agregados, arquivo, recorrencias
+from app.models import Gasto
+from app.periodos import filtro_mes
+
+
+def _consultas_relatorios(mes, ano):
+    """Consultas representativas dos relatórios e o índice que cada uma deve usar"""
+    return [
+        ('recálculo de agregados', select(Gasto.tipo, func.sum(Gasto.valor)).where(
+            filtro_mes(Gasto.data, mes, ano)
+        ).group_by(Gasto.tipo), 'ix_gastos_data_id'),
+        ('maiores-gastos', select(Gasto.id).where(
+            Gasto.tipo == 'despesa',
+            filtro_mes(Gasto.data, mes, ano)
+        ).order_by(Gasto.valor.desc()).limit(10), 'ix_gastos_tipo_data'),
+        ('gastos por categoria', select(Gasto.id).where(
+            Gasto.categoria_id == 1,
+            filtro_mes(Gasto.data, mes, ano)
+        ), 'ix_gastos_categoria_data'),
+        ('gastos paginados', select(Gasto.id).where(
+            filtro_mes(Gasto.data, mes, ano)
+        ).order_by(Gasto.data.desc(), Gasto.id.desc()).limit(50), 'ix_gastos_data_id'),
+    ]
+
+
+def _plano_execucao(stmt):
+    """Retorna o plano de execução de uma consulta como lista de linhas de texto"""
+    dialeto = db.engine.dialect
+    sql = str(stmt.compile(dialect=dialeto, compile_kwargs={'literal_binds': True}))
+    
+    if dialeto.name == 'sqlite':
+        linhas = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+        return [linha[-1] for linha in linhas]
+    
+    linhas = db.session.execute(text(f'EXPLAIN {sql}')).mappings().all()
+    if dialeto.name == 'mysql':
+        return [f"{linha['table']}: type={linha['type']} key={linha['key']}" for linha in linhas]
+    return [' '.join(str(valor) for valor in linha.values()) for linha in linhas]
+
+
+def registrar_comandos(app):
+    """Registra os comandos de linha de comando da aplicação"""
+    
+    @app.cli.command('verificar-indices')
+    @click.option('--mes', type=int, default=lambda: datetime.now().month)
+    @click.option('--ano', type=int, default=lambda: datetime.now().year)
+    def verificar_indices(mes, ano):
+        """Verifica se as consultas dos relatórios usam os índices de gastos"""
+        falhas = 0
+        for nome, stmt, indice in _consultas_relatorios(mes, ano):
+            plano = _plano_execucao(stmt)
+            usa_indice = any(indice in linha for linha in plano)
+            if not usa_indice:
+                falhas += 1
+            click.echo(f"{'✅' if usa_indice else '❌'} {nome}: esperado {indice}")
+            for linha in plano:
+                click.echo(f'    {linha}')
+        
+        if falhas:
+            raise click.ClickException(f'{falhas} consulta(s) sem o índice esperado')
+    
+    agregados_cli = AppGroup('agregados', help='Manutenção dos agregados mensais dos relatórios')
+    
+    @agregados_cli.command('reconstruir')
+    def reconstruir_agregados():
+        """Recalcula todos os agregados mensais a partir de gastos"""
+        agregados.recalcular()
+        db.session.commit()
+        click.echo('✅ Agregados mensais reconstruídos')
+    
+    @agregados_cli.command('verificar')
+    def verificar_agregados():
+        """Compara os agregados mensais com gastos e lista divergências"""
+        divergencias = agregados.verificar()
+        for d in divergencias:
+            click.echo(f"❌ {d['chave']}: esperado {d['esperado']}, atual {d['atual']}")
+        
+        if divergencias:
+            raise click.ClickException(f'{len(divergencias)} divergência(s) encontrada(s)')
+        click.echo('✅ Agregados mensais consistentes com gastos')
+    
+    app.cli.add_command(agregados_cli)
+    
+    recorrentes_cli = AppGroup('recorrentes', help='Gastos recorrentes')
+    
+    @recorrentes_cli.command('materializar')
+    @click.option('--ate', help='último mês gerado, AAAA-MM (padrão: próximo mês)')
+    @click.option('--desde', help='primeiro mês gerado, AAAA-MM (padrão: o mesmo de --ate)')
+    def materializar_recorrentes(ate, desde):
+        """Gera as ocorrências dos gastos recorrentes nos meses informados"""
+        try:
+            fim = recorrencias.ler_periodo(ate) if ate else recorrencias.proximo_mes()
+            inicio = recorrencias.ler_periodo(desde) if desde else fim
+            resultado = recorrencias.materializar(inicio, fim)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        db.session.commit()
+        
+        meses = resultado['meses']
+        click.echo(f"✅ {resultado['criados']} gasto(s) gerado(s) a partir de {resultado['series']} "
+                   f"série(s) recorrente(s), de {meses[0]} a {meses[-1]}")
+    
+    app.cli.add_command(recorrentes_cli)
+    
+    arquivo_cli = AppGroup('arquivo', help='Arquivamento de anos fechados de gastos')
+    
+    @arquivo_cli.command('arquivar')
+    @click.argument('ano', type=int)
+    def arquivar_ano(ano):
+        """Move os gastos de um ano fechado para gastos_arquivo"""
+        try:
+            resultado = arquivo.arquivar(ano)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        db.session.commit()
+        click.echo(f"✅ {resultado['movidos']} gasto(s) de {ano} arquivado(s)")
+    
+    @arquivo_cli.command('restaurar')
+    @click.argument('ano', type=int)
+    def restaurar_ano(ano):
+        """Devolve os gastos arquivados de um ano para gastos"""
+        try:
+            resultado = arquivo.restaurar(ano)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        db.session.commit()
+        click.echo(f"✅ {resultado['movidos']} gasto(s) de {ano} restaurado(s)")
+    
+    app.cli.add_command(arquivo_cli)
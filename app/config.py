@@ -3,16 +3,93 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Processos e threads do servidor WSGI (ver gunicorn.conf.py)
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 2))
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def opcoes_pool(workers, threads, max_conexoes=None):
+    """Dimensiona o pool de conexões de cada worker.
+    
+    Cada thread atende uma requisição por vez, então threads conexões por
+    worker bastam e não há overflow. Com max_conexoes (limite de conexões
+    desta máquina no banco), o total workers * pool_size nunca o ultrapassa;
+    threads excedentes aguardam uma conexão livre (pool_timeout).
+    """
+    pool_size = threads
+    if max_conexoes:
+        pool_size = max(1, min(threads, max_conexoes // workers))
+    
+    return {
+        'pool_size': pool_size,
+        'max_overflow': 0,
+    }
+
+
+def _env_int(nome, padrao):
+    valor = os.environ.get(nome)
+    return int(valor) if valor else padrao
+
+
+def opcoes_engine(workers=WEB_CONCURRENCY, threads=GUNICORN_THREADS):
+    """Opções do pool de conexões; cada uma pode ser sobrescrita por variável de ambiente"""
+    pool = opcoes_pool(workers, threads, _env_int('DB_MAX_CONNECTIONS', 0))
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', pool['pool_size']),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', pool['max_overflow']),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 300),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') != '0',
+    }
+
 
 class Config:
     """Configurações base da aplicação"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_recycle': 300,
-        'pool_pre_ping': True,
-    }
+    SQLALCHEMY_ENGINE_OPTIONS = opcoes_engine()
+    
+    # Réplica somente leitura opcional para listagens e relatórios (ver
+    # app/replica.py): janela em que um cliente que escreveu lê do principal
+    # e tempo sem usar a réplica depois de uma falha
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_JANELA_LEITURA_S = int(os.environ.get('REPLICA_JANELA_LEITURA_S', 10))
+    REPLICA_ESPERA_FALHA_S = int(os.environ.get('REPLICA_ESPERA_FALHA_S', 30))
+    
+    # Telemetria do pool de conexões (app/telemetria.py) e token opcional
+    # exigido por /internal/metricas
+    TELEMETRIA_POOL = os.environ.get('TELEMETRIA_POOL', '1') != '0'
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+    # Sem METRICAS_TOKEN, /internal/metricas fica aberto (desenvolvimento) ou
+    # responde 404 (produção)
+    METRICAS_SEM_TOKEN = True
+    
+    # Instrumentação de SQL por requisição (Server-Timing e log de lentidão)
+    SQL_INSTRUMENTACAO = os.environ.get('SQL_INSTRUMENTACAO', '0') == '1'
+    SQL_LIMITE_LENTO_MS = float(os.environ.get('SQL_LIMITE_LENTO_MS', 100))
+    REQUISICAO_LIMITE_LENTO_MS = float(os.environ.get('REQUISICAO_LIMITE_LENTO_MS', 500))
+    
+    # Codificação JSON com orjson (se instalado), com saída idêntica à padrão
+    JSON_RAPIDO = os.environ.get('JSON_RAPIDO', '1') == '1'
+    
+    # Cache dos relatórios: 'local' (memória do processo), 'redis' ou 'nenhum'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'local')
+    CACHE_MAX_ITENS = int(os.environ.get('CACHE_MAX_ITENS', 512))
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    
+    # Catálogo de categorias em memória (app/catalogo.py): intervalo máximo
+    # entre as verificações da versão das categorias fora das requisições com ETag
+    CATALOGO_TTL_S = float(os.environ.get('CATALOGO_TTL_S', 5))
+    
+    # Conexões do pool assíncrono de cada processo no modo ASGI (asgi.py),
+    # em que cada requisição pode usar várias conexões ao mesmo tempo
+    ASGI_POOL_SIZE = int(os.environ.get('ASGI_POOL_SIZE', 10))
+    
+    # Aquece o pool de conexões em segundo plano ao iniciar (ver app/prontidao.py)
+    AQUECER_BANCO = os.environ.get('AQUECER_BANCO', '1') != '0'
 
 
 class DevelopmentConfig(Config):
@@ -23,12 +100,17 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Configurações de produção"""
     DEBUG = False
+    METRICAS_SEM_TOKEN = False
 
 
 class TestingConfig(Config):
     """Configurações de teste"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {}
+    AQUECER_BANCO = False
+    TELEMETRIA_POOL = False
 
 
 config = {
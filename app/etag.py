@@ -0,0 +1,51 @@
+"""GET condicional (ETag / If-None-Match) baseado nas versões dos dados.
+
+O validador é calculado apenas a partir das versões dos escopos lidos pela
+resposta (app.versoes), sem montar o conteúdo. Se o cliente já tem a versão
+atual, a resposta é 304 e a view nem chega a ser executada.
+"""
+import hashlib
+from functools import wraps
+from flask import current_app, request
+from app import versoes
+
+
+def calcular_etag(endpoint, view_args, args, versoes_lidas):
+    """ETag de uma resposta: endpoint, parâmetros (MultiDict) e versões lidas"""
+    partes = [
+        endpoint,
+        '&'.join(f'{k}={v}' for k, v in sorted(view_args.items())),
+        '&'.join(f'{k}={v}' for k, v in sorted(args.items(multi=True))),
+        ','.join(f'{k}={v}' for k, v in sorted(versoes_lidas.items()))
+    ]
+    return hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
+
+def aplicar_cabecalhos(resposta, etag):
+    resposta.set_etag(etag)
+    # O navegador guarda a resposta, mas revalida a cada uso (304 se nada mudou)
+    resposta.cache_control.private = True
+    resposta.cache_control.no_cache = True
+    return resposta
+
+
+def com_etag(escopos):
+    """Decorator de view: escopos(args) retorna as chaves de versão lidas pela
+    resposta, a partir dos parâmetros da requisição"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = calcular_etag(
+                request.endpoint, request.view_args, request.args, versoes.obter(escopos(request.args))
+            )
+            
+            if request.if_none_match.contains(etag):
+                resposta = current_app.response_class(status=304)
+                return aplicar_cabecalhos(resposta, etag)
+            
+            resposta = current_app.make_response(view(*args, **kwargs))
+            if resposta.status_code == 200:
+                aplicar_cabecalhos(resposta, etag)
+            return resposta
+        return wrapper
+    return decorator
@@ -0,0 +1,107 @@
+"""Exportação de gastos em CSV ou NDJSON, transmitida conforme as linhas chegam.
+
+As linhas são lidas como tuplas (sem instanciar objetos do ORM) com cursor do
+lado do servidor (yield_per/stream_results) e enviadas em blocos, então o uso
+de memória é constante qualquer que seja o número de gastos exportados.
+"""
+import csv
+import io
+import json
+from sqlalchemy import select, union_all
+from app import db, arquivo
+from app.models import Categoria, Gasto
+
+LINHAS_POR_BLOCO = 1000
+
+COLUNAS = (
+    'id', 'descricao', 'valor', 'data', 'categoria_id', 'categoria_nome', 'tipo',
+    'forma_pagamento', 'observacao', 'recorrente', 'created_at', 'updated_at'
+)
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _consulta(filtros, com_arquivo=False):
+    consulta = select(
+        Gasto.id,
+        Gasto.descricao,
+        Gasto.valor,
+        Gasto.data,
+        Gasto.categoria_id,
+        Categoria.nome.label('categoria_nome'),
+        Gasto.tipo,
+        Gasto.forma_pagamento,
+        Gasto.observacao,
+        Gasto.recorrente,
+        Gasto.created_at,
+        Gasto.updated_at
+    ).outerjoin(Categoria, Categoria.id == Gasto.categoria_id).where(*filtros)
+    
+    # Com o arquivo, um único UNION ALL ordenado pelo banco, lido pelo mesmo cursor
+    if com_arquivo:
+        uniao = union_all(consulta, arquivo.no_arquivo(consulta)).subquery()
+        return select(uniao).order_by(uniao.c.data.desc(), uniao.c.id.desc())
+    return consulta.order_by(Gasto.data.desc(), Gasto.id.desc())
+
+
+def _blocos(filtros, com_arquivo=False):
+    """Lê as linhas em blocos a partir de um cursor do lado do servidor"""
+    consulta = _consulta(filtros, com_arquivo).execution_options(yield_per=LINHAS_POR_BLOCO)
+    resultado = db.session.execute(consulta)
+    try:
+        for bloco in resultado.partitions():
+            yield bloco
+    finally:
+        resultado.close()
+
+
+def _iso(valor):
+    return valor.isoformat() if valor else None
+
+
+def gerar_csv(filtros, com_arquivo=False):
+    """Gera o CSV em pedaços: cabeçalho e um pedaço por bloco de linhas"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS)
+    
+    for bloco in _blocos(filtros, com_arquivo):
+        for linha in bloco:
+            escritor.writerow((
+                linha.id, linha.descricao, linha.valor, _iso(linha.data), linha.categoria_id,
+                linha.categoria_nome, linha.tipo, linha.forma_pagamento, linha.observacao,
+                'true' if linha.recorrente else 'false', _iso(linha.created_at), _iso(linha.updated_at)
+            ))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gerar_ndjson(filtros, com_arquivo=False):
+    """Gera um objeto JSON por linha, com os mesmos campos do CSV"""
+    for bloco in _blocos(filtros, com_arquivo):
+        yield ''.join(json.dumps({
+            'id': linha.id,
+            'descricao': linha.descricao,
+            'valor': float(linha.valor),
+            'data': _iso(linha.data),
+            'categoria_id': linha.categoria_id,
+            'categoria_nome': linha.categoria_nome,
+            'tipo': linha.tipo,
+            'forma_pagamento': linha.forma_pagamento,
+            'observacao': linha.observacao,
+            'recorrente': linha.recorrente,
+            'created_at': _iso(linha.created_at),
+            'updated_at': _iso(linha.updated_at)
+        }, ensure_ascii=False) + '\n' for linha in bloco)
+
+
+def gerar(formato, filtros, com_arquivo=False):
+    """Gera a exportação; com_arquivo inclui os gastos arquivados"""
+    return gerar_csv(filtros, com_arquivo) if formato == 'csv' else gerar_ndjson(filtros, com_arquivo)
@@ -0,0 +1,245 @@
+"""Importação em lote de gastos a partir de arquivos CSV ou OFX.
+
+O arquivo é lido como stream e os gastos válidos são inseridos em lotes de
+tamanho fixo, cada lote em sua própria transação (com agregados e versões).
+Apenas o lote corrente fica em memória, qualquer que seja o tamanho do arquivo.
+Duplicados são detectados pelo hash do conteúdo (ou FITID do OFX), guardado
+em gastos.hash_importacao (e procurado também nos gastos arquivados). Linhas
+idênticas no mesmo arquivo (dois cafés no mesmo dia) são gastos distintos: a
+ordem de cada uma entre as idênticas entra no hash, e para isso o digest de
+cada conteúdo distinto fica em memória durante a importação.
+"""
+import codecs
+import csv
+import hashlib
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.exc import IntegrityError
+from app import db, agregados, arquivo, versoes
+from app.models import Categoria, Gasto
+from app.validacao import validar_gasto
+
+TAMANHO_LOTE = 500
+MAX_ERROS_REPORTADOS = 100
+TIPOS_VALIDOS = ('despesa', 'receita')
+
+
+def ler_csv(arquivo):
+    """Gera (linha no arquivo, dados) de um CSV com cabeçalho, separado por ',' ou ';'"""
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    cabecalho = texto.readline()
+    delimitador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    campos = [campo.strip().lower() for campo in next(csv.reader([cabecalho], delimiter=delimitador))]
+    
+    leitor = csv.DictReader(texto, fieldnames=campos, delimiter=delimitador)
+    for linha in leitor:
+        # line_num não conta o cabeçalho, lido antes do leitor
+        yield leitor.line_num + 1, {
+            campo: valor.strip() for campo, valor in linha.items()
+            if campo and isinstance(valor, str)
+        }
+
+
+def _tags_ofx(arquivo, tamanho_bloco=65536):
+    """Gera (tag, valor) de um OFX (SGML ou XML) lendo o arquivo em blocos"""
+    bloco = arquivo.read(tamanho_bloco)
+    codificacao = 'cp1252' if b'CHARSET:1252' in bloco or b'USASCII' in bloco else 'utf-8'
+    decodificador = codecs.getincrementaldecoder(codificacao)(errors='replace')
+    
+    resto = ''
+    while bloco:
+        partes = (resto + decodificador.decode(bloco)).split('<')
+        resto = partes.pop()
+        for parte in partes:
+            tag, _, valor = parte.partition('>')
+            if tag:
+                yield tag.strip().upper(), valor.strip()
+        bloco = arquivo.read(tamanho_bloco)
+    
+    tag, _, valor = resto.partition('>')
+    if tag:
+        yield tag.strip().upper(), valor.strip()
+
+
+def ler_ofx(arquivo):
+    """Gera (transação, dados) para cada bloco <STMTTRN> de um extrato OFX"""
+    transacao = None
+    numero = 0
+    
+    for tag, valor in _tags_ofx(arquivo):
+        if tag == 'STMTTRN':
+            transacao = {}
+        elif tag == '/STMTTRN' and transacao is not None:
+            numero += 1
+            yield numero, _converter_ofx(transacao)
+            transacao = None
+        elif transacao is not None and not tag.startswith('/'):
+            transacao[tag] = valor
+
+
+def _converter_ofx(transacao):
+    """Converte uma transação OFX para o formato de entrada de gastos"""
+    dados = {
+        'descricao': transacao.get('MEMO') or transacao.get('NAME'),
+        'fitid': transacao.get('FITID'),
+    }
+    
+    data = transacao.get('DTPOSTED', '')[:8]
+    if len(data) == 8:
+        dados['data'] = f'{data[:4]}-{data[4:6]}-{data[6:]}'
+    
+    valor = transacao.get('TRNAMT', '')
+    if valor:
+        dados['tipo'] = 'despesa' if valor.lstrip().startswith('-') else 'receita'
+        dados['valor'] = valor.replace('-', '').replace('+', '')
+    return dados
+
+
+def _converter_valor(texto):
+    """Converte '1234.56', '1.234,56', '1,234.56' ou 'R$ 10,00' para Decimal
+    positivo com 2 casas; o último entre ',' e '.' é o separador decimal"""
+    original = texto
+    texto = str(texto).replace('R$', '').replace(' ', '')
+    virgula, ponto = texto.rfind(','), texto.rfind('.')
+    if virgula > ponto:
+        texto = texto.replace('.', '').replace(',', '.')
+    elif virgula != -1:
+        texto = texto.replace(',', '')
+    try:
+        exato = Decimal(texto)
+        valor = exato.quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f'Valor inválido: {texto}')
+    # '1,234' seria 1,23 ou 1234: recusado em vez de arredondado
+    if valor != exato:
+        raise ValueError(f'Valor ambíguo ou com mais de duas casas decimais: {original}')
+    if valor <= 0:
+        raise ValueError('Valor deve ser positivo')
+    return valor
+
+
+def _preparar(dados, categorias, ocorrencias):
+    """Valida uma linha do arquivo e monta o registro a inserir em gastos;
+    ocorrencias conta as linhas de mesmo conteúdo já lidas no arquivo"""
+    erro = validar_gasto(dados)
+    if erro:
+        raise ValueError(erro)
+    
+    valor = _converter_valor(dados['valor'])
+    
+    try:
+        data = datetime.strptime(dados.get('data') or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Data inválida: {dados.get('data')} (use AAAA-MM-DD)")
+    
+    tipo = dados.get('tipo') or 'despesa'
+    if tipo not in TIPOS_VALIDOS:
+        raise ValueError(f'Tipo inválido: {tipo}')
+    
+    categoria_id = None
+    if dados.get('categoria'):
+        categoria_id = categorias.get(dados['categoria'].lower())
+        if categoria_id is None:
+            raise ValueError(f"Categoria não encontrada: {dados['categoria']}")
+    elif dados.get('categoria_id'):
+        try:
+            categoria_id = int(dados['categoria_id'])
+        except ValueError:
+            categoria_id = None
+        if categoria_id not in categorias.values():
+            raise ValueError(f"Categoria não encontrada: {dados['categoria_id']}")
+    
+    descricao = dados['descricao']
+    if dados.get('fitid'):
+        identificador = f"ofx:{dados['fitid']}"
+    else:
+        identificador = f'{data.isoformat()}|{valor}|{tipo}|{descricao.strip().lower()}'
+        # A primeira ocorrência mantém o hash de antes; as seguintes, idênticas
+        # a ela, recebem a ordem no arquivo
+        digest = hashlib.sha1(identificador.encode()).digest()
+        ordem = ocorrencias.get(digest, 0) + 1
+        ocorrencias[digest] = ordem
+        if ordem > 1:
+            identificador = f'{identificador}|{ordem}'
+    
+    return {
+        'descricao': descricao[:255],
+        'valor': valor,
+        'data': data,
+        'categoria_id': categoria_id,
+        'tipo': tipo,
+        'forma_pagamento': dados.get('forma_pagamento') or None,
+        'observacao': dados.get('observacao') or None,
+        'recorrente': False,
+        'hash_importacao': hashlib.sha1(identificador.encode()).hexdigest(),
+    }
+
+
+def _inserir_lote(lote, resultado):
+    """Insere um lote ignorando hashes já existentes; confirma a transação do lote"""
+    # Duplicados dentro do próprio lote
+    por_hash = {}
+    for registro in lote:
+        por_hash.setdefault(registro['hash_importacao'], registro)
+    
+    # Uma nova tentativa cobre importações concorrentes do mesmo conteúdo
+    for tentativa in range(2):
+        consulta = select(Gasto.hash_importacao).where(Gasto.hash_importacao.in_(list(por_hash)))
+        if arquivo.anos_arquivados():
+            consulta = union_all(consulta, arquivo.no_arquivo(consulta))
+        existentes = set(db.session.scalars(consulta))
+        novos = [registro for h, registro in por_hash.items() if h not in existentes]
+        
+        try:
+            if novos:
+                db.session.execute(insert(Gasto.__table__), novos)
+                agregados.registrar_linhas(novos)
+                versoes.incrementar(*{
+                    versoes.chave_mes(r['data'].year, r['data'].month) for r in novos
+                })
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if tentativa:
+                raise
+    
+    resultado['importados'] += len(novos)
+    resultado['duplicados'] += len(lote) - len(novos)
+
+
+def _registrar_erro(resultado, linha, mensagem):
+    resultado['total_erros'] += 1
+    if len(resultado['erros']) < MAX_ERROS_REPORTADOS:
+        resultado['erros'].append({'linha': linha, 'erro': mensagem})
+
+
+def importar(registros, tamanho_lote=TAMANHO_LOTE):
+    """Importa os registros (linha, dados) em lotes e retorna o resumo da importação"""
+    resultado = {'importados': 0, 'duplicados': 0, 'total_erros': 0, 'erros': []}
+    
+    # Uma única consulta resolve nomes de categoria para ids
+    categorias = {nome.lower(): id for id, nome in db.session.query(Categoria.id, Categoria.nome)}
+    
+    ocorrencias = {}
+    lote = []
+    try:
+        for linha, dados in registros:
+            try:
+                lote.append(_preparar(dados, categorias, ocorrencias))
+            except ValueError as e:
+                _registrar_erro(resultado, linha, str(e))
+                continue
+            
+            if len(lote) >= tamanho_lote:
+                _inserir_lote(lote, resultado)
+                lote = []
+    except (csv.Error, UnicodeDecodeError) as e:
+        resultado['erro_arquivo'] = f'Arquivo inválido: {e}'
+    
+    if lote:
+        _inserir_lote(lote, resultado)
+    
+    return resultado
@@ -0,0 +1,131 @@
+"""Instrumentação de SQL por requisição (opcional, SQL_INSTRUMENTACAO=1).
+
+Conta as instruções SQL e o tempo gasto no banco em cada requisição por
+eventos do engine, mede o tempo de serialização JSON e devolve tudo no
+cabeçalho Server-Timing (visível na aba Network do navegador). Requisições
+e instruções acima dos limites configurados são registradas no log com o
+SQL normalizado. Desligada, nenhum evento ou hook é registrado.
+
+O tempo de banco cobre a execução de cada instrução no cursor. Com o
+PyMySQL o resultado é lido por inteiro nesse momento; com o SQLite a
+leitura das linhas acontece depois e fica fora do tempo de banco. Respostas
+em streaming (exportação) só têm medida a parte anterior ao corpo.
+"""
+import re
+import time
+from collections import Counter
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+_ESPACOS = re.compile(r'\s+')
+_TEXTOS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMETROS = re.compile(r'%\(\w+\)s|%s|:\w+|\?')
+_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def normalizar_sql(sql):
+    """Troca literais e parâmetros por ? e colapsa listas IN, agrupando consultas iguais"""
+    sql = _ESPACOS.sub(' ', sql).strip()
+    sql = _TEXTOS.sub('?', sql)
+    sql = _PARAMETROS.sub('?', sql)
+    sql = _NUMEROS.sub('?', sql)
+    return _LISTAS.sub('(...)', sql)
+
+
+class EstadoRequisicao:
+    """Medições acumuladas durante uma requisição"""
+    
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_db = 0.0
+        self.tempo_serializacao = 0.0
+        self.instrucoes = Counter()
+
+
+def _estado():
+    return g.get('_instrumentacao') if has_app_context() else None
+
+
+class InstrumentacaoSQL:
+    """Extensão que mede o custo de cada requisição no banco"""
+    
+    def init_app(self, app):
+        if not app.config.get('SQL_INSTRUMENTACAO'):
+            return
+        
+        self.logger = app.logger
+        self.limite_sql = app.config['SQL_LIMITE_LENTO_MS']
+        self.limite_requisicao = app.config['REQUISICAO_LIMITE_LENTO_MS']
+        
+        from app import db
+        with app.app_context():
+            # Inclui o engine da réplica, quando configurada (app/replica.py)
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._antes_execucao)
+                event.listen(engine, 'after_cursor_execute', self._depois_execucao)
+        
+        # A serialização é medida em volta do response() do provedor JSON,
+        # usado pelo jsonify e pelos dicts retornados pelas views
+        response = app.json.response
+        
+        def response_medido(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return response(*args, **kwargs)
+            finally:
+                estado = _estado()
+                if estado is not None:
+                    estado.tempo_serializacao += time.perf_counter() - inicio
+        
+        app.json.response = response_medido
+        
+        app.before_request(self._iniciar)
+        app.after_request(self._finalizar)
+        app.extensions['instrumentacao_sql'] = self
+    
+    def _antes_execucao(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_inicio_instrucoes', []).append(time.perf_counter())
+    
+    def _depois_execucao(self, conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info['_inicio_instrucoes'].pop()
+        estado = _estado()
+        if estado is None:
+            return
+        
+        estado.consultas += 1
+        estado.tempo_db += duracao
+        estado.instrucoes[statement] += 1
+        
+        if duracao * 1000 >= self.limite_sql:
+            self.logger.warning('SQL lenta (%.1f ms) em %s %s: %s', duracao * 1000,
+                                request.method, request.path, normalizar_sql(statement))
+    
+    def _iniciar(self):
+        g._instrumentacao = EstadoRequisicao()
+    
+    def _finalizar(self, response):
+        estado = g.pop('_instrumentacao', None)
+        if estado is None:
+            return response
+        
+        total = (time.perf_counter() - estado.inicio) * 1000
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={estado.tempo_db * 1000:.1f};desc="{estado.consultas} queries"',
+            f'serializacao;dur={estado.tempo_serializacao * 1000:.1f}',
+            f'total;dur={total:.1f}',
+        ])
+        
+        if total >= self.limite_requisicao:
+            mais_repetida = ''
+            sql, vezes = (estado.instrucoes.most_common(1) or [(None, 0)])[0]
+            if vezes > 1:
+                mais_repetida = f'; mais repetida ({vezes}x): {normalizar_sql(sql)}'
+            self.logger.warning('Requisição lenta %s %s: %.1f ms, %d queries, db %.1f ms, serialização %.1f ms%s',
+                                request.method, request.full_path.rstrip('?'), total, estado.consultas,
+                                estado.tempo_db * 1000, estado.tempo_serializacao * 1000, mais_repetida)
+        return response
+
+
+instrumentacao = InstrumentacaoSQL()
@@ -0,0 +1,59 @@
+"""Alteração e exclusão de gastos em lote.
+
+Cada operação é um único UPDATE ... WHERE ou DELETE ... WHERE sobre gastos,
+sem carregar instâncias do ORM, na transação corrente. Antes dele, uma query
+agrupada obtém a contribuição dos gastos atingidos para os agregados
+mensais, travando essas linhas (FOR UPDATE) para que escritas concorrentes
+não as alterem entre a soma e o comando; o delta é aplicado por chave do
+agregado, e as versões dos meses afetados (antes e depois da alteração) são
+incrementadas.
+"""
+from sqlalchemy import delete, update
+from app import db, agregados, versoes
+from app.models import Gasto
+
+
+def _incrementar_versoes(meses):
+    versoes.incrementar(*(versoes.chave_mes(ano, mes) for ano, mes in meses))
+
+
+def _resultado(afetados, meses):
+    return {
+        'afetados': afetados,
+        'meses': [f'{ano:04d}-{mes:02d}' for ano, mes in sorted(meses)]
+    }
+
+
+def atualizar(condicoes, alteracoes):
+    """Aplica as alterações (campos de Gasto) a todos os gastos que atendem às
+    condições. Executa na transação corrente, sem commit; updated_at é
+    atualizado pelo onupdate da coluna."""
+    anteriores = agregados.contribuicoes(*condicoes, bloquear=True)
+    if not anteriores:
+        return _resultado(0, set())
+    
+    afetados = db.session.execute(
+        update(Gasto).where(*condicoes).values(**alteracoes),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    
+    meses = agregados.mover_contribuicoes(anteriores, alteracoes)
+    _incrementar_versoes(meses)
+    return _resultado(afetados, meses)
+
+
+def excluir(condicoes):
+    """Exclui todos os gastos que atendem às condições. Executa na transação
+    corrente, sem commit."""
+    anteriores = agregados.contribuicoes(*condicoes, bloquear=True)
+    if not anteriores:
+        return _resultado(0, set())
+    
+    afetados = db.session.execute(
+        delete(Gasto).where(*condicoes),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    
+    meses = agregados.remover_contribuicoes(anteriores)
+    _incrementar_versoes(meses)
+    return _resultado(afetados, meses)
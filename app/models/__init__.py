@@ -18,18 +18,26 @@ class Categoria(db.Model):
     # Relacionamento com gastos
     gastos = db.relationship('Gasto', backref='categoria', lazy='dynamic')
     
-    def to_dict(self):
+    # Colunas na ordem dos argumentos de serializar(), para consultas sem o ORM
+    COLUNAS = ('id', 'nome', 'descricao', 'cor', 'icone', 'ativo', 'created_at', 'updated_at')
+    
+    @staticmethod
+    def serializar(id, nome, descricao, cor, icone, ativo, created_at, updated_at):
+        """Formato de to_dict() a partir dos valores das colunas"""
         return {
-            'id': self.id,
-            'nome': self.nome,
-            'descricao': self.descricao,
-            'cor': self.cor,
-            'icone': self.icone,
-            'ativo': self.ativo,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'id': id,
+            'nome': nome,
+            'descricao': descricao,
+            'cor': cor,
+            'icone': icone,
+            'ativo': ativo,
+            'created_at': created_at.isoformat() if created_at else None,
+            'updated_at': updated_at.isoformat() if updated_at else None
         }
     
+    def to_dict(self):
+        return self.serializar(*(getattr(self, coluna) for coluna in self.COLUNAS))
+    
     def __repr__(self):
         return f'<Categoria {self.nome}>'
 
@@ -48,30 +56,83 @@ class Gasto(db.Model):
     observacao = db.Column(db.Text)
     comprovante = db.Column(db.String(255))  # Caminho para arquivo de comprovante
     recorrente = db.Column(db.Boolean, default=False)
+    hash_importacao = db.Column(db.String(40))  # Detecta duplicados na importação
+    recorrencia_origem_id = db.Column(db.Integer)  # Gasto recorrente que gerou esta ocorrência
+    recorrencia_periodo = db.Column(db.String(7))  # Mês da ocorrência gerada, 'AAAA-MM'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    # Índices compostos conforme os padrões de acesso dos relatórios e listagens
+    __table_args__ = (
+        db.Index('ix_gastos_tipo_data', 'tipo', 'data'),
+        db.Index('ix_gastos_categoria_data', 'categoria_id', 'data'),
+        db.Index('ix_gastos_data_id', 'data', 'id'),
+        db.Index('ix_gastos_hash_importacao', 'hash_importacao', unique=True),
+        db.Index('ix_gastos_recorrencia', 'recorrencia_origem_id', 'recorrencia_periodo', unique=True),
+        # Busca textual; no SQLite o índice é a tabela FTS5 gastos_fts (app/busca.py)
+        db.Index('ix_gastos_texto', 'descricao', 'observacao', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        # Ids nunca reaproveitados no SQLite, pois os gastos arquivados voltam com o mesmo id
+        {'sqlite_autoincrement': True},
+    )
+    
+    def to_dict(self, incluir_categoria=True):
+        from app.catalogo import catalogo
+        dados = {
             'id': self.id,
             'descricao': self.descricao,
             'valor': float(self.valor),
             'data': self.data.isoformat() if self.data else None,
             'categoria_id': self.categoria_id,
-            'categoria': self.categoria.to_dict() if self.categoria else None,
             'tipo': self.tipo,
             'forma_pagamento': self.forma_pagamento,
             'observacao': self.observacao,
             'comprovante': self.comprovante,
             'recorrente': self.recorrente,
+            'recorrencia_origem_id': self.recorrencia_origem_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if incluir_categoria:
+            dados['categoria'] = catalogo.categoria(self.categoria_id)
+        return dados
     
     def __repr__(self):
         return f'<Gasto {self.descricao} - R${self.valor}>'
 
 
+class GastoArquivo(db.Model):
+    """Gastos de anos fechados, movidos de gastos pelo arquivamento (app/arquivo.py)"""
+    __tablename__ = 'gastos_arquivo'
+    
+    # Mesmas colunas de gastos, na mesma ordem; o id é o original
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    descricao = db.Column(db.String(255), nullable=False)
+    valor = db.Column(db.Numeric(10, 2), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+    categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'), nullable=True)
+    tipo = db.Column(db.String(20))
+    forma_pagamento = db.Column(db.String(50))
+    observacao = db.Column(db.Text)
+    comprovante = db.Column(db.String(255))
+    recorrente = db.Column(db.Boolean)
+    hash_importacao = db.Column(db.String(40))
+    recorrencia_origem_id = db.Column(db.Integer)
+    recorrencia_periodo = db.Column(db.String(7))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_gastos_arquivo_tipo_data', 'tipo', 'data'),
+        db.Index('ix_gastos_arquivo_categoria_data', 'categoria_id', 'data'),
+        db.Index('ix_gastos_arquivo_data_id', 'data', 'id'),
+        db.Index('ix_gastos_arquivo_hash_importacao', 'hash_importacao'),
+        db.Index('ix_gastos_arquivo_recorrencia', 'recorrencia_origem_id', 'recorrencia_periodo'),
+    )
+    
+    def __repr__(self):
+        return f'<GastoArquivo {self.descricao} - R${self.valor}>'
+
+
 class OrcamentoMensal(db.Model):
     """Modelo para orçamento mensal por categoria"""
     __tablename__ = 'orcamentos_mensais'
@@ -92,17 +153,111 @@ class OrcamentoMensal(db.Model):
         db.UniqueConstraint('categoria_id', 'mes', 'ano', name='unique_orcamento_categoria_mes_ano'),
     )
     
-    def to_dict(self):
-        return {
+    def to_dict(self, incluir_categoria=True):
+        from app.catalogo import catalogo
+        dados = {
             'id': self.id,
             'categoria_id': self.categoria_id,
-            'categoria': self.categoria.to_dict() if self.categoria else None,
             'mes': self.mes,
             'ano': self.ano,
             'valor_limite': float(self.valor_limite),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if incluir_categoria:
+            dados['categoria'] = catalogo.categoria(self.categoria_id)
+        return dados
     
     def __repr__(self):
         return f'<OrcamentoMensal {self.mes}/{self.ano} - R${self.valor_limite}>'
+
+
+class AgregadoMensal(db.Model):
+    """Totais mensais pré-agregados de gastos, mantidos a cada escrita"""
+    __tablename__ = 'agregados_mensais'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ano = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)  # 1-12
+    tipo = db.Column(db.String(20), nullable=False)  # '' quando o gasto não tem tipo
+    categoria_id = db.Column(db.Integer, nullable=False)  # 0 quando sem categoria
+    forma_pagamento = db.Column(db.String(50), nullable=False)  # '' quando não informada
+    total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('ano', 'mes', 'tipo', 'categoria_id', 'forma_pagamento',
+                            name='unique_agregado_mensal'),
+    )
+    
+    def __repr__(self):
+        return f'<AgregadoMensal {self.mes}/{self.ano} {self.tipo} - R${self.total}>'
+
+
+class VersaoDados(db.Model):
+    """Contador de versão dos dados, incrementado a cada escrita no escopo"""
+    __tablename__ = 'versoes_dados'
+    
+    chave = db.Column(db.String(50), primary_key=True)  # Ex.: 'categorias', 'gastos:2025-11'
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VersaoDados {self.chave}={self.versao}>'
+
+
+class AnoArquivado(db.Model):
+    """Ano cujos gastos estão em gastos_arquivo"""
+    __tablename__ = 'anos_arquivados'
+    
+    ano = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)  # Gastos movidos
+    arquivado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AnoArquivado {self.ano}: {self.quantidade}>'
+
+
+class RecorrenciaGerada(db.Model):
+    """Mês já gerado de uma série recorrente, mesmo que a ocorrência tenha sido excluída"""
+    __tablename__ = 'recorrencias_geradas'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Chave da série, com os nulos como nos agregados ('' e 0)
+    descricao = db.Column(db.String(255), nullable=False)
+    valor = db.Column(db.Numeric(10, 2), nullable=False)
+    categoria_id = db.Column(db.Integer, nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)
+    forma_pagamento = db.Column(db.String(50), nullable=False)
+    periodo = db.Column(db.String(7), nullable=False)  # 'AAAA-MM'
+    gerado_em = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('descricao', 'valor', 'categoria_id', 'tipo', 'forma_pagamento', 'periodo',
+                            name='unique_recorrencia_gerada'),
+    )
+    
+    def __repr__(self):
+        return f'<RecorrenciaGerada {self.descricao} {self.periodo}>'
+
+
+def serializar_com_categorias(itens, sideload=False):
+    """Serializa gastos/orçamentos com as categorias do catálogo (app/catalogo.py).
+    
+    Com sideload, cada categoria aparece uma única vez no mapa 'categorias'
+    e os itens trazem apenas 'categoria_id'.
+    """
+    if not sideload:
+        return {'data': [item.to_dict() for item in itens]}
+    
+    from app.catalogo import catalogo
+    categorias = {}
+    for item in itens:
+        if item.categoria_id is not None and item.categoria_id not in categorias:
+            categoria = catalogo.categoria(item.categoria_id)
+            if categoria is not None:
+                categorias[item.categoria_id] = categoria
+    
+    return {
+        'data': [item.to_dict(incluir_categoria=False) for item in itens],
+        'categorias': {str(cat_id): cat for cat_id, cat in categorias.items()}
+    }
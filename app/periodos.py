@@ -0,0 +1,29 @@
+from datetime import date
+from sqlalchemy import and_, false
+
+
+def intervalo_mes(mes, ano):
+    """Retorna o intervalo semiaberto [inicio, fim) do mês informado"""
+    inicio = date(ano, mes, 1)
+    fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return inicio, fim
+
+
+def meses_anteriores(quantidade, referencia):
+    """Lista os últimos (ano, mes) de calendário até o mês de referência, do mais antigo ao atual"""
+    indice = referencia.year * 12 + referencia.month - 1
+    return [(i // 12, i % 12 + 1) for i in range(indice - quantidade + 1, indice + 1)]
+
+
+def filtro_mes(coluna, mes, ano):
+    """Filtro de mês que preserva o uso de índices sobre a coluna de data.
+    
+    Equivale a extract('month') == mes e extract('year') == ano, mas compara
+    a coluna diretamente com um intervalo de datas. Mês ou ano inválidos
+    resultam em um filtro vazio, como acontecia com extract.
+    """
+    try:
+        inicio, fim = intervalo_mes(mes, ano)
+    except ValueError:
+        return false()
+    return and_(coluna >= inicio, coluna < fim)
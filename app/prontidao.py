@@ -0,0 +1,93 @@
+"""Prontidão da aplicação: aquecimento do pool de conexões em segundo plano.
+
+O servidor aceita conexões assim que o processo sobe; /health responde sem
+tocar no banco (liveness) e /ready só responde 200 depois que o pool foi
+aquecido (readiness). Enquanto o banco não responde, o aquecimento tenta de
+novo com backoff exponencial, sem bloquear o início do servidor.
+"""
+import threading
+import time
+from sqlalchemy import text
+
+
+class AquecedorBanco:
+    """Abre as conexões do pool em uma thread, com backoff exponencial entre tentativas"""
+    
+    def __init__(self, espera_inicial=0.1, espera_maxima=5.0):
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.tentativas = 0
+        self.ultimo_erro = None
+        self.iniciado_em = None
+        self.pronto_em = None
+        self._pronto = threading.Event()
+        self._thread = None
+    
+    @property
+    def pronto(self):
+        return self._pronto.is_set()
+    
+    def iniciar(self, app):
+        """Dispara o aquecimento em segundo plano (uma vez por processo)"""
+        if self._thread is not None:
+            return
+        self.iniciado_em = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._executar, args=(app,), name='aquecedor-banco', daemon=True
+        )
+        self._thread.start()
+    
+    def aquecer(self, app):
+        """Abre até pool_size conexões simultâneas e as devolve ao pool"""
+        from app import db
+        
+        with app.app_context():
+            pool = db.engine.pool
+            quantidade = pool.size() if hasattr(pool, 'size') else 1
+            conexoes = []
+            try:
+                for _ in range(max(1, quantidade)):
+                    conexao = db.engine.connect()
+                    conexoes.append(conexao)
+                    conexao.execute(text('SELECT 1'))
+            finally:
+                for conexao in conexoes:
+                    conexao.close()
+    
+    def _executar(self, app):
+        espera = self.espera_inicial
+        while True:
+            self.tentativas += 1
+            try:
+                self.aquecer(app)
+            except Exception as e:
+                self.ultimo_erro = str(getattr(e, 'orig', None) or e)
+                app.logger.warning('Banco indisponível (tentativa %d), nova tentativa em %.1fs: %s',
+                                   self.tentativas, espera, self.ultimo_erro)
+                time.sleep(espera)
+                espera = min(espera * 2, self.espera_maxima)
+                continue
+            
+            self.ultimo_erro = None
+            self.pronto_em = time.monotonic()
+            self._pronto.set()
+            app.logger.info('Pool de conexões aquecido em %.0f ms (%d tentativa(s))',
+                            (self.pronto_em - self.iniciado_em) * 1000, self.tentativas)
+            return
+    
+    def estado(self):
+        """Resumo para o endpoint /ready"""
+        if self.pronto:
+            return {
+                'status': 'ready',
+                'tentativas': self.tentativas,
+                'aquecimento_ms': round((self.pronto_em - self.iniciado_em) * 1000),
+            }
+        return {
+            'status': 'starting',
+            'tentativas': self.tentativas,
+            'erro': self.ultimo_erro,
+        }
+
+
+aquecedor = AquecedorBanco()
@@ -0,0 +1,207 @@
+"""Materialização em lote dos gastos recorrentes.
+
+Uma série é identificada por descrição, valor, categoria, tipo e forma de
+pagamento. Os gastos recorrentes lançados à mão (não gerados por uma
+recorrência) com essa mesma chave pertencem à mesma série, e o mais recente
+deles é a origem: em cada mês seguinte ao seu, a série tem uma ocorrência
+igual a ele, no mesmo dia do mês (ou no último dia, nos meses mais curtos).
+Assim, quem relança o aluguel todo mês continua com uma única série.
+
+Cada mês gerado de uma série fica registrado em recorrencias_geradas, e um
+mês registrado não é gerado de novo: uma ocorrência excluída pelo usuário não
+volta na próxima execução. As ocorrências também são identificadas por
+(recorrencia_origem_id, recorrencia_periodo), que tem índice único, e os dois
+são inseridos com um INSERT de vários VALUES por lote que ignora os já
+existentes. Por isso a materialização é idempotente e pode rodar ao mesmo
+tempo em várias máquinas.
+
+Os agregados recebem, como nas demais escritas, apenas o delta das
+ocorrências de fato inseridas por esta execução, relidas de gastos pela chave
+e pelo created_at da execução: uma escrita concorrente no mesmo mês soma a
+sua parte e não é sobrescrita.
+"""
+import calendar
+from datetime import date, datetime
+from sqlalchemy import select, tuple_, union_all
+from app import db, agregados, arquivo, versoes
+from app.models import Gasto, RecorrenciaGerada
+from app.periodos import intervalo_mes, meses_anteriores
+from app.sql import inserir_ignorando
+
+# Linhas por INSERT
+TAMANHO_LOTE = 1000
+
+# Maior intervalo aceito em um backfill
+MESES_MAXIMO = 120
+
+COLUNAS_CHAVE = ('recorrencia_origem_id', 'recorrencia_periodo')
+COLUNAS_SERIE = ('descricao', 'valor', 'categoria_id', 'tipo', 'forma_pagamento')
+
+
+def ler_periodo(texto):
+    """Converte 'AAAA-MM' em (ano, mes); ValueError se inválido"""
+    try:
+        momento = datetime.strptime(texto, '%Y-%m')
+    except (TypeError, ValueError):
+        raise ValueError(f'Período inválido: {texto!r} (use AAAA-MM)')
+    return momento.year, momento.month
+
+
+def proximo_mes(referencia=None):
+    """Retorna (ano, mes) do mês seguinte ao de referência (padrão: hoje)"""
+    referencia = referencia or date.today()
+    return (referencia.year + 1, 1) if referencia.month == 12 else (referencia.year, referencia.month + 1)
+
+
+def chave_serie(gasto):
+    """Chave da série de um gasto recorrente (nulos como '' e 0, como nos agregados)"""
+    return (gasto.descricao, gasto.valor, gasto.categoria_id or 0, gasto.tipo or '', gasto.forma_pagamento or '')
+
+
+def _origens(ate):
+    """Origem de cada série com ocorrências até o mês ate, inclusive as
+    arquivadas: o gasto recorrente lançado à mão mais recente com cada chave"""
+    _, fim = intervalo_mes(ate[1], ate[0])
+    consulta = select(
+        Gasto.id,
+        Gasto.descricao,
+        Gasto.valor,
+        Gasto.data,
+        Gasto.categoria_id,
+        Gasto.tipo,
+        Gasto.forma_pagamento,
+        Gasto.observacao
+    ).where(
+        Gasto.recorrente.is_(True),
+        Gasto.recorrencia_origem_id.is_(None),
+        Gasto.data < fim
+    )
+    if arquivo.anos_arquivados():
+        consulta = union_all(consulta, arquivo.no_arquivo(consulta))
+    colunas = consulta.selected_columns
+    
+    # Em ordem de data, o último gasto de cada chave é o mais recente
+    origens = {}
+    for origem in db.session.execute(consulta.order_by(colunas.data, colunas.id)):
+        origens[chave_serie(origem)] = origem
+    return sorted(origens.values(), key=lambda origem: origem.id)
+
+
+def _geradas(meses):
+    """(chave da série, período) já gerados nos meses informados"""
+    tabela = RecorrenciaGerada.__table__
+    periodos = [f'{ano:04d}-{mes:02d}' for ano, mes in meses]
+    consulta = select(*(tabela.c[coluna] for coluna in COLUNAS_SERIE), tabela.c.periodo).where(
+        tabela.c.periodo.in_(periodos)
+    )
+    return {(tuple(linha[:-1]), linha.periodo) for linha in db.session.execute(consulta)}
+
+
+def _ocorrencias(origens, meses, geradas, agora):
+    """Gera as linhas das ocorrências de cada série nos meses informados que
+    ainda não foram gerados"""
+    for origem in origens:
+        serie = chave_serie(origem)
+        for ano, mes in meses:
+            periodo = f'{ano:04d}-{mes:02d}'
+            if (ano, mes) <= (origem.data.year, origem.data.month) or (serie, periodo) in geradas:
+                continue
+            dia = min(origem.data.day, calendar.monthrange(ano, mes)[1])
+            yield {
+                'descricao': origem.descricao,
+                'valor': origem.valor,
+                'data': date(ano, mes, dia),
+                'categoria_id': origem.categoria_id,
+                'tipo': origem.tipo,
+                'forma_pagamento': origem.forma_pagamento,
+                'observacao': origem.observacao,
+                'recorrente': True,
+                'recorrencia_origem_id': origem.id,
+                'recorrencia_periodo': periodo,
+                'created_at': agora,
+                'updated_at': agora
+            }
+
+
+def materializar(desde, ate, tamanho_lote=TAMANHO_LOTE):
+    """Gera as ocorrências das séries recorrentes de desde até ate, (ano, mes)
+    inclusive.
+    
+    Executa na transação corrente, sem commit. Soma aos agregados as
+    ocorrências inseridas e incrementa as versões apenas dos meses que as
+    receberam.
+    """
+    quantidade = (ate[0] * 12 + ate[1]) - (desde[0] * 12 + desde[1]) + 1
+    if quantidade < 1:
+        raise ValueError('O período inicial deve ser anterior ou igual ao final')
+    if quantidade > MESES_MAXIMO:
+        raise ValueError(f'Informe no máximo {MESES_MAXIMO} meses')
+    
+    # As ocorrências de anos arquivados já foram para o arquivo com eles
+    arquivados = arquivo.anos_arquivados()
+    meses = [(ano, mes) for ano, mes in meses_anteriores(quantidade, date(ate[0], ate[1], 1))
+             if ano not in arquivados]
+    if not meses:
+        raise ValueError('Os meses informados estão em anos arquivados')
+    origens = _origens(ate)
+    
+    criados = 0
+    meses_afetados = set()
+    lote = []
+    # Sem frações de segundo, que o DATETIME do MySQL descarta: o created_at
+    # gravado identifica as linhas inseridas por esta execução
+    agora = datetime.utcnow().replace(microsecond=0)
+    for linha in _ocorrencias(origens, meses, _geradas(meses), agora):
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            criados += _inserir(lote, meses_afetados)
+            lote = []
+    criados += _inserir(lote, meses_afetados)
+    
+    if criados:
+        versoes.incrementar(*(versoes.chave_mes(ano, mes) for ano, mes in meses_afetados))
+    
+    return {
+        'criados': criados,
+        'series': len(origens),
+        'meses': [f'{ano:04d}-{mes:02d}' for ano, mes in meses]
+    }
+
+
+def _inserir(lote, meses_afetados):
+    """Insere um lote ignorando ocorrências existentes e registra os meses
+    gerados de cada série; soma aos agregados as ocorrências inseridas e
+    anota os meses que as receberam"""
+    if not lote:
+        return 0
+    inserir_ignorando(RecorrenciaGerada.__table__, [{
+        'descricao': linha['descricao'],
+        'valor': linha['valor'],
+        'categoria_id': linha['categoria_id'] or 0,
+        'tipo': linha['tipo'] or '',
+        'forma_pagamento': linha['forma_pagamento'] or '',
+        'periodo': linha['recorrencia_periodo'],
+        'gerado_em': linha['created_at']
+    } for linha in lote], COLUNAS_SERIE + ('periodo',))
+    inseridos = inserir_ignorando(Gasto.__table__, lote, COLUNAS_CHAVE)
+    if inseridos:
+        linhas = [linha._asdict() for linha in db.session.execute(_consulta_inseridos(lote))]
+        agregados.registrar_linhas(linhas)
+        meses_afetados.update((linha['data'].year, linha['data'].month) for linha in linhas)
+    return inseridos
+
+
+def _consulta_inseridos(lote):
+    """Ocorrências do lote gravadas por esta execução (as ignoradas por já
+    existirem têm outro created_at)"""
+    chaves = [tuple(linha[coluna] for coluna in COLUNAS_CHAVE) for linha in lote]
+    return select(
+        Gasto.data,
+        Gasto.valor,
+        Gasto.tipo,
+        Gasto.categoria_id,
+        Gasto.forma_pagamento
+    ).where(
+        tuple_(Gasto.recorrencia_origem_id, Gasto.recorrencia_periodo).in_(chaves),
+        Gasto.created_at == lote[0]['created_at']
+    )
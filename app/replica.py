@@ -0,0 +1,154 @@
+"""Roteamento das leituras para uma réplica do banco (REPLICA_DATABASE_URL).
+
+Com a réplica configurada (bind 'replica' do Flask-SQLAlchemy), as views
+marcadas com @replica.somente_leitura (listagens e relatórios) executam os
+SELECTs na réplica; todo o resto, inclusive qualquer escrita e as leituras
+que a seguem na mesma sessão, vai para o banco principal. A escolha é feita
+por SessaoRoteada.get_bind, a cada instrução.
+
+O atraso da réplica é tolerado:
+  
+  - as versões dos dados (ETag e chave do cache) são lidas da mesma fonte
+    que os dados, então uma resposta atrasada nunca é guardada sob a versão
+    de uma resposta mais nova;
+  - uma requisição que escreve marca o cliente com um cookie de curta
+    duração (REPLICA_JANELA_LEITURA_S); enquanto ele existir, as leituras
+    desse cliente vão para o principal e ele vê as próprias escritas.
+
+Se a réplica falhar durante uma view somente leitura, a view é executada de
+novo no principal e a réplica fica fora de uso por REPLICA_ESPERA_FALHA_S.
+"""
+import threading
+import time
+from functools import wraps
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.expression import SelectBase
+
+BIND = 'replica'
+COOKIE = 'ler_primario'
+# Leituras reaproveitadas dentro da requisição (app/versoes.py, app/arquivo.py)
+MEMOS_REQUISICAO = ('versoes_lidas', 'anos_arquivados')
+
+
+class SessaoRoteada(Session):
+    """Sessão que envia à réplica os SELECTs das views somente leitura até a
+    primeira escrita da sessão"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                # Daqui em diante a sessão lê o que ela mesma escreveu
+                self.info['escreveu'] = True
+                self.info.pop(BIND, None)
+            elif self.info.get(BIND) and isinstance(clause, SelectBase):
+                return self._db.engines[BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class RoteadorReplica:
+    """Extensão que decide, por requisição, se as leituras podem ir à réplica"""
+    
+    def __init__(self):
+        self.ativa = False
+        self._lock = threading.Lock()
+        self.indisponivel_ate = 0.0
+        self.requisicoes = 0
+        self.falhas = 0
+        self.ultimo_erro = None
+    
+    def init_app(self, app):
+        app.extensions['replica'] = self
+        self.logger = app.logger
+        self.ativa = BIND in (app.config.get('SQLALCHEMY_BINDS') or {})
+        self.janela = app.config.get('REPLICA_JANELA_LEITURA_S', 10)
+        self.espera = app.config.get('REPLICA_ESPERA_FALHA_S', 30)
+        if not self.ativa:
+            return
+        
+        from app import db
+        with app.app_context():
+            event.listen(db.engines[BIND], 'handle_error', self._ao_erro)
+        app.after_request(self._marcar_cliente)
+    
+    def _ao_erro(self, contexto):
+        # Erros da réplica (inclusive ao conectar) ficam anotados na requisição
+        if has_app_context():
+            g.erro_replica = True
+    
+    def _marcar_cliente(self, resposta):
+        from app import db
+        if db.session.info.get('escreveu'):
+            resposta.set_cookie(COOKIE, '1', max_age=self.janela, httponly=True, samesite='Lax')
+        return resposta
+    
+    def pode_ler(self, cookies):
+        """Indica se as leituras de uma requisição com esses cookies podem ir à réplica"""
+        return (
+            self.ativa
+            and time.monotonic() >= self.indisponivel_ate
+            and COOKIE not in cookies
+        )
+    
+    def registrar_uso(self):
+        """Conta uma requisição com as leituras na réplica"""
+        with self._lock:
+            self.requisicoes += 1
+    
+    def registrar_falha(self, erro):
+        """Tira a réplica de uso por REPLICA_ESPERA_FALHA_S segundos"""
+        with self._lock:
+            self.falhas += 1
+            self.ultimo_erro = str(getattr(erro, 'orig', None) or erro)
+            self.indisponivel_ate = time.monotonic() + self.espera
+        self.logger.warning('Réplica indisponível por %ss, lendo do principal: %s', self.espera, self.ultimo_erro)
+    
+    def somente_leitura(self, view):
+        """Envia à réplica as leituras da view (e das verificações de ETag e
+        cache que a envolvem), com volta ao principal se ela falhar"""
+        
+        @wraps(view)
+        def envolvida(*args, **kwargs):
+            if not self.pode_ler(request.cookies):
+                return view(*args, **kwargs)
+            
+            from app import db
+            self.registrar_uso()
+            db.session.info[BIND] = True
+            try:
+                return view(*args, **kwargs)
+            except DBAPIError as e:
+                if not g.pop('erro_replica', False):
+                    raise
+                self.registrar_falha(e)
+                db.session.rollback()
+                db.session.info.pop(BIND, None)
+                # Versões e anos arquivados já lidos na réplica são lidos de novo
+                for memo in MEMOS_REQUISICAO:
+                    if hasattr(request, memo):
+                        delattr(request, memo)
+                return view(*args, **kwargs)
+            finally:
+                db.session.info.pop(BIND, None)
+        
+        return envolvida
+    
+    def estatisticas(self):
+        """Uso da réplica neste processo"""
+        if not self.ativa:
+            return {'ativa': False}
+        
+        with self._lock:
+            return {
+                'ativa': True,
+                'disponivel': time.monotonic() >= self.indisponivel_ate,
+                'requisicoes': self.requisicoes,
+                'falhas': self.falhas,
+                'ultimo_erro': self.ultimo_erro,
+            }
+
+
+replica = RoteadorReplica()
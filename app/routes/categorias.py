@@ -1,35 +1,40 @@
-from flask import Blueprint, request, jsonify
-from app import db
+from flask import Blueprint, abort, request, jsonify
+from sqlalchemy.exc import IntegrityError
+from app import db, versoes
+from app.catalogo import catalogo
 from app.models import Categoria
+from app.sql import inserir_ignorando
+from app.etag import com_etag
+from app.replica import replica
 
 categorias_bp = Blueprint('categorias', __name__)
 
 
 @categorias_bp.route('', methods=['GET'])
+@replica.somente_leitura
+@com_etag(lambda args: [versoes.CATEGORIAS])
 def listar_categorias():
     """Lista todas as categorias"""
     apenas_ativas = request.args.get('ativas', 'true').lower() == 'true'
-    
-    query = Categoria.query
-    if apenas_ativas:
-        query = query.filter(Categoria.ativo == True)
-    
-    categorias = query.order_by(Categoria.nome).all()
+    categorias = catalogo.listar(apenas_ativas)
     
     return jsonify({
         'success': True,
-        'data': [cat.to_dict() for cat in categorias],
+        'data': categorias,
         'total': len(categorias)
     })
 
 
 @categorias_bp.route('/<int:id>', methods=['GET'])
+@com_etag(lambda args: [versoes.CATEGORIAS])
 def obter_categoria(id):
     """Obtém uma categoria específica por ID"""
-    categoria = Categoria.query.get_or_404(id)
+    categoria = catalogo.categoria(id)
+    if categoria is None:
+        abort(404)
     return jsonify({
         'success': True,
-        'data': categoria.to_dict()
+        'data': categoria
     })
 
 
@@ -45,7 +50,7 @@ def criar_categoria():
         return jsonify({'success': False, 'error': 'Nome é obrigatório'}), 400
     
     # Verifica se já existe categoria com esse nome
-    if Categoria.query.filter_by(nome=data['nome']).first():
+    if catalogo.por_nome(data['nome']):
         return jsonify({'success': False, 'error': 'Já existe uma categoria com este nome'}), 400
     
     try:
@@ -58,7 +63,9 @@ def criar_categoria():
         )
         
         db.session.add(categoria)
+        versoes.incrementar(versoes.CATEGORIAS)
         db.session.commit()
+        catalogo.invalidar()
         
         return jsonify({
             'success': True,
@@ -66,6 +73,10 @@ def criar_categoria():
             'data': categoria.to_dict()
         }), 201
         
+    except IntegrityError:
+        # Nome criado por outro processo, ainda fora do catálogo deste
+        db.session.rollback()
+        return jsonify({'success': False, 'error': 'Já existe uma categoria com este nome'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -83,8 +94,8 @@ def atualizar_categoria(id):
     try:
         if 'nome' in data:
             # Verifica se já existe outra categoria com esse nome
-            existing = Categoria.query.filter_by(nome=data['nome']).first()
-            if existing and existing.id != id:
+            existing = catalogo.por_nome(data['nome'])
+            if existing and existing['id'] != id:
                 return jsonify({'success': False, 'error': 'Já existe uma categoria com este nome'}), 400
             categoria.nome = data['nome']
         if 'descricao' in data:
@@ -96,7 +107,9 @@ def atualizar_categoria(id):
         if 'ativo' in data:
             categoria.ativo = data['ativo']
         
+        versoes.incrementar(versoes.CATEGORIAS)
         db.session.commit()
+        catalogo.invalidar()
         
         return jsonify({
             'success': True,
@@ -104,6 +117,9 @@ def atualizar_categoria(id):
             'data': categoria.to_dict()
         })
         
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': 'Já existe uma categoria com este nome'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -117,7 +133,9 @@ def deletar_categoria(id):
     try:
         # Soft delete - apenas desativa
         categoria.ativo = False
+        versoes.incrementar(versoes.CATEGORIAS)
         db.session.commit()
+        catalogo.invalidar()
         
         return jsonify({
             'success': True,
@@ -146,14 +164,14 @@ def seed_categorias():
         {'nome': 'Outros', 'descricao': 'Gastos diversos', 'cor': '#6b7280', 'icone': '●'},
     ]
     
-    criadas = 0
-    for cat_data in categorias_padrao:
-        if not Categoria.query.filter_by(nome=cat_data['nome']).first():
-            categoria = Categoria(**cat_data)
-            db.session.add(categoria)
-            criadas += 1
+    # Um único INSERT; as categorias que já existem (pelo nome) são ignoradas
+    criadas = inserir_ignorando(Categoria.__table__, categorias_padrao, ('nome',))
     
+    if criadas:
+        versoes.incrementar(versoes.CATEGORIAS)
     db.session.commit()
+    if criadas:
+        catalogo.invalidar()
     
     return jsonify({
         'success': True,
@@ -1,57 +1,315 @@
-from flask import Blueprint, request, jsonify
-from app import db
-from app.models import Gasto, Categoria
-from datetime import datetime
+import base64
+import json
+from flask import Blueprint, Response, abort, make_response, request, jsonify, stream_with_context
+from sqlalchemy import func, literal, select
+from werkzeug.datastructures import MultiDict
+from app import db, agregados, arquivo, busca, exportacao, importacao, lote, recorrencias, serializacao, versoes
+from app.catalogo import catalogo
+from app.models import Gasto
+from app.periodos import filtro_mes, intervalo_mes
+from app.etag import com_etag
+from app.replica import replica
+from app.validacao import validar_gasto, validar_lote
+from datetime import datetime, timedelta
 
 gastos_bp = Blueprint('gastos', __name__)
 
+# Limites da paginação por cursor
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
 
-@gastos_bp.route('', methods=['GET'])
-def listar_gastos():
-    """Lista todos os gastos com filtros opcionais"""
-    # Parâmetros de filtro
-    categoria_id = request.args.get('categoria_id', type=int)
-    tipo = request.args.get('tipo')
-    data_inicio = request.args.get('data_inicio')
-    data_fim = request.args.get('data_fim')
-    mes = request.args.get('mes', type=int)
-    ano = request.args.get('ano', type=int)
-    
-    # Query base
-    query = Gasto.query
+
+def ler_limite(args):
+    """Tamanho da página pedido em limit, até LIMITE_MAXIMO (padrão
+    LIMITE_PADRAO), ou None se não for um inteiro positivo"""
+    texto = args.get('limit', str(LIMITE_PADRAO)).strip()
+    if not texto.isdecimal() or int(texto) < 1:
+        return None
+    return min(int(texto), LIMITE_MAXIMO)
+
+
+def _codificar_cursor(gasto):
+    """Gera um cursor opaco a partir da posição (data, id) do último item"""
+    bruto = json.dumps([gasto.data.isoformat(), gasto.id]).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    """Recupera a posição (data, id) de um cursor; lança ValueError se inválido"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data_str, gasto_id = json.loads(bruto)
+        return datetime.strptime(data_str, '%Y-%m-%d').date(), int(gasto_id)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+
+def _codificar_deslocamento(deslocamento):
+    """Gera um cursor opaco para a próxima página de uma busca por relevância"""
+    return base64.urlsafe_b64encode(json.dumps([deslocamento]).encode()).decode().rstrip('=')
+
+
+def _decodificar_deslocamento(cursor):
+    """Recupera o deslocamento de um cursor de busca; lança ValueError se inválido"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        (deslocamento,) = json.loads(bruto)
+        if int(deslocamento) < 0:
+            raise ValueError
+        return int(deslocamento)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+
+def escopos_listagem(args):
+    """Escopos de versão lidos pela listagem: o mês filtrado ou todos os gastos"""
+    mes = args.get('mes', type=int)
+    ano = args.get('ano', type=int)
+    escopo = versoes.chave_mes(ano, mes) if mes and ano else versoes.GASTOS
+    return [escopo, versoes.CATEGORIAS]
+
+
+def filtros_listagem(args):
+    """Monta os filtros da listagem de gastos a partir dos parâmetros da requisição"""
+    categoria_id = args.get('categoria_id', type=int)
+    tipo = args.get('tipo')
+    data_inicio = args.get('data_inicio')
+    data_fim = args.get('data_fim')
+    mes = args.get('mes', type=int)
+    ano = args.get('ano', type=int)
     
-    # Aplica filtros
+    filtros = []
     if categoria_id:
-        query = query.filter(Gasto.categoria_id == categoria_id)
+        filtros.append(Gasto.categoria_id == categoria_id)
     if tipo:
-        query = query.filter(Gasto.tipo == tipo)
+        filtros.append(Gasto.tipo == tipo)
     if data_inicio:
-        query = query.filter(Gasto.data >= datetime.strptime(data_inicio, '%Y-%m-%d').date())
+        filtros.append(Gasto.data >= datetime.strptime(data_inicio, '%Y-%m-%d').date())
     if data_fim:
-        query = query.filter(Gasto.data <= datetime.strptime(data_fim, '%Y-%m-%d').date())
+        filtros.append(Gasto.data <= datetime.strptime(data_fim, '%Y-%m-%d').date())
     if mes and ano:
-        query = query.filter(
-            db.extract('month', Gasto.data) == mes,
-            db.extract('year', Gasto.data) == ano
-        )
+        filtros.append(filtro_mes(Gasto.data, mes, ano))
+    return filtros
+
+
+def periodo_listagem(args):
+    """Período [inicio, fim) coberto pelos filtros de data da listagem (None: sem limite)"""
+    inicio = fim = None
+    if args.get('data_inicio'):
+        inicio = datetime.strptime(args['data_inicio'], '%Y-%m-%d').date()
+    if args.get('data_fim'):
+        fim = datetime.strptime(args['data_fim'], '%Y-%m-%d').date() + timedelta(days=1)
+    
+    mes = args.get('mes', type=int)
+    ano = args.get('ano', type=int)
+    if mes and ano:
+        try:
+            inicio_mes, fim_mes = intervalo_mes(mes, ano)
+        except ValueError:
+            return inicio, fim
+        inicio = max(inicio, inicio_mes) if inicio else inicio_mes
+        fim = min(fim, fim_mes) if fim else fim_mes
+    return inicio, fim
+
+
+def _query_arquivo(query):
+    """A própria query, para ser repetida no arquivo, se o período pedido o alcança"""
+    return query if arquivo.alcanca(*periodo_listagem(request.args)) else None
+
+
+@gastos_bp.route('', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_listagem)
+def listar_gastos():
+    """Lista todos os gastos com filtros opcionais"""
+    # Apenas as colunas de gastos e categorias, sem instâncias do ORM
+    query = serializacao.projetar_gastos(Gasto.query)
+    
+    # Aplica filtros
+    query = query.filter(*filtros_listagem(request.args))
+    query_arquivo = _query_arquivo(query)
+    
+    # Paginação por cursor (keyset) quando solicitada
+    if 'limit' in request.args or 'cursor' in request.args:
+        return _listar_paginado(query, query_arquivo)
     
     # Ordenação por data (mais recente primeiro)
-    gastos = query.order_by(Gasto.data.desc()).all()
+    gastos = arquivo.consultar(
+        query.order_by(Gasto.data.desc()),
+        lambda linha: linha.data,
+        query_arquivo.order_by(Gasto.data.desc()) if query_arquivo is not None else None
+    )
     
-    return jsonify({
+    return serializacao.responder({
         'success': True,
-        'data': [gasto.to_dict() for gasto in gastos],
+        **serializacao.serializar_linhas(gastos, sideload(request.args)),
         'total': len(gastos)
     })
 
 
+def sideload(args):
+    """Indica se a resposta deve trazer as categorias em um mapa separado"""
+    return args.get('sideload', 'false').lower() == 'true'
+
+
+def paginar(query, limite, cursor=None):
+    """Restringe uma query (ou select) de gastos à página após o cursor, em
+    ordem de (data, id) decrescente e com um item a mais, que indica se
+    existe próxima página. Lança ValueError se o cursor for inválido."""
+    if cursor:
+        data, gasto_id = _decodificar_cursor(cursor)
+        query = query.filter(db.or_(
+            Gasto.data < data,
+            db.and_(Gasto.data == data, Gasto.id < gasto_id)
+        ))
+    return query.order_by(Gasto.data.desc(), Gasto.id.desc()).limit(limite + 1)
+
+
+def chave_pagina(linha):
+    """Ordem das linhas de paginar(), para mesclar gastos e arquivo"""
+    return linha.data, linha.id
+
+
+def fechar_pagina(gastos, limite):
+    """Separa o item a mais de paginar(): retorna a página e o próximo cursor (ou None)"""
+    tem_proxima = len(gastos) > limite
+    gastos = gastos[:limite]
+    return gastos, _codificar_cursor(gastos[-1]) if tem_proxima else None
+
+
+def buscar_pagina(query, limite, cursor=None, query_arquivo=None):
+    """Busca uma página de gastos ordenada por (data, id) decrescente.
+    
+    Retorna a lista de gastos (instâncias ou linhas de uma projeção com data
+    e id) e o cursor da próxima página (ou None). Com query_arquivo, a página
+    mescla também essa query executada sobre os gastos arquivados.
+    Lança ValueError se o cursor for inválido.
+    """
+    gastos = arquivo.consultar(
+        paginar(query, limite, cursor),
+        chave_pagina,
+        paginar(query_arquivo, limite, cursor) if query_arquivo is not None else None,
+        limite + 1
+    )
+    return fechar_pagina(gastos, limite)
+
+
+def _listar_paginado(query, query_arquivo=None):
+    """Retorna uma página ordenada por (data, id) a partir do cursor informado"""
+    limite = ler_limite(request.args)
+    if limite is None:
+        return jsonify({'success': False, 'error': 'limit deve ser um inteiro positivo'}), 400
+    
+    # Contagem total é opcional e feita em query separada
+    total = None
+    if request.args.get('incluir_total', 'false').lower() == 'true':
+        total = query.order_by(None).count()
+        if query_arquivo is not None:
+            total += db.session.scalar(select(func.count()).select_from(
+                arquivo.no_arquivo(query_arquivo.order_by(None)).subquery()
+            ))
+    
+    try:
+        gastos, next_cursor = buscar_pagina(query, limite, request.args.get('cursor'), query_arquivo)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    resposta = {
+        'success': True,
+        **serializacao.serializar_linhas(gastos, sideload(request.args)),
+        'next_cursor': next_cursor
+    }
+    if total is not None:
+        resposta['total'] = total
+    
+    return serializacao.responder(resposta)
+
+
+@gastos_bp.route('/search', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_listagem)
+def buscar_gastos():
+    """Busca gastos por texto (prefixo) em descrição e observação, com os filtros da listagem"""
+    palavras = busca.termos(request.args.get('q'))
+    if not palavras:
+        return jsonify({'success': False, 'error': 'Informe o texto da busca (q)'}), 400
+    
+    limite = ler_limite(request.args)
+    if limite is None:
+        return jsonify({'success': False, 'error': 'limit deve ser um inteiro positivo'}), 400
+    
+    por_data = request.args.get('ordem') == 'data'
+    base = serializacao.projetar_gastos(Gasto.query).filter(*filtros_listagem(request.args))
+    query, relevancia = busca.aplicar(base, palavras, db.session.get_bind().dialect.name, ranquear=not por_data)
+    cursor = request.args.get('cursor')
+    
+    # O arquivo não tem índice textual: nele a busca é por LIKE, com relevância 0
+    query_arquivo = None
+    if _query_arquivo(base) is not None:
+        query_arquivo, _ = busca.aplicar(base, palavras, None, ranquear=False)
+    
+    try:
+        if por_data:
+            # Mais recentes primeiro, com o mesmo cursor (data, id) da listagem
+            gastos, next_cursor = buscar_pagina(query, limite, cursor, query_arquivo)
+        else:
+            deslocamento = _decodificar_deslocamento(cursor) if cursor else 0
+            ordem = (relevancia.desc(), Gasto.data.desc(), Gasto.id.desc())
+            if query_arquivo is None:
+                gastos = query.order_by(*ordem).offset(deslocamento).limit(limite + 1).all()
+            else:
+                # As duas listas até o fim da página, mescladas pela relevância
+                quantidade = deslocamento + limite + 1
+                gastos = arquivo.consultar(
+                    query.add_columns(relevancia.label('relevancia')).order_by(*ordem).limit(quantidade),
+                    lambda linha: (linha.relevancia, linha.data, linha.id),
+                    query_arquivo.add_columns(literal(0).label('relevancia'))
+                    .order_by(Gasto.data.desc(), Gasto.id.desc()).limit(quantidade)
+                )[deslocamento:]
+            next_cursor = _codificar_deslocamento(deslocamento + limite) if len(gastos) > limite else None
+            gastos = gastos[:limite]
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return serializacao.responder({
+        'success': True,
+        **serializacao.serializar_linhas(gastos, sideload(request.args)),
+        'next_cursor': next_cursor
+    })
+
+
+@gastos_bp.route('/anos-arquivados', methods=['GET'])
+@com_etag(lambda args: [versoes.GASTOS])
+def listar_anos_arquivados():
+    """Lista os anos arquivados, cujos gastos são somente leitura"""
+    return jsonify({
+        'success': True,
+        'data': sorted(arquivo.anos_arquivados())
+    })
+
+
 @gastos_bp.route('/<int:id>', methods=['GET'])
+@com_etag(lambda args: [versoes.GASTOS, versoes.CATEGORIAS])
 def obter_gasto(id):
     """Obtém um gasto específico por ID"""
-    gasto = Gasto.query.get_or_404(id)
+    gasto = db.session.get(Gasto, id)
+    if gasto is not None:
+        return jsonify({
+            'success': True,
+            'data': gasto.to_dict()
+        })
+    
+    # Gastos arquivados, no mesmo formato
+    if not arquivo.anos_arquivados():
+        abort(404)
+    linhas = db.session.execute(arquivo.no_arquivo(
+        serializacao.projetar_gastos(Gasto.query).filter(Gasto.id == id)
+    )).all()
+    if not linhas:
+        abort(404)
     return jsonify({
         'success': True,
-        'data': gasto.to_dict()
+        'data': serializacao.serializar_linhas(linhas)['data'][0]
     })
 
 
@@ -64,10 +322,12 @@ def criar_gasto():
         return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
     
     # Validações básicas
-    if not data.get('descricao'):
-        return jsonify({'success': False, 'error': 'Descrição é obrigatória'}), 400
-    if not data.get('valor'):
-        return jsonify({'success': False, 'error': 'Valor é obrigatório'}), 400
+    erro = validar_gasto(data)
+    if erro:
+        return jsonify({'success': False, 'error': erro}), 400
+    
+    if data.get('categoria_id') and catalogo.categoria(data['categoria_id']) is None:
+        return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
     
     try:
         gasto = Gasto(
@@ -82,6 +342,8 @@ def criar_gasto():
         )
         
         db.session.add(gasto)
+        agregados.registrar_gasto(gasto)
+        versoes.incrementar(*versoes.chaves_gasto(gasto))
         db.session.commit()
         
         return jsonify({
@@ -95,16 +357,195 @@ def criar_gasto():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@gastos_bp.route('/export', methods=['GET'])
+def exportar_gastos():
+    """Exporta os gastos filtrados em CSV ou NDJSON, transmitindo as linhas"""
+    formato = request.args.get('format', 'csv').lower()
+    if formato not in exportacao.FORMATOS:
+        return jsonify({'success': False, 'error': 'Formato não suportado (use csv ou ndjson)'}), 400
+    
+    filtros = filtros_listagem(request.args)
+    com_arquivo = arquivo.alcanca(*periodo_listagem(request.args))
+    
+    return Response(
+        stream_with_context(exportacao.gerar(formato, filtros, com_arquivo)),
+        mimetype=exportacao.FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename=gastos.{formato}'}
+    )
+
+
+@gastos_bp.route('/import', methods=['POST'])
+def importar_gastos():
+    """Importa gastos em lote a partir de um arquivo CSV ou OFX"""
+    enviado = request.files.get('arquivo')
+    if not enviado or not enviado.filename:
+        return jsonify({'success': False, 'error': 'Arquivo não fornecido (campo "arquivo")'}), 400
+    
+    formato = (request.args.get('formato') or enviado.filename.rsplit('.', 1)[-1]).lower()
+    if formato == 'csv':
+        registros = importacao.ler_csv(enviado.stream)
+    elif formato == 'ofx':
+        registros = importacao.ler_ofx(enviado.stream)
+    else:
+        return jsonify({'success': False, 'error': 'Formato não suportado (use csv ou ofx)'}), 400
+    
+    try:
+        resultado = importacao.importar(registros)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    if 'erro_arquivo' in resultado:
+        # Os lotes anteriores ao erro já foram importados e constam em data
+        return jsonify({'success': False, 'error': resultado['erro_arquivo'], 'data': resultado}), 400
+    
+    return jsonify({
+        'success': True,
+        'message': f"{resultado['importados']} gastos importados",
+        'data': resultado
+    })
+
+
+@gastos_bp.route('/recorrentes/materializar', methods=['POST'])
+def materializar_recorrentes():
+    """Gera de uma vez as ocorrências dos gastos recorrentes (padrão: próximo mês)"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        ate = recorrencias.ler_periodo(data['ate']) if data.get('ate') else recorrencias.proximo_mes()
+        desde = recorrencias.ler_periodo(data['desde']) if data.get('desde') else ate
+        resultado = recorrencias.materializar(desde, ate)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'message': f"{resultado['criados']} gastos recorrentes gerados",
+        'data': resultado
+    })
+
+
+def _gasto_para_escrita(id):
+    """Gasto a alterar ou excluir; 409 se for de um ano arquivado, 404 se não existir"""
+    gasto = db.session.get(Gasto, id)
+    if gasto is not None:
+        return gasto
+    
+    try:
+        arquivo.verificar_escrita(Gasto.id == id)
+    except arquivo.GastoArquivado as e:
+        abort(make_response(jsonify({'success': False, 'error': str(e)}), 409))
+    abort(404)
+
+
+def _condicoes_lote(data):
+    """Condições de uma operação em lote: os ids informados ou os filtros da
+    listagem; ValueError se não restringirem os gastos atingidos"""
+    if data.get('ids') is not None:
+        return [Gasto.id.in_(data['ids'])]
+    
+    condicoes = filtros_listagem(MultiDict(data['filtros']))
+    # Um filtro descartado pela listagem nunca vira um UPDATE/DELETE sem WHERE
+    if not condicoes:
+        raise ValueError('Os filtros informados não restringem os gastos atingidos')
+    return condicoes
+
+
+@gastos_bp.route('/bulk', methods=['PATCH'])
+def atualizar_gastos_em_lote():
+    """Altera os mesmos campos de vários gastos (por ids ou filtros) em um único UPDATE"""
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
+    
+    erro = validar_lote(data, com_alteracoes=True)
+    if erro:
+        return jsonify({'success': False, 'error': erro}), 400
+    
+    alteracoes = dict(data['alteracoes'])
+    if alteracoes.get('categoria_id') and catalogo.categoria(alteracoes['categoria_id']) is None:
+        return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
+    if 'data' in alteracoes:
+        alteracoes['data'] = datetime.strptime(alteracoes['data'], '%Y-%m-%d').date()
+    
+    try:
+        condicoes = _condicoes_lote(data)
+        arquivo.verificar_escrita(*condicoes)
+        resultado = lote.atualizar(condicoes, alteracoes)
+        db.session.commit()
+    except arquivo.GastoArquivado as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'message': f"{resultado['afetados']} gastos atualizados",
+        'data': resultado
+    })
+
+
+@gastos_bp.route('/bulk', methods=['DELETE'])
+def deletar_gastos_em_lote():
+    """Deleta vários gastos (por ids ou filtros) em um único DELETE"""
+    data = request.get_json(silent=True)
+    
+    if not data:
+        return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
+    
+    erro = validar_lote(data)
+    if erro:
+        return jsonify({'success': False, 'error': erro}), 400
+    
+    try:
+        condicoes = _condicoes_lote(data)
+        arquivo.verificar_escrita(*condicoes)
+        resultado = lote.excluir(condicoes)
+        db.session.commit()
+    except arquivo.GastoArquivado as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'message': f"{resultado['afetados']} gastos deletados",
+        'data': resultado
+    })
+
+
 @gastos_bp.route('/<int:id>', methods=['PUT'])
 def atualizar_gasto(id):
     """Atualiza um gasto existente"""
-    gasto = Gasto.query.get_or_404(id)
+    gasto = _gasto_para_escrita(id)
     data = request.get_json()
     
     if not data:
         return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
     
+    if data.get('categoria_id') and catalogo.categoria(data['categoria_id']) is None:
+        return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
+    
     try:
+        anterior = agregados.contribuicao(gasto)
+        escopos = versoes.chaves_gasto(gasto)
+        
         if 'descricao' in data:
             gasto.descricao = data['descricao']
         if 'valor' in data:
@@ -122,6 +563,8 @@ def atualizar_gasto(id):
         if 'recorrente' in data:
             gasto.recorrente = data['recorrente']
         
+        agregados.atualizar_gasto(anterior, gasto)
+        versoes.incrementar(*escopos, *versoes.chaves_gasto(gasto))
         db.session.commit()
         
         return jsonify({
@@ -138,9 +581,11 @@ def atualizar_gasto(id):
 @gastos_bp.route('/<int:id>', methods=['DELETE'])
 def deletar_gasto(id):
     """Deleta um gasto"""
-    gasto = Gasto.query.get_or_404(id)
+    gasto = _gasto_para_escrita(id)
     
     try:
+        agregados.remover_gasto(gasto)
+        versoes.incrementar(*versoes.chaves_gasto(gasto))
         db.session.delete(gasto)
         db.session.commit()
         
@@ -0,0 +1,225 @@
+from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
+from app import db, versoes
+from app.catalogo import catalogo
+from app.models import OrcamentoMensal, serializar_com_categorias
+from app.etag import com_etag
+from app.replica import replica
+from app.sql import inserir_ou_atualizar
+from app.validacao import validar_orcamento
+from datetime import datetime
+
+orcamentos_bp = Blueprint('orcamentos', __name__)
+
+ERRO_DUPLICADO = 'Já existe um orçamento para esta categoria neste mês'
+
+
+def _escopos_listagem(args):
+    """Escopos de versão lidos pela listagem: o mês filtrado ou todos os orçamentos"""
+    mes = args.get('mes', type=int)
+    ano = args.get('ano', type=int)
+    escopo = versoes.chave_orcamento(ano, mes) if mes and ano else versoes.ORCAMENTOS
+    return [escopo, versoes.CATEGORIAS]
+
+
+@orcamentos_bp.route('', methods=['GET'])
+@replica.somente_leitura
+@com_etag(_escopos_listagem)
+def listar_orcamentos():
+    """Lista os orçamentos com filtros opcionais de mês, ano e categoria"""
+    query = OrcamentoMensal.query
+    
+    mes = request.args.get('mes', type=int)
+    ano = request.args.get('ano', type=int)
+    categoria_id = request.args.get('categoria_id', type=int)
+    if mes:
+        query = query.filter(OrcamentoMensal.mes == mes)
+    if ano:
+        query = query.filter(OrcamentoMensal.ano == ano)
+    if categoria_id:
+        query = query.filter(OrcamentoMensal.categoria_id == categoria_id)
+    
+    orcamentos = query.order_by(
+        OrcamentoMensal.ano.desc(), OrcamentoMensal.mes.desc(), OrcamentoMensal.categoria_id
+    ).all()
+    
+    return jsonify({
+        'success': True,
+        **serializar_com_categorias(orcamentos),
+        'total': len(orcamentos)
+    })
+
+
+@orcamentos_bp.route('/<int:id>', methods=['GET'])
+@com_etag(lambda args: [versoes.ORCAMENTOS, versoes.CATEGORIAS])
+def obter_orcamento(id):
+    """Obtém um orçamento específico por ID"""
+    orcamento = OrcamentoMensal.query.get_or_404(id)
+    return jsonify({
+        'success': True,
+        'data': orcamento.to_dict()
+    })
+
+
+@orcamentos_bp.route('', methods=['POST'])
+def criar_orcamento():
+    """Cria o orçamento de uma categoria em um mês"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
+    
+    erro = validar_orcamento(data)
+    if erro:
+        return jsonify({'success': False, 'error': erro}), 400
+    
+    if catalogo.categoria(data['categoria_id']) is None:
+        return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
+    
+    try:
+        orcamento = OrcamentoMensal(
+            categoria_id=data['categoria_id'],
+            mes=data['mes'],
+            ano=data['ano'],
+            valor_limite=data['valor_limite']
+        )
+        
+        db.session.add(orcamento)
+        versoes.incrementar(*versoes.chaves_orcamento(orcamento))
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Orçamento criado com sucesso',
+            'data': orcamento.to_dict()
+        }), 201
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': ERRO_DUPLICADO}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@orcamentos_bp.route('/<int:ano>/<int:mes>', methods=['PUT'])
+def definir_orcamentos_mes(ano, mes):
+    """Cria ou atualiza de uma vez os orçamentos de um mês (um único INSERT ... upsert)"""
+    data = request.get_json()
+    
+    if not isinstance(data, dict) or not isinstance(data.get('orcamentos'), list) or not data['orcamentos']:
+        return jsonify({'success': False, 'error': 'Informe a lista "orcamentos"'}), 400
+    if mes not in range(1, 13):
+        return jsonify({'success': False, 'error': 'Mês deve estar entre 1 e 12'}), 400
+    
+    linhas = {}
+    for item in data['orcamentos']:
+        if not isinstance(item, dict):
+            return jsonify({'success': False, 'error': 'Cada orçamento deve ser um objeto'}), 400
+        erro = validar_orcamento(item, campos=('categoria_id', 'valor_limite'))
+        if erro:
+            return jsonify({'success': False, 'error': erro}), 400
+        # Categoria repetida na lista: vale a última ocorrência
+        linhas[item['categoria_id']] = item['valor_limite']
+    
+    faltantes = sorted(categoria_id for categoria_id in linhas if catalogo.categoria(categoria_id) is None)
+    if faltantes:
+        return jsonify({'success': False, 'error': f'Categorias não encontradas: {faltantes}'}), 400
+    
+    try:
+        agora = datetime.utcnow()
+        inserir_ou_atualizar(
+            OrcamentoMensal.__table__,
+            [{
+                'categoria_id': categoria_id,
+                'mes': mes,
+                'ano': ano,
+                'valor_limite': valor_limite,
+                'created_at': agora,
+                'updated_at': agora
+            } for categoria_id, valor_limite in linhas.items()],
+            ('categoria_id', 'mes', 'ano'),
+            ('valor_limite', 'updated_at')
+        )
+        versoes.incrementar(versoes.chave_orcamento(ano, mes))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    orcamentos = OrcamentoMensal.query.filter(
+        OrcamentoMensal.ano == ano,
+        OrcamentoMensal.mes == mes
+    ).order_by(OrcamentoMensal.categoria_id).all()
+    
+    return jsonify({
+        'success': True,
+        'message': f'{len(linhas)} orçamentos definidos para {mes:02d}/{ano}',
+        **serializar_com_categorias(orcamentos),
+        'total': len(orcamentos)
+    })
+
+
+@orcamentos_bp.route('/<int:id>', methods=['PUT'])
+def atualizar_orcamento(id):
+    """Atualiza um orçamento existente"""
+    orcamento = OrcamentoMensal.query.get_or_404(id)
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
+    
+    erro = validar_orcamento(data, campos=[campo for campo in data if campo != 'id'])
+    if erro:
+        return jsonify({'success': False, 'error': erro}), 400
+    
+    if 'categoria_id' in data and catalogo.categoria(data['categoria_id']) is None:
+        return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
+    
+    try:
+        escopos = versoes.chaves_orcamento(orcamento)
+        
+        if 'categoria_id' in data:
+            orcamento.categoria_id = data['categoria_id']
+        if 'mes' in data:
+            orcamento.mes = data['mes']
+        if 'ano' in data:
+            orcamento.ano = data['ano']
+        if 'valor_limite' in data:
+            orcamento.valor_limite = data['valor_limite']
+        
+        versoes.incrementar(*escopos, *versoes.chaves_orcamento(orcamento))
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Orçamento atualizado com sucesso',
+            'data': orcamento.to_dict()
+        })
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': ERRO_DUPLICADO}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@orcamentos_bp.route('/<int:id>', methods=['DELETE'])
+def deletar_orcamento(id):
+    """Deleta um orçamento"""
+    orcamento = OrcamentoMensal.query.get_or_404(id)
+    
+    try:
+        versoes.incrementar(*versoes.chaves_orcamento(orcamento))
+        db.session.delete(orcamento)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Orçamento deletado com sucesso'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
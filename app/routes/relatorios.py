@@ -1,76 +1,134 @@
 from flask import Blueprint, request, jsonify
-from app import db
-from app.models import Gasto, Categoria
-from datetime import datetime, timedelta
-from sqlalchemy import func, extract
+from app import db, arquivo, serializacao, versoes
+from app.cache import cache
+from app.etag import com_etag
+from app.replica import replica
+from app.models import Gasto, Categoria, AgregadoMensal, OrcamentoMensal
+from app.periodos import filtro_mes, intervalo_mes, meses_anteriores
+from datetime import date, datetime
+from sqlalchemy import and_, case, func, or_, select
+from app.routes.gastos import buscar_pagina, LIMITE_PADRAO, LIMITE_MAXIMO
 
 relatorios_bp = Blueprint('relatorios', __name__)
 
+# Horizonte máximo da evolução mensal
+MESES_EVOLUCAO_MAXIMO = 120
+
+# Percentual do limite a partir do qual uma categoria entra em alerta
+LIMIAR_ALERTA_ORCAMENTO = 80
+
+
+def mes_ano(args):
+    """Mês e ano pedidos nos parâmetros (padrão: o mês atual)"""
+    return (
+        args.get('mes', datetime.now().month, type=int),
+        args.get('ano', datetime.now().year, type=int)
+    )
+
+
+def meses_evolucao(args):
+    """Quantidade de meses da evolução, limitada ao horizonte máximo"""
+    return max(0, min(args.get('meses', 6, type=int), MESES_EVOLUCAO_MAXIMO))
+
+
+def escopos_mes(args):
+    """Escopos de versão lidos por relatórios de um mês"""
+    mes, ano = mes_ano(args)
+    return [versoes.chave_mes(ano, mes), versoes.CATEGORIAS]
+
+
+def escopos_evolucao(args):
+    """Escopos de versão lidos pela evolução (um por mês do período)"""
+    return [versoes.chave_mes(ano, mes) for ano, mes in meses_anteriores(meses_evolucao(args), datetime.now())]
+
+
+def escopos_orcamento(args):
+    """Escopos de versão lidos pelo orçamento x realizado: gastos e orçamentos do mês"""
+    mes, ano = mes_ano(args)
+    return escopos_mes(args) + [versoes.chave_orcamento(ano, mes)]
+
+
+def escopos_dashboard(args):
+    return escopos_mes(args) + escopos_evolucao(args)
+
+
+def _mes_arquivado(mes, ano):
+    """Indica se os gastos do mês podem estar no arquivo"""
+    try:
+        return arquivo.alcanca(*intervalo_mes(mes, ano))
+    except ValueError:
+        return False
+
+
+def consulta_resumo(mes, ano):
+    """Totais do mês com agregação condicional em uma única query"""
+    return select(
+        func.sum(case((AgregadoMensal.tipo == 'despesa', AgregadoMensal.total), else_=0)),
+        func.sum(case((AgregadoMensal.tipo == 'receita', AgregadoMensal.total), else_=0)),
+        func.sum(AgregadoMensal.quantidade)
+    ).filter(
+        AgregadoMensal.ano == ano,
+        AgregadoMensal.mes == mes
+    )
+
+
+def montar_resumo(mes, ano, linhas):
+    """Resumo do mês a partir do resultado de consulta_resumo()"""
+    total_despesas, total_receitas, qtd_transacoes = linhas[0]
+    
+    total_despesas = total_despesas or 0
+    total_receitas = total_receitas or 0
+    
+    return {
+        'mes': mes,
+        'ano': ano,
+        'total_despesas': float(total_despesas),
+        'total_receitas': float(total_receitas),
+        'saldo': float(total_receitas) - float(total_despesas),
+        'quantidade_transacoes': int(qtd_transacoes or 0)
+    }
+
+
+def calcular_resumo(mes, ano):
+    """Totais do mês"""
+    return montar_resumo(mes, ano, db.session.execute(consulta_resumo(mes, ano)).all())
+
 
 @relatorios_bp.route('/resumo-mensal', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_mes)
+@cache.em_cache(escopos_mes)
 def resumo_mensal():
     """Retorna resumo de gastos do mês"""
-    mes = request.args.get('mes', datetime.now().month, type=int)
-    ano = request.args.get('ano', datetime.now().year, type=int)
-    
-    # Total de despesas
-    total_despesas = db.session.query(func.sum(Gasto.valor)).filter(
-        Gasto.tipo == 'despesa',
-        extract('month', Gasto.data) == mes,
-        extract('year', Gasto.data) == ano
-    ).scalar() or 0
-    
-    # Total de receitas
-    total_receitas = db.session.query(func.sum(Gasto.valor)).filter(
-        Gasto.tipo == 'receita',
-        extract('month', Gasto.data) == mes,
-        extract('year', Gasto.data) == ano
-    ).scalar() or 0
-    
-    # Saldo
-    saldo = float(total_receitas) - float(total_despesas)
-    
-    # Quantidade de transações
-    qtd_transacoes = Gasto.query.filter(
-        extract('month', Gasto.data) == mes,
-        extract('year', Gasto.data) == ano
-    ).count()
+    mes, ano = mes_ano(request.args)
     
     return jsonify({
         'success': True,
-        'data': {
-            'mes': mes,
-            'ano': ano,
-            'total_despesas': float(total_despesas),
-            'total_receitas': float(total_receitas),
-            'saldo': saldo,
-            'quantidade_transacoes': qtd_transacoes
-        }
+        'data': calcular_resumo(mes, ano)
     })
 
 
-@relatorios_bp.route('/por-categoria', methods=['GET'])
-def gastos_por_categoria():
-    """Retorna gastos agrupados por categoria"""
-    mes = request.args.get('mes', datetime.now().month, type=int)
-    ano = request.args.get('ano', datetime.now().year, type=int)
-    tipo = request.args.get('tipo', 'despesa')
-    
-    # Query com agrupamento por categoria
-    resultados = db.session.query(
+def consulta_por_categoria(mes, ano, tipo='despesa'):
+    """Totais do mês agrupados por categoria"""
+    # Query com agrupamento por categoria sobre os agregados mensais
+    return select(
         Categoria.id,
         Categoria.nome,
         Categoria.cor,
         Categoria.icone,
-        func.sum(Gasto.valor).label('total'),
-        func.count(Gasto.id).label('quantidade')
-    ).join(Gasto, Categoria.id == Gasto.categoria_id)\
+        func.sum(AgregadoMensal.total).label('total'),
+        func.sum(AgregadoMensal.quantidade).label('quantidade')
+    ).join(AgregadoMensal, Categoria.id == AgregadoMensal.categoria_id)\
     .filter(
-        Gasto.tipo == tipo,
-        extract('month', Gasto.data) == mes,
-        extract('year', Gasto.data) == ano
-    ).group_by(Categoria.id).all()
-    
+        AgregadoMensal.tipo == tipo,
+        AgregadoMensal.ano == ano,
+        AgregadoMensal.mes == mes
+    ).group_by(Categoria.id)\
+    .having(func.sum(AgregadoMensal.quantidade) > 0)
+
+
+def montar_por_categoria(mes, ano, tipo, resultados):
+    """Totais por categoria a partir do resultado de consulta_por_categoria()"""
     # Calcula total geral para porcentagem
     total_geral = sum(r.total for r in resultados) if resultados else 0
     
@@ -82,58 +140,74 @@ def gastos_por_categoria():
             'cor': r.cor,
             'icone': r.icone,
             'total': float(r.total),
-            'quantidade': r.quantidade,
+            'quantidade': int(r.quantidade),
             'percentual': round((float(r.total) / float(total_geral)) * 100, 2) if total_geral > 0 else 0
         })
     
     # Ordena por total (maior primeiro)
     dados.sort(key=lambda x: x['total'], reverse=True)
     
+    return {
+        'mes': mes,
+        'ano': ano,
+        'tipo': tipo,
+        'total_geral': float(total_geral),
+        'categorias': dados
+    }
+
+
+def calcular_por_categoria(mes, ano, tipo='despesa'):
+    """Totais do mês agrupados por categoria"""
+    resultados = db.session.execute(consulta_por_categoria(mes, ano, tipo)).all()
+    return montar_por_categoria(mes, ano, tipo, resultados)
+
+
+@relatorios_bp.route('/por-categoria', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_mes)
+@cache.em_cache(escopos_mes)
+def gastos_por_categoria():
+    """Retorna gastos agrupados por categoria"""
+    mes, ano = mes_ano(request.args)
+    tipo = request.args.get('tipo', 'despesa')
+    
     return jsonify({
         'success': True,
-        'data': {
-            'mes': mes,
-            'ano': ano,
-            'tipo': tipo,
-            'total_geral': float(total_geral),
-            'categorias': dados
-        }
+        'data': calcular_por_categoria(mes, ano, tipo)
     })
 
 
-@relatorios_bp.route('/evolucao', methods=['GET'])
-def evolucao_gastos():
-    """Retorna evolução de gastos nos últimos meses"""
-    meses = request.args.get('meses', 6, type=int)
-    tipo = request.args.get('tipo')  # Se não informado, retorna ambos
-    
-    hoje = datetime.now()
+def consulta_evolucao(periodo):
+    """Totais por mês e tipo dos meses (ano, mes) do período, em uma única query"""
+    (ano_inicio, mes_inicio), (ano_fim, mes_fim) = periodo[0], periodo[-1]
+    return select(
+        AgregadoMensal.ano,
+        AgregadoMensal.mes,
+        AgregadoMensal.tipo,
+        func.sum(AgregadoMensal.total).label('total')
+    ).filter(
+        AgregadoMensal.tipo.in_(['despesa', 'receita']),
+        or_(AgregadoMensal.ano > ano_inicio,
+            and_(AgregadoMensal.ano == ano_inicio, AgregadoMensal.mes >= mes_inicio)),
+        or_(AgregadoMensal.ano < ano_fim,
+            and_(AgregadoMensal.ano == ano_fim, AgregadoMensal.mes <= mes_fim))
+    ).group_by(AgregadoMensal.ano, AgregadoMensal.mes, AgregadoMensal.tipo)
+
+
+def montar_evolucao(periodo, tipo, resultados):
+    """Série do período a partir do resultado de consulta_evolucao()"""
+    totais = {(r.ano, r.mes, r.tipo): r.total or 0 for r in resultados}
     dados = []
     
-    for i in range(meses - 1, -1, -1):
-        # Calcula o mês
-        data_ref = hoje - timedelta(days=i * 30)
-        mes = data_ref.month
-        ano = data_ref.year
-        
-        # Query para despesas
-        despesas = db.session.query(func.sum(Gasto.valor)).filter(
-            Gasto.tipo == 'despesa',
-            extract('month', Gasto.data) == mes,
-            extract('year', Gasto.data) == ano
-        ).scalar() or 0
-        
-        # Query para receitas
-        receitas = db.session.query(func.sum(Gasto.valor)).filter(
-            Gasto.tipo == 'receita',
-            extract('month', Gasto.data) == mes,
-            extract('year', Gasto.data) == ano
-        ).scalar() or 0
+    # Meses sem movimentação aparecem zerados
+    for ano, mes in periodo:
+        despesas = totais.get((ano, mes, 'despesa'), 0)
+        receitas = totais.get((ano, mes, 'receita'), 0)
         
         item = {
             'mes': mes,
             'ano': ano,
-            'mes_nome': data_ref.strftime('%b/%Y')
+            'mes_nome': date(ano, mes, 1).strftime('%b/%Y')
         }
         
         if tipo == 'despesa':
@@ -147,51 +221,81 @@ def evolucao_gastos():
         
         dados.append(item)
     
+    return dados
+
+
+def calcular_evolucao(meses, tipo=None):
+    """Série mensal de despesas/receitas dos últimos meses de calendário"""
+    periodo = meses_anteriores(meses, datetime.now())
+    if not periodo:
+        return []
+    return montar_evolucao(periodo, tipo, db.session.execute(consulta_evolucao(periodo)).all())
+
+
+@relatorios_bp.route('/evolucao', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_evolucao)
+@cache.em_cache(escopos_evolucao)
+def evolucao_gastos():
+    """Retorna evolução de gastos nos últimos meses"""
+    meses = meses_evolucao(request.args)
+    tipo = request.args.get('tipo')  # Se não informado, retorna ambos
+    
     return jsonify({
         'success': True,
-        'data': dados
+        'data': calcular_evolucao(meses, tipo)
     })
 
 
 @relatorios_bp.route('/maiores-gastos', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_mes)
+@cache.em_cache(escopos_mes)
 def maiores_gastos():
     """Retorna os maiores gastos do período"""
-    mes = request.args.get('mes', datetime.now().month, type=int)
-    ano = request.args.get('ano', datetime.now().year, type=int)
+    mes, ano = mes_ano(request.args)
     limite = request.args.get('limite', 10, type=int)
+    sideload = request.args.get('sideload', 'false').lower() == 'true'
     
-    gastos = Gasto.query.filter(
+    query = serializacao.projetar_gastos(Gasto.query).filter(
         Gasto.tipo == 'despesa',
-        extract('month', Gasto.data) == mes,
-        extract('year', Gasto.data) == ano
-    ).order_by(Gasto.valor.desc()).limit(limite).all()
+        filtro_mes(Gasto.data, mes, ano)
+    ).order_by(Gasto.valor.desc()).limit(limite)
+    gastos = arquivo.consultar(
+        query, lambda linha: linha.valor, query if _mes_arquivado(mes, ano) else None, limite
+    )
     
-    return jsonify({
+    serializado = serializacao.serializar_linhas(gastos, sideload)
+    dados = {
+        'mes': mes,
+        'ano': ano,
+        'gastos': serializado['data']
+    }
+    if sideload:
+        dados['categorias'] = serializado['categorias']
+    
+    return serializacao.responder({
         'success': True,
-        'data': {
-            'mes': mes,
-            'ano': ano,
-            'gastos': [g.to_dict() for g in gastos]
-        }
+        'data': dados
     })
 
 
-@relatorios_bp.route('/por-forma-pagamento', methods=['GET'])
-def gastos_por_forma_pagamento():
-    """Retorna gastos agrupados por forma de pagamento"""
-    mes = request.args.get('mes', datetime.now().month, type=int)
-    ano = request.args.get('ano', datetime.now().year, type=int)
-    
-    resultados = db.session.query(
-        Gasto.forma_pagamento,
-        func.sum(Gasto.valor).label('total'),
-        func.count(Gasto.id).label('quantidade')
+def consulta_por_forma_pagamento(mes, ano):
+    """Despesas do mês agrupadas por forma de pagamento"""
+    return select(
+        AgregadoMensal.forma_pagamento,
+        func.sum(AgregadoMensal.total).label('total'),
+        func.sum(AgregadoMensal.quantidade).label('quantidade')
     ).filter(
-        Gasto.tipo == 'despesa',
-        extract('month', Gasto.data) == mes,
-        extract('year', Gasto.data) == ano
-    ).group_by(Gasto.forma_pagamento).all()
-    
+        AgregadoMensal.tipo == 'despesa',
+        AgregadoMensal.ano == ano,
+        AgregadoMensal.mes == mes
+    ).group_by(AgregadoMensal.forma_pagamento)\
+    .having(func.sum(AgregadoMensal.quantidade) > 0)
+
+
+def montar_por_forma_pagamento(mes, ano, resultados):
+    """Totais por forma de pagamento a partir de consulta_por_forma_pagamento()"""
     total_geral = sum(r.total for r in resultados) if resultados else 0
     
     dados = []
@@ -199,18 +303,176 @@ def gastos_por_forma_pagamento():
         dados.append({
             'forma_pagamento': r.forma_pagamento or 'Não informado',
             'total': float(r.total),
-            'quantidade': r.quantidade,
+            'quantidade': int(r.quantidade),
             'percentual': round((float(r.total) / float(total_geral)) * 100, 2) if total_geral > 0 else 0
         })
     
     dados.sort(key=lambda x: x['total'], reverse=True)
     
+    return {
+        'mes': mes,
+        'ano': ano,
+        'total_geral': float(total_geral),
+        'formas_pagamento': dados
+    }
+
+
+def calcular_por_forma_pagamento(mes, ano):
+    """Despesas do mês agrupadas por forma de pagamento"""
+    return montar_por_forma_pagamento(mes, ano, db.session.execute(consulta_por_forma_pagamento(mes, ano)).all())
+
+
+@relatorios_bp.route('/por-forma-pagamento', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_mes)
+@cache.em_cache(escopos_mes)
+def gastos_por_forma_pagamento():
+    """Retorna gastos agrupados por forma de pagamento"""
+    mes, ano = mes_ano(request.args)
+    
+    return jsonify({
+        'success': True,
+        'data': calcular_por_forma_pagamento(mes, ano)
+    })
+
+
+def consulta_orcamento(mes, ano):
+    """Orçamento x realizado por categoria em uma única query agregada"""
+    # Cada categoria com o limite do mês (no máximo um, pela restrição única)
+    # e a soma das despesas do mês nos agregados mensais
+    return select(
+        Categoria.id,
+        Categoria.nome,
+        Categoria.cor,
+        Categoria.icone,
+        OrcamentoMensal.valor_limite,
+        func.coalesce(func.sum(AgregadoMensal.total), 0).label('gasto')
+    ).outerjoin(OrcamentoMensal, and_(
+        OrcamentoMensal.categoria_id == Categoria.id,
+        OrcamentoMensal.ano == ano,
+        OrcamentoMensal.mes == mes
+    )).outerjoin(AgregadoMensal, and_(
+        AgregadoMensal.categoria_id == Categoria.id,
+        AgregadoMensal.tipo == 'despesa',
+        AgregadoMensal.ano == ano,
+        AgregadoMensal.mes == mes
+    )).group_by(Categoria.id, OrcamentoMensal.valor_limite)
+
+
+def montar_orcamento(mes, ano, limiar_alerta, resultados):
+    """Orçamento x realizado a partir do resultado de consulta_orcamento()"""
+    dados = []
+    total_limite = total_gasto = 0.0
+    for r in resultados:
+        gasto = float(r.gasto)
+        if r.valor_limite is None:
+            if gasto > 0:
+                dados.append({
+                    'categoria_id': r.id,
+                    'categoria_nome': r.nome,
+                    'cor': r.cor,
+                    'icone': r.icone,
+                    'limite': None,
+                    'gasto': gasto,
+                    'restante': None,
+                    'percentual': None,
+                    'status': 'sem_orcamento'
+                })
+            continue
+        
+        limite = float(r.valor_limite)
+        percentual = round(gasto / limite * 100, 2) if limite > 0 else 0
+        if gasto > limite:
+            status = 'excedido'
+        elif percentual >= limiar_alerta:
+            status = 'alerta'
+        else:
+            status = 'ok'
+        
+        total_limite += limite
+        total_gasto += gasto
+        dados.append({
+            'categoria_id': r.id,
+            'categoria_nome': r.nome,
+            'cor': r.cor,
+            'icone': r.icone,
+            'limite': limite,
+            'gasto': gasto,
+            'restante': round(limite - gasto, 2),
+            'percentual': percentual,
+            'status': status
+        })
+    
+    # Categorias mais próximas (ou além) do limite primeiro; sem orçamento ao final
+    dados.sort(key=lambda x: (x['percentual'] is None, -(x['percentual'] or 0), -x['gasto']))
+    
+    return {
+        'mes': mes,
+        'ano': ano,
+        'limiar_alerta': limiar_alerta,
+        'total_limite': round(total_limite, 2),
+        'total_gasto': round(total_gasto, 2),
+        'total_restante': round(total_limite - total_gasto, 2),
+        'percentual': round(total_gasto / total_limite * 100, 2) if total_limite > 0 else 0,
+        'excedidas': sum(1 for d in dados if d['status'] == 'excedido'),
+        'em_alerta': sum(1 for d in dados if d['status'] == 'alerta'),
+        'categorias': dados
+    }
+
+
+def calcular_orcamento(mes, ano, limiar_alerta=LIMIAR_ALERTA_ORCAMENTO):
+    """Orçamento x realizado por categoria"""
+    return montar_orcamento(mes, ano, limiar_alerta, db.session.execute(consulta_orcamento(mes, ano)).all())
+
+
+@relatorios_bp.route('/orcamento', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_orcamento)
+@cache.em_cache(escopos_orcamento)
+def orcamento_x_realizado():
+    """Retorna limite, gasto, restante e percentual do orçamento de cada categoria"""
+    mes, ano = mes_ano(request.args)
+    limiar_alerta = request.args.get('alerta', LIMIAR_ALERTA_ORCAMENTO, type=float)
+    
+    return jsonify({
+        'success': True,
+        'data': calcular_orcamento(mes, ano, limiar_alerta)
+    })
+
+
+@relatorios_bp.route('/dashboard', methods=['GET'])
+@replica.somente_leitura
+@com_etag(escopos_dashboard)
+@cache.em_cache(escopos_dashboard)
+def dashboard():
+    """Retorna em uma única resposta todos os dados da tela principal"""
+    mes, ano = mes_ano(request.args)
+    meses = meses_evolucao(request.args)
+    limite = max(1, min(request.args.get('limit', LIMITE_PADRAO, type=int), LIMITE_MAXIMO))
+    
+    # Primeira página das transações do mês
+    query = serializacao.projetar_gastos(Gasto.query).filter(filtro_mes(Gasto.data, mes, ano))
+    gastos, next_cursor = buscar_pagina(query, limite, query_arquivo=query if _mes_arquivado(mes, ano) else None)
+    
     return jsonify({
         'success': True,
         'data': {
-            'mes': mes,
-            'ano': ano,
-            'total_geral': float(total_geral),
-            'formas_pagamento': dados
+            'resumo': calcular_resumo(mes, ano),
+            'por_categoria': calcular_por_categoria(mes, ano),
+            'por_forma_pagamento': calcular_por_forma_pagamento(mes, ano),
+            'evolucao': calcular_evolucao(meses),
+            'gastos': {
+                **serializacao.serializar_linhas(gastos),
+                'next_cursor': next_cursor
+            }
         }
     })
+
+
+@relatorios_bp.route('/cache', methods=['GET'])
+def estatisticas_cache():
+    """Retorna os contadores do cache de relatórios"""
+    return jsonify({
+        'success': True,
+        'data': cache.estatisticas()
+    })
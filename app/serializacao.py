@@ -0,0 +1,165 @@
+"""Serialização rápida das listagens de gastos.
+
+Duas partes independentes:
+  
+  - projeção: as listagens selecionam apenas as colunas de gastos e da
+    categoria (um LEFT JOIN, como tuplas) e montam os dicionários sem criar
+    instâncias do ORM, no mesmo formato de Gasto.to_dict();
+  - codificação: essas respostas (responder()) são codificadas com orjson,
+    quando instalado, em vez do json da biblioteca padrão.
+
+A saída é byte a byte igual à do jsonify() sobre Gasto.to_dict() (chaves
+ordenadas, ASCII com escapes \\uXXXX). O orjson escreve diferente do json
+apenas floats abaixo de 1e-4 ou a partir de 1e16, que não ocorrem em valores
+monetários, e caracteres não ASCII, que são escapados da mesma forma.
+"""
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+from app.models import Categoria, Gasto
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+COLUNAS_GASTO = (
+    Gasto.id, Gasto.descricao, Gasto.valor, Gasto.data, Gasto.categoria_id, Gasto.tipo,
+    Gasto.forma_pagamento, Gasto.observacao, Gasto.comprovante, Gasto.recorrente,
+    Gasto.recorrencia_origem_id, Gasto.created_at, Gasto.updated_at,
+)
+COLUNAS_CATEGORIA = (
+    Categoria.id.label('cat_id'), Categoria.nome.label('cat_nome'),
+    Categoria.descricao.label('cat_descricao'), Categoria.cor.label('cat_cor'),
+    Categoria.icone.label('cat_icone'), Categoria.ativo.label('cat_ativo'),
+    Categoria.created_at.label('cat_created_at'), Categoria.updated_at.label('cat_updated_at'),
+)
+
+
+def projetar_gastos(query):
+    """Troca as entidades de uma query de gastos pelas colunas de gasto e categoria"""
+    return query.with_entities(*COLUNAS_GASTO, *COLUNAS_CATEGORIA).outerjoin(
+        Categoria, Categoria.id == Gasto.categoria_id
+    )
+
+
+def selecionar_gastos():
+    """O select de projetar_gastos(), sem depender da sessão"""
+    return select(*COLUNAS_GASTO, *COLUNAS_CATEGORIA).outerjoin(
+        Categoria, Categoria.id == Gasto.categoria_id
+    )
+
+
+def _iso(valor):
+    return valor.isoformat() if valor else None
+
+
+def _categoria(linha):
+    return {
+        'id': linha[13],
+        'nome': linha[14],
+        'descricao': linha[15],
+        'cor': linha[16],
+        'icone': linha[17],
+        'ativo': linha[18],
+        'created_at': _iso(linha[19]),
+        'updated_at': _iso(linha[20])
+    }
+
+
+def _gasto(linha):
+    return {
+        'id': linha[0],
+        'descricao': linha[1],
+        'valor': float(linha[2]),
+        'data': _iso(linha[3]),
+        'categoria_id': linha[4],
+        'tipo': linha[5],
+        'forma_pagamento': linha[6],
+        'observacao': linha[7],
+        'comprovante': linha[8],
+        'recorrente': linha[9],
+        'recorrencia_origem_id': linha[10],
+        'created_at': _iso(linha[11]),
+        'updated_at': _iso(linha[12])
+    }
+
+
+def serializar_linhas(linhas, sideload=False):
+    """Equivalente a serializar_com_categorias() para linhas de projetar_gastos()"""
+    # Cada categoria é montada uma única vez e compartilhada entre os gastos
+    categorias = {}
+    for linha in linhas:
+        if linha[13] is not None and linha[13] not in categorias:
+            categorias[linha[13]] = _categoria(linha)
+    
+    if not sideload:
+        dados = []
+        for linha in linhas:
+            gasto = _gasto(linha)
+            gasto['categoria'] = categorias.get(linha[13])
+            dados.append(gasto)
+        return {'data': dados}
+    
+    return {
+        'data': [_gasto(linha) for linha in linhas],
+        'categorias': {str(cat_id): cat for cat_id, cat in categorias.items()}
+    }
+
+
+class Projetado(dict):
+    """Resposta montada a partir de serializar_linhas(), marcada para o orjson"""
+
+
+def responder(dados):
+    """Equivalente ao jsonify() para respostas de listagem montadas com
+    serializar_linhas(); codifica com orjson quando disponível"""
+    return current_app.json.response(Projetado(dados))
+
+
+def _escapar_ascii(saida):
+    """Aplica à saída do orjson os escapes do json.dumps(ensure_ascii=True);
+    None se ela tiver algo que o json escaparia de outra forma"""
+    if saida.isascii():
+        return saida if b'\x7f' not in saida else saida.replace(b'\x7f', b'\\u007f')
+    
+    # Fora de strings não há caracteres não ASCII; dentro delas, o
+    # backslashreplace gera \xNN, \uNNNN e \UNNNNNNNN. Os dois primeiros
+    # viram o \uNNNN do json; \U (pares substitutos) e uma barra invertida
+    # seguida de x nos próprios dados ficam com o json da biblioteca padrão.
+    if b'\\x' in saida:
+        return None
+    escapada = saida.decode().encode('ascii', 'backslashreplace')
+    if b'\\U' in escapada:
+        return None
+    escapada = escapada.replace(b'\\x', b'\\u00')
+    return escapada if b'\x7f' not in escapada else escapada.replace(b'\x7f', b'\\u007f')
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """Provedor JSON do Flask que codifica as respostas Projetado com orjson.
+    
+    Os demais objetos seguem pelo json da biblioteca padrão. Nas respostas de
+    listagem os tipos são conhecidos (os floats são valores monetários, que o
+    orjson e o repr() escrevem igual); chaves não textuais, tipos que o orjson
+    não serializa e escapes diferentes também recorrem ao json.
+    """
+    
+    def __init__(self, app):
+        super().__init__(app)
+        self.rapido = orjson is not None and app.config.get('JSON_RAPIDO', True)
+    
+    def _compacto(self):
+        return not ((self.compact is None and self._app.debug) or self.compact is False)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.rapido and isinstance(obj, Projetado) and self._compacto():
+            try:
+                saida = _escapar_ascii(orjson.dumps(obj, option=orjson.OPT_SORT_KEYS))
+            except TypeError:
+                saida = None
+            if saida is not None:
+                # Corpo montado direto em bytes, sem passar por str
+                return self._app.response_class(saida + b'\n', mimetype=self.mimetype)
+        return super().response(obj)
@@ -0,0 +1,97 @@
+"""Operações SQL dependentes de dialeto usadas pela aplicação"""
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+
+
+def inserir_ou_somar(tabela, linha, colunas_chave, colunas_soma):
+    """Insere a linha ou, se a chave já existir, soma os valores de colunas_soma.
+    
+    Usa INSERT ... ON DUPLICATE KEY UPDATE no MySQL e ON CONFLICT no SQLite,
+    de modo que escritas concorrentes na mesma chave não se sobrescrevam.
+    """
+    dialeto = db.session.get_bind().dialect.name
+    
+    if dialeto == 'mysql':
+        stmt = mysql_insert(tabela).values(**linha)
+        stmt = stmt.on_duplicate_key_update(**{
+            coluna: tabela.c[coluna] + stmt.inserted[coluna] for coluna in colunas_soma
+        })
+        db.session.execute(stmt)
+    elif dialeto == 'sqlite':
+        stmt = sqlite_insert(tabela).values(**linha)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(colunas_chave),
+            set_={coluna: tabela.c[coluna] + stmt.excluded[coluna] for coluna in colunas_soma}
+        )
+        db.session.execute(stmt)
+    else:
+        filtro = [tabela.c[coluna] == linha[coluna] for coluna in colunas_chave]
+        resultado = db.session.execute(update(tabela).where(*filtro).values(**{
+            coluna: tabela.c[coluna] + linha[coluna] for coluna in colunas_soma
+        }))
+        if resultado.rowcount == 0:
+            db.session.execute(insert(tabela).values(**linha))
+
+
+def inserir_ou_atualizar(tabela, linhas, colunas_chave, colunas_atualizar):
+    """Insere as linhas em um único INSERT com vários VALUES; nas chaves já
+    existentes, sobrescreve colunas_atualizar com os valores enviados.
+    """
+    if not linhas:
+        return
+    dialeto = db.session.get_bind().dialect.name
+    
+    if dialeto == 'mysql':
+        stmt = mysql_insert(tabela).values(linhas)
+        stmt = stmt.on_duplicate_key_update(**{
+            coluna: stmt.inserted[coluna] for coluna in colunas_atualizar
+        })
+        db.session.execute(stmt)
+    elif dialeto == 'sqlite':
+        stmt = sqlite_insert(tabela).values(linhas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(colunas_chave),
+            set_={coluna: stmt.excluded[coluna] for coluna in colunas_atualizar}
+        )
+        db.session.execute(stmt)
+    else:
+        for linha in linhas:
+            filtro = [tabela.c[coluna] == linha[coluna] for coluna in colunas_chave]
+            resultado = db.session.execute(update(tabela).where(*filtro).values(**{
+                coluna: linha[coluna] for coluna in colunas_atualizar
+            }))
+            if resultado.rowcount == 0:
+                db.session.execute(insert(tabela).values(**linha))
+
+
+def inserir_ignorando(tabela, linhas, colunas_chave):
+    """Insere um lote de linhas com um único INSERT, ignorando as que violariam
+    a chave única; retorna quantas foram de fato inseridas.
+    
+    Usa INSERT IGNORE no MySQL e ON CONFLICT DO NOTHING no SQLite, de modo
+    que execuções concorrentes não dupliquem linhas nem falhem. O comando é
+    compilado uma vez e executado com executemany: o PyMySQL o envia como um
+    INSERT com vários VALUES e o SQLite reaproveita o comando preparado.
+    """
+    if not linhas:
+        return 0
+    dialeto = db.session.get_bind().dialect.name
+    
+    if dialeto == 'mysql':
+        stmt = mysql_insert(tabela).prefix_with('IGNORE')
+    elif dialeto == 'sqlite':
+        stmt = sqlite_insert(tabela).on_conflict_do_nothing(index_elements=list(colunas_chave))
+    else:
+        chave = tuple_(*(tabela.c[coluna] for coluna in colunas_chave))
+        existentes = set(db.session.execute(
+            select(*(tabela.c[coluna] for coluna in colunas_chave))
+            .where(chave.in_([tuple(linha[coluna] for coluna in colunas_chave) for linha in linhas]))
+        ).all())
+        linhas = [linha for linha in linhas if tuple(linha[coluna] for coluna in colunas_chave) not in existentes]
+        if not linhas:
+            return 0
+        stmt = insert(tabela)
+    
+    return db.session.execute(stmt, linhas).rowcount
@@ -4,8 +4,12 @@ const API_URL = '/api';
 // Estado da aplicação
 let state = {
     gastos: [],
+    proximoCursor: null,
     categorias: [],
+    anosArquivados: [],
     resumo: {},
+    porCategoria: { categorias: [] },
+    evolucao: [],
     filtros: {
         mes: new Date().getMonth() + 1,
         ano: new Date().getFullYear()
@@ -38,8 +42,9 @@ async function inicializarApp() {
         // Popular selects de filtro
         popularFiltros();
         
-        // Carregar categorias
+        // Carregar categorias e anos arquivados (somente leitura)
         await carregarCategorias();
+        await carregarAnosArquivados();
         
         // Carregar dados
         await carregarDados();
@@ -48,7 +53,7 @@ async function inicializarApp() {
         configurarEventListeners();
         
         // Inicializar gráficos
-        await inicializarGraficos();
+        inicializarGraficos();
         
     } catch (error) {
         console.error('Erro ao inicializar:', error);
@@ -103,6 +108,19 @@ function configurarEventListeners() {
 
 // === API Calls ===
 
+async function carregarAnosArquivados() {
+    try {
+        const response = await fetch(`${API_URL}/gastos/anos-arquivados`);
+        const data = await response.json();
+        
+        if (data.success) {
+            state.anosArquivados = data.data;
+        }
+    } catch (error) {
+        console.error('Erro ao carregar anos arquivados:', error);
+    }
+}
+
 async function carregarCategorias() {
     try {
         const response = await fetch(`${API_URL}/categorias`);
@@ -118,39 +136,43 @@ async function carregarCategorias() {
 }
 
 async function carregarDados() {
-    await Promise.all([
-        carregarGastos(),
-        carregarResumo()
-    ]);
-}
-
-async function carregarGastos() {
+    // Uma única requisição traz resumo, gráficos e a primeira página de transações
     try {
         const { mes, ano } = state.filtros;
-        const response = await fetch(`${API_URL}/gastos?mes=${mes}&ano=${ano}`);
+        const response = await fetch(`${API_URL}/relatorios/dashboard?mes=${mes}&ano=${ano}&meses=6`);
         const data = await response.json();
         
         if (data.success) {
-            state.gastos = data.data;
+            state.resumo = data.data.resumo;
+            state.porCategoria = data.data.por_categoria;
+            state.evolucao = data.data.evolucao;
+            state.gastos = data.data.gastos.data;
+            state.proximoCursor = data.data.gastos.next_cursor;
+            
+            atualizarCards();
             renderizarGastos();
+            atualizarGraficos();
         }
     } catch (error) {
-        console.error('Erro ao carregar gastos:', error);
+        console.error('Erro ao carregar dashboard:', error);
     }
 }
 
-async function carregarResumo() {
+async function carregarMaisGastos() {
+    if (!state.proximoCursor) return;
+    
     try {
         const { mes, ano } = state.filtros;
-        const response = await fetch(`${API_URL}/relatorios/resumo-mensal?mes=${mes}&ano=${ano}`);
+        const response = await fetch(`${API_URL}/gastos?mes=${mes}&ano=${ano}&limit=50&cursor=${state.proximoCursor}`);
         const data = await response.json();
         
         if (data.success) {
-            state.resumo = data.data;
-            atualizarCards();
+            state.gastos = state.gastos.concat(data.data);
+            state.proximoCursor = data.next_cursor;
+            renderizarGastos();
         }
     } catch (error) {
-        console.error('Erro ao carregar resumo:', error);
+        console.error('Erro ao carregar gastos:', error);
     }
 }
 
@@ -208,7 +230,6 @@ async function handleSubmitGasto(e) {
             mostrarToast(gastoId ? 'Gasto atualizado!' : 'Gasto registrado!', 'success');
             fecharModal();
             await carregarDados();
-            await atualizarGraficos();
         } else {
             mostrarToast(result.error, 'error');
         }
@@ -221,7 +242,6 @@ async function handleFiltroChange() {
     state.filtros.mes = parseInt(elements.selectMes.value);
     state.filtros.ano = parseInt(elements.selectAno.value);
     await carregarDados();
-    await atualizarGraficos();
 }
 
 async function handleDeletarGasto(id) {
@@ -232,7 +252,6 @@ async function handleDeletarGasto(id) {
         if (result.success) {
             mostrarToast('Gasto excluído!', 'success');
             await carregarDados();
-            await atualizarGraficos();
         } else {
             mostrarToast(result.error, 'error');
         }
@@ -299,6 +318,18 @@ function renderizarGastos() {
         const categoria = gasto.categoria || { nome: 'Sem categoria', icone: '●', cor: '#64748b' };
         const tipoClass = gasto.tipo === 'receita' ? 'receita' : 'despesa';
         const sinal = gasto.tipo === 'receita' ? '+' : '-';
+        // Gastos de anos arquivados são somente leitura
+        const arquivado = state.anosArquivados.includes(parseInt(gasto.data.slice(0, 4)));
+        const acoes = arquivado ? `
+                    <span class="archived-tag" title="Ano arquivado: restaure o ano para editar">Arquivado</span>
+        ` : `
+                    <button class="btn btn-outline btn-sm" onclick='handleEditarGasto(${JSON.stringify(gasto)})' title="Editar">
+                        <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M11 4H4a2 2 0 0 0-2 2v14a2 2 0 0 0 2 2h14a2 2 0 0 0 2-2v-7"/><path d="M18.5 2.5a2.121 2.121 0 0 1 3 3L12 15l-4 1 1-4 9.5-9.5z"/></svg>
+                    </button>
+                    <button class="btn btn-danger btn-sm" onclick="handleDeletarGasto(${gasto.id})" title="Excluir">
+                        <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><polyline points="3 6 5 6 21 6"/><path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"/></svg>
+                    </button>
+        `;
         
         return `
             <div class="transaction-item">
@@ -315,22 +346,19 @@ function renderizarGastos() {
                     <div class="amount ${tipoClass}">${sinal} ${formatarMoeda(gasto.valor)}</div>
                     <div class="date">${formatarData(gasto.data)}</div>
                 </div>
-                <div class="transaction-actions">
-                    <button class="btn btn-outline btn-sm" onclick='handleEditarGasto(${JSON.stringify(gasto)})' title="Editar">
-                        <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M11 4H4a2 2 0 0 0-2 2v14a2 2 0 0 0 2 2h14a2 2 0 0 0 2-2v-7"/><path d="M18.5 2.5a2.121 2.121 0 0 1 3 3L12 15l-4 1 1-4 9.5-9.5z"/></svg>
-                    </button>
-                    <button class="btn btn-danger btn-sm" onclick="handleDeletarGasto(${gasto.id})" title="Excluir">
-                        <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><polyline points="3 6 5 6 21 6"/><path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"/></svg>
-                    </button>
-                </div>
+                <div class="transaction-actions">${acoes}</div>
             </div>
         `;
-    }).join('');
+    }).join('') + (state.proximoCursor ? `
+        <div class="load-more">
+            <button class="btn btn-outline btn-sm" onclick="carregarMaisGastos()">Carregar mais</button>
+        </div>
+    ` : '');
 }
 
 // === Gráficos ===
 
-async function inicializarGraficos() {
+function inicializarGraficos() {
     const ctxCategorias = document.getElementById('chartCategorias');
     const ctxEvolucao = document.getElementById('chartEvolucao');
     
@@ -427,40 +455,24 @@ async function inicializarGraficos() {
         }
     });
     
-    await atualizarGraficos();
+    atualizarGraficos();
 }
 
-async function atualizarGraficos() {
+function atualizarGraficos() {
     if (!elements.chartCategorias || !elements.chartEvolucao) return;
     
-    try {
-        const { mes, ano } = state.filtros;
-        
-        // Dados por categoria
-        const resCategorias = await fetch(`${API_URL}/relatorios/por-categoria?mes=${mes}&ano=${ano}`);
-        const dataCategorias = await resCategorias.json();
-        
-        if (dataCategorias.success && dataCategorias.data.categorias.length > 0) {
-            elements.chartCategorias.data.labels = dataCategorias.data.categorias.map(c => c.categoria_nome);
-            elements.chartCategorias.data.datasets[0].data = dataCategorias.data.categorias.map(c => c.total);
-            elements.chartCategorias.data.datasets[0].backgroundColor = dataCategorias.data.categorias.map(c => c.cor);
-            elements.chartCategorias.update();
-        }
-        
-        // Dados de evolução
-        const resEvolucao = await fetch(`${API_URL}/relatorios/evolucao?meses=6`);
-        const dataEvolucao = await resEvolucao.json();
-        
-        if (dataEvolucao.success) {
-            elements.chartEvolucao.data.labels = dataEvolucao.data.map(d => d.mes_nome);
-            elements.chartEvolucao.data.datasets[0].data = dataEvolucao.data.map(d => d.receitas);
-            elements.chartEvolucao.data.datasets[1].data = dataEvolucao.data.map(d => d.despesas);
-            elements.chartEvolucao.update();
-        }
-        
-    } catch (error) {
-        console.error('Erro ao atualizar gráficos:', error);
-    }
+    // Dados por categoria
+    const categorias = state.porCategoria.categorias;
+    elements.chartCategorias.data.labels = categorias.map(c => c.categoria_nome);
+    elements.chartCategorias.data.datasets[0].data = categorias.map(c => c.total);
+    elements.chartCategorias.data.datasets[0].backgroundColor = categorias.map(c => c.cor);
+    elements.chartCategorias.update();
+    
+    // Dados de evolução
+    elements.chartEvolucao.data.labels = state.evolucao.map(d => d.mes_nome);
+    elements.chartEvolucao.data.datasets[0].data = state.evolucao.map(d => d.receitas);
+    elements.chartEvolucao.data.datasets[1].data = state.evolucao.map(d => d.despesas);
+    elements.chartEvolucao.update();
 }
 
 // === Modal ===
@@ -0,0 +1,171 @@
+"""Telemetria do pool de conexões, coletada por eventos do SQLAlchemy.
+
+Os números são por processo (cada worker do gunicorn tem o seu pool) e
+ficam em /internal/metricas. Servem para dimensionar o pool a partir de
+dados (espera no checkout, overflow) e para achar sessões vazadas
+(conexões emprestadas há muito tempo).
+"""
+import bisect
+import threading
+import time
+from functools import wraps
+from sqlalchemy import event
+
+# Limites superiores (ms) dos baldes do histograma de espera no checkout
+BALDES_ESPERA_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+class Histograma:
+    """Contagem por balde com limite superior; o último balde (ate=None) não tem limite"""
+    
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+    
+    def registrar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.soma += valor
+        self.maximo = max(self.maximo, valor)
+    
+    def to_dict(self):
+        limites = self.limites + [None]
+        return {
+            'baldes': [{'ate': limite, 'quantidade': n} for limite, n in zip(limites, self.contagens)],
+            'total': self.total,
+            'media': round(self.soma / self.total, 3) if self.total else 0,
+            'maximo': round(self.maximo, 3),
+        }
+
+
+class TelemetriaPool:
+    """Extensão que escuta os eventos do pool do engine principal"""
+    
+    def __init__(self):
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.conexoes_criadas = 0
+        self.conexoes_fechadas = 0
+        self.invalidacoes = 0
+        self.falhas_pre_ping = 0
+        self.espera_checkout_ms = Histograma(BALDES_ESPERA_MS)
+        # Conexões vivas: id do registro -> (criada_em, emprestada_em ou None)
+        self._conexoes = {}
+    
+    def init_app(self, app):
+        app.extensions['telemetria_pool'] = self
+        if not app.config.get('TELEMETRIA_POOL', True):
+            return
+        
+        from app import db
+        with app.app_context():
+            self.instrumentar(db.engine)
+    
+    def instrumentar(self, engine):
+        pool = engine.pool
+        if self.pool is pool:
+            return
+        self.pool = pool
+        
+        event.listen(pool, 'connect', self._ao_conectar)
+        event.listen(pool, 'checkout', self._ao_emprestar)
+        event.listen(pool, 'checkin', self._ao_devolver)
+        event.listen(pool, 'close', self._ao_fechar)
+        event.listen(pool, 'detach', self._ao_fechar)
+        event.listen(pool, 'invalidate', self._ao_invalidar)
+        event.listen(engine, 'handle_error', self._ao_erro)
+        
+        # Não há evento antes da espera por uma conexão livre, então o tempo
+        # de checkout é medido em volta do _do_get do próprio pool. É um método
+        # privado, presente nos pools do SQLAlchemy 2.0 e 2.1 (a faixa fixada
+        # em requirements.txt); ao atualizar o SQLAlchemy, confira se ele
+        # continua existindo. Sem ele, a espera apenas deixa de ser medida.
+        do_get = getattr(pool, '_do_get', None)
+        if not callable(do_get):
+            return
+        
+        @wraps(do_get)
+        def _do_get_medido():
+            inicio = time.perf_counter()
+            try:
+                return do_get()
+            finally:
+                espera = (time.perf_counter() - inicio) * 1000
+                with self._lock:
+                    self.espera_checkout_ms.registrar(espera)
+        
+        pool._do_get = _do_get_medido
+    
+    def _ao_conectar(self, dbapi_connection, registro):
+        with self._lock:
+            self.conexoes_criadas += 1
+            self._conexoes[id(registro)] = (time.monotonic(), None)
+    
+    def _ao_emprestar(self, dbapi_connection, registro, proxy):
+        agora = time.monotonic()
+        with self._lock:
+            self.checkouts += 1
+            criada_em, _ = self._conexoes.get(id(registro), (agora, None))
+            self._conexoes[id(registro)] = (criada_em, agora)
+    
+    def _ao_devolver(self, dbapi_connection, registro):
+        with self._lock:
+            if id(registro) in self._conexoes:
+                criada_em, _ = self._conexoes[id(registro)]
+                self._conexoes[id(registro)] = (criada_em, None)
+    
+    def _ao_fechar(self, dbapi_connection, registro):
+        with self._lock:
+            self.conexoes_fechadas += 1
+            self._conexoes.pop(id(registro), None)
+    
+    def _ao_invalidar(self, dbapi_connection, registro, exception):
+        with self._lock:
+            self.invalidacoes += 1
+    
+    def _ao_erro(self, contexto):
+        if getattr(contexto, 'is_pre_ping', False):
+            with self._lock:
+                self.falhas_pre_ping += 1
+    
+    def estatisticas(self):
+        """Estado atual do pool e contadores acumulados desde o início do processo"""
+        if self.pool is None:
+            return {'ativo': False}
+        
+        agora = time.monotonic()
+        with self._lock:
+            idades = [agora - criada_em for criada_em, _ in self._conexoes.values()]
+            emprestimos = [agora - desde for _, desde in self._conexoes.values() if desde is not None]
+            dados = {
+                'ativo': True,
+                'checkouts': self.checkouts,
+                'conexoes_criadas': self.conexoes_criadas,
+                'conexoes_fechadas': self.conexoes_fechadas,
+                'invalidacoes': self.invalidacoes,
+                'falhas_pre_ping': self.falhas_pre_ping,
+                'espera_checkout_ms': self.espera_checkout_ms.to_dict(),
+                'idade_conexoes_s': {
+                    'quantidade': len(idades),
+                    'media': round(sum(idades) / len(idades), 1) if idades else 0,
+                    'maxima': round(max(idades), 1) if idades else 0,
+                },
+                'maior_emprestimo_atual_s': round(max(emprestimos), 3) if emprestimos else 0,
+            }
+        
+        # Estado instantâneo do QueuePool (outros tipos de pool não expõem todos)
+        for nome in ('size', 'checkedout', 'overflow', 'checkedin', 'timeout'):
+            metodo = getattr(self.pool, nome, None)
+            if metodo is not None:
+                dados[nome] = metodo()
+        if 'overflow' in dados:
+            # O QueuePool conta o overflow a partir de -pool_size
+            dados['overflow'] = max(0, dados['overflow'])
+        return dados
+
+
+telemetria_pool = TelemetriaPool()
@@ -0,0 +1,110 @@
+from datetime import datetime
+
+
+def validar_gasto(data):
+    """Validações básicas de um gasto; retorna a mensagem de erro ou None"""
+    if not data.get('descricao'):
+        return 'Descrição é obrigatória'
+    if not data.get('valor'):
+        return 'Valor é obrigatório'
+    return None
+
+
+def validar_orcamento(data, campos=('categoria_id', 'mes', 'ano', 'valor_limite')):
+    """Validações de um orçamento mensal (apenas dos campos informados em
+    campos); retorna a mensagem de erro ou None"""
+    if 'categoria_id' in campos and not data.get('categoria_id'):
+        return 'Categoria é obrigatória'
+    if 'mes' in campos and data.get('mes') not in range(1, 13):
+        return 'Mês deve estar entre 1 e 12'
+    if 'ano' in campos and not isinstance(data.get('ano'), int):
+        return 'Ano é obrigatório'
+    if 'valor_limite' in campos:
+        try:
+            if float(data.get('valor_limite')) <= 0:
+                return 'Valor limite deve ser maior que zero'
+        except (TypeError, ValueError):
+            return 'Valor limite é obrigatório'
+    return None
+
+
+# Operações em lote sobre gastos
+FILTROS_LOTE = ('categoria_id', 'tipo', 'data_inicio', 'data_fim', 'mes', 'ano')
+CAMPOS_LOTE = ('descricao', 'valor', 'data', 'categoria_id', 'tipo', 'forma_pagamento', 'observacao', 'recorrente')
+TIPOS_LOTE = ('despesa', 'receita')
+LIMITE_IDS_LOTE = 10000
+
+
+def _data_valida(texto):
+    try:
+        datetime.strptime(texto, '%Y-%m-%d')
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _inteiro(valor):
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def validar_lote(data, com_alteracoes=False):
+    """Validações de uma operação em lote sobre gastos: ids ou filtros (os da
+    listagem) e, com com_alteracoes, os campos alterados; retorna a mensagem
+    de erro ou None"""
+    ids = data.get('ids')
+    filtros = data.get('filtros')
+    if (ids is None) == (filtros is None):
+        return 'Informe ids ou filtros (apenas um dos dois)'
+    
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or not all(_inteiro(i) for i in ids):
+            return 'ids deve ser uma lista não vazia de inteiros'
+        if len(ids) > LIMITE_IDS_LOTE:
+            return f'Informe no máximo {LIMITE_IDS_LOTE} ids'
+    else:
+        # Filtros desconhecidos ou inválidos seriam ignorados pela listagem e
+        # ampliariam a operação; aqui são recusados
+        if not isinstance(filtros, dict) or not filtros:
+            return 'filtros deve ser um objeto com ao menos um filtro'
+        desconhecidos = sorted(set(filtros) - set(FILTROS_LOTE))
+        if desconhecidos:
+            return f"Filtros não suportados: {', '.join(desconhecidos)}"
+        if ('mes' in filtros) != ('ano' in filtros):
+            return 'Informe mes e ano juntos'
+        for campo in ('categoria_id', 'mes', 'ano'):
+            if campo in filtros and not _inteiro(filtros[campo]):
+                return f'{campo} deve ser um inteiro'
+            # Zero seria descartado pela listagem (e o filtro, ignorado)
+            if campo in filtros and filtros[campo] < 1:
+                return f'{campo} deve ser maior que zero'
+        if 'mes' in filtros and filtros['mes'] not in range(1, 13):
+            return 'Mês deve estar entre 1 e 12'
+        if 'tipo' in filtros and not filtros['tipo']:
+            return 'tipo não pode ser vazio'
+        for campo in ('data_inicio', 'data_fim'):
+            if campo in filtros and not _data_valida(filtros[campo]):
+                return f'{campo} deve estar no formato AAAA-MM-DD'
+    
+    if com_alteracoes:
+        alteracoes = data.get('alteracoes')
+        if not isinstance(alteracoes, dict) or not alteracoes:
+            return 'Informe os campos alterados em alteracoes'
+        desconhecidos = sorted(set(alteracoes) - set(CAMPOS_LOTE))
+        if desconhecidos:
+            return f"Campos não alteráveis: {', '.join(desconhecidos)}"
+        if 'descricao' in alteracoes and not alteracoes['descricao']:
+            return 'Descrição é obrigatória'
+        if 'valor' in alteracoes:
+            if not alteracoes['valor']:
+                return 'Valor é obrigatório'
+            try:
+                float(alteracoes['valor'])
+            except (TypeError, ValueError):
+                return 'Valor deve ser numérico'
+        if 'data' in alteracoes and not _data_valida(alteracoes['data']):
+            return 'data deve estar no formato AAAA-MM-DD'
+        if 'tipo' in alteracoes and alteracoes['tipo'] not in TIPOS_LOTE:
+            return f"tipo deve ser {' ou '.join(TIPOS_LOTE)}"
+        if 'recorrente' in alteracoes and not isinstance(alteracoes['recorrente'], bool):
+            return 'recorrente deve ser true ou false'
+    return None
@@ -0,0 +1,101 @@
+"""Versões dos dados por escopo, usadas para invalidar caches.
+
+Cada escrita incrementa, na mesma transação, a versão dos escopos afetados:
+um por mês de gastos ('gastos:AAAA-MM'), um para as categorias e um por mês
+de orçamentos ('orcamentos:AAAA-MM'). Como as versões ficam no banco, todas
+as instâncias da aplicação as enxergam.
+
+As versões gerais de gastos e de orçamentos não são gravadas: são a soma das
+versões dos meses, calculada na leitura. Uma versão gravada única seria
+atualizada por toda escrita e travaria a mesma linha até o commit,
+serializando as escritas concorrentes (e, por toda a sua duração, as
+importações e alterações em lote); assim, só as escritas no mesmo mês
+disputam uma linha. Como toda escrita incrementa algum mês, a soma cresce a
+cada escrita. A linha geral gravada pelas versões anteriores entra na soma,
+de modo que a versão geral nunca volta a um valor já usado em um ETag.
+"""
+from flask import has_request_context, request
+from sqlalchemy import func, literal, or_, select, union_all
+from app import db
+from app.models import VersaoDados
+from app.sql import inserir_ou_somar
+
+CATEGORIAS = 'categorias'
+GASTOS = 'gastos'
+ORCAMENTOS = 'orcamentos'
+
+# Versões gerais, derivadas das versões dos meses com esses prefixos
+DERIVADAS = {GASTOS: 'gastos:', ORCAMENTOS: 'orcamentos:'}
+
+
+def chave_mes(ano, mes):
+    """Escopo de versão dos gastos de um mês"""
+    return f'gastos:{ano:04d}-{mes:02d}'
+
+
+def chaves_gasto(gasto):
+    """Escopos afetados por uma escrita no gasto (no estado atual dele)"""
+    return {chave_mes(gasto.data.year, gasto.data.month)}
+
+
+def chave_orcamento(ano, mes):
+    """Escopo de versão dos orçamentos de um mês"""
+    return f'orcamentos:{ano:04d}-{mes:02d}'
+
+
+def chaves_orcamento(orcamento):
+    """Escopos afetados por uma escrita no orçamento (no estado atual dele)"""
+    return {chave_orcamento(orcamento.ano, orcamento.mes)}
+
+
+def incrementar(*chaves):
+    """Incrementa a versão de cada escopo na transação corrente; as versões
+    gerais (DERIVADAS) acompanham as dos meses e não são incrementadas"""
+    for chave in sorted(set(chaves) - set(DERIVADAS)):
+        inserir_ou_somar(VersaoDados.__table__, {'chave': chave, 'versao': 1}, ('chave',), ('versao',))
+
+
+def consulta(chaves):
+    """Query das versões dos escopos: as gravadas e, para as gerais, a soma
+    das versões dos meses"""
+    gravadas = [chave for chave in chaves if chave not in DERIVADAS]
+    consultas = [select(VersaoDados.chave, VersaoDados.versao).filter(VersaoDados.chave.in_(gravadas))]
+    for chave in sorted(set(chaves) & set(DERIVADAS)):
+        consultas.append(
+            select(literal(chave).label('chave'), func.coalesce(func.sum(VersaoDados.versao), 0))
+            .filter(or_(VersaoDados.chave == chave, VersaoDados.chave.like(DERIVADAS[chave] + '%')))
+        )
+    return union_all(*consultas) if len(consultas) > 1 else consultas[0]
+
+
+def completar(chaves, linhas):
+    """Versões de todos os escopos a partir do resultado de consulta() (0 se inexistente)"""
+    versoes = dict(linhas)
+    return {chave: versoes.get(chave, 0) for chave in chaves}
+
+
+def lida(chave):
+    """Versão do escopo já lida por obter() nesta requisição, ou None"""
+    if has_request_context():
+        for versoes in getattr(request, 'versoes_lidas', {}).values():
+            if chave in versoes:
+                return versoes[chave]
+    return None
+
+
+def obter(chaves):
+    """Retorna as versões atuais dos escopos em uma única query (0 se inexistente).
+    
+    Dentro de uma requisição o resultado é reaproveitado, de modo que ETag e
+    cache consultam as versões uma única vez.
+    """
+    chaves = tuple(sorted(set(chaves)))
+    lidas = {}
+    if has_request_context():
+        if not hasattr(request, 'versoes_lidas'):
+            request.versoes_lidas = {}
+        lidas = request.versoes_lidas
+    
+    if chaves not in lidas:
+        lidas[chaves] = completar(chaves, db.session.execute(consulta(chaves)).all())
+    return lidas[chaves]
@@ -0,0 +1,8 @@
+"""Ponto de entrada ASGI (assíncrono), opcional: uvicorn asgi:app
+
+Requer as dependências de requirements-asgi.txt; ver app/assincrono.py.
+"""
+import os
+from app.assincrono import create_asgi_app
+
+app = create_asgi_app(os.getenv('FLASK_ENV', 'production'))
@@ -0,0 +1,103 @@
+"""Mede o tempo de arranque do servidor (cold start).
+
+Sobe o servidor várias vezes e mede, a partir do início do processo:
+  porta   - primeira conexão TCP aceita
+  health  - primeiro byte de GET /health (liveness)
+  ready   - primeiro 200 de GET /ready (pool de conexões aquecido)
+  api     - primeiro 200 de GET /api/relatorios/dashboard
+
+Uso:
+  DATABASE_URL=... python benchmarks/arranque.py [--servidor gunicorn|dev] [--repeticoes 5]
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMANDOS = {
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+    'dev': [sys.executable, 'run.py'],
+}
+
+
+def _status(porta, caminho):
+    """Status HTTP de um GET, ou None se o servidor ainda não responde"""
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=5)
+    try:
+        conexao.request('GET', caminho)
+        resposta = conexao.getresponse()
+        resposta.read()
+        return resposta.status
+    except OSError:
+        return None
+    finally:
+        conexao.close()
+
+
+def _porta_aberta(porta):
+    try:
+        with socket.create_connection(('127.0.0.1', porta), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def medir(servidor, porta, limite=60):
+    """Sobe o servidor uma vez e retorna os marcos em milissegundos"""
+    env = dict(os.environ, PORT=str(porta))
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(COMANDOS[servidor], cwd=RAIZ, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    marcos = {}
+    etapas = [
+        ('porta', lambda: _porta_aberta(porta)),
+        ('health', lambda: _status(porta, '/health') is not None),
+        ('ready', lambda: _status(porta, '/ready') == 200),
+        ('api', lambda: _status(porta, '/api/relatorios/dashboard') == 200),
+    ]
+    try:
+        for nome, concluida in etapas:
+            while not concluida():
+                if processo.poll() is not None:
+                    raise RuntimeError(f'servidor encerrou com código {processo.returncode}')
+                if time.perf_counter() - inicio > limite:
+                    raise RuntimeError(f'tempo esgotado aguardando {nome}')
+                time.sleep(0.005)
+            marcos[nome] = (time.perf_counter() - inicio) * 1000
+    finally:
+        processo.terminate()
+        processo.wait()
+    return marcos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servidor', choices=sorted(COMANDOS), default='gunicorn')
+    parser.add_argument('--porta', type=int, default=5099)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--meta-ms', type=float, default=1500,
+                        help='meta de tempo até o primeiro byte de /health (mediana)')
+    args = parser.parse_args()
+
+    execucoes = [medir(args.servidor, args.porta) for _ in range(args.repeticoes)]
+
+    print(f'{args.servidor}: {args.repeticoes} arranques')
+    for nome in ('porta', 'health', 'ready', 'api'):
+        valores = [e[nome] for e in execucoes]
+        print(f'  {nome:<7} mediana {statistics.median(valores):7.0f} ms   '
+              f'min {min(valores):7.0f} ms   max {max(valores):7.0f} ms')
+
+    ttfb = statistics.median(e['health'] for e in execucoes)
+    dentro = ttfb <= args.meta_ms
+    print(f'  meta /health <= {args.meta_ms:.0f} ms: {"OK" if dentro else "FALHOU"}')
+    return 0 if dentro else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
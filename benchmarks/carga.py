@@ -0,0 +1,325 @@
+"""Teste de carga que reproduz as sessões do frontend (app.js).
+
+Cada usuário virtual repete o que o navegador faz:
+  abertura      GET /, GET /api/categorias, GET /api/relatorios/dashboard
+  ações         criar, editar ou excluir um gasto (escritas) seguidos de um
+                novo GET do dashboard; trocar o mês do filtro (dashboard de
+                outro mês); "Carregar mais" (página seguinte por cursor);
+                recarregar a página (nova abertura)
+Como o navegador, cada usuário guarda os ETags recebidos e revalida com
+If-None-Match (respostas 304). Os gastos criados são excluídos ao final.
+
+Informa vazão, latência p50/p95/p99 por endpoint e taxa de erro. Com
+--rampa, repete o teste em concorrências crescentes e aponta a primeira em
+que o p95 passa de --slo-ms ou os erros passam de 1%.
+
+Uso (com o servidor rodando):
+  python benchmarks/carga.py --url http://localhost:5000 --usuarios 8 --duracao 30
+  python benchmarks/carga.py --rampa 1,2,4,8,16,32 --escritas 0.2 --duracao 20
+"""
+import argparse
+import http.client
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from urllib.parse import urlsplit
+
+# Proporção de cada ação de leitura e de escrita dentro do seu grupo
+LEITURAS = [('trocar_mes', 50), ('carregar_mais', 30), ('recarregar', 20)]
+ESCRITAS = [('criar', 60), ('editar', 25), ('excluir', 15)]
+FORMAS_PAGAMENTO = ['Dinheiro', 'Cartão de Crédito', 'Cartão de Débito', 'PIX', 'Transferência', 'Boleto']
+
+_IDS = re.compile(r'/\d+(?=/|$)')
+
+
+def _endpoint(metodo, caminho):
+    """Agrupa caminhos pelo endpoint: /api/gastos/123?x=1 -> GET /api/gastos/<id>"""
+    return f'{metodo} {_IDS.sub("/<id>", caminho.split("?", 1)[0])}'
+
+
+class Medicoes:
+    """Latências e erros por endpoint, compartilhados entre os usuários"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.status_erros = defaultdict(int)
+        self.nao_modificados = defaultdict(int)
+        self.sessoes = 0
+
+    def registrar(self, endpoint, segundos, status):
+        with self.lock:
+            self.latencias[endpoint].append(segundos * 1000)
+            if status is None or status >= 400:
+                self.erros[endpoint] += 1
+                self.status_erros[str(status or 'conexão')] += 1
+            elif status == 304:
+                self.nao_modificados[endpoint] += 1
+
+
+class Usuario:
+    """Usuário virtual com conexão keep-alive e cache de ETags próprios"""
+
+    def __init__(self, alvo, medicoes, args, rng):
+        self.alvo = alvo
+        self.medicoes = medicoes
+        self.args = args
+        self.rng = rng
+        self.conexao = None
+        self.etags = {}
+        self.respostas = {}
+        self.criados = []
+        self.mes, self.ano = args.mes, args.ano
+        self.cursor = None
+        self.categorias = []
+
+    def _conectar(self):
+        classe = http.client.HTTPSConnection if self.alvo.scheme == 'https' else http.client.HTTPConnection
+        self.conexao = classe(self.alvo.hostname, self.alvo.port, timeout=self.args.timeout)
+
+    def requisitar(self, metodo, caminho, corpo=None):
+        """Executa a requisição, registrando a latência; retorna (status, json ou None)"""
+        cabecalhos = {}
+        if metodo == 'GET' and caminho in self.etags:
+            cabecalhos['If-None-Match'] = self.etags[caminho]
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode()
+            cabecalhos['Content-Type'] = 'application/json'
+
+        endpoint = _endpoint(metodo, caminho)
+        inicio = time.perf_counter()
+        status, conteudo = None, None
+        # Como o navegador, repete uma vez em conexão nova quando a conexão
+        # keep-alive foi fechada pelo servidor (ex.: worker reciclado)
+        for tentativa in range(2):
+            reaproveitada = self.conexao is not None
+            try:
+                if self.conexao is None:
+                    self._conectar()
+                self.conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+                resposta = self.conexao.getresponse()
+                bruto = resposta.read()
+                status = resposta.status
+                break
+            except (OSError, http.client.HTTPException) as erro:
+                if self.conexao is not None:
+                    self.conexao.close()
+                self.conexao = None
+                fechada = isinstance(erro, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))
+                if not (reaproveitada and fechada):
+                    break
+        self.medicoes.registrar(endpoint, time.perf_counter() - inicio, status)
+
+        if status == 304:
+            return status, self.respostas.get(caminho)
+        if status is not None and resposta.getheader('Content-Type', '').startswith('application/json'):
+            conteudo = json.loads(bruto)
+            if metodo == 'GET' and resposta.getheader('ETag'):
+                self.etags[caminho] = resposta.getheader('ETag')
+                self.respostas[caminho] = conteudo
+        return status, conteudo
+
+    # --- Fluxos do app.js ---
+
+    def carregar_dados(self):
+        _, conteudo = self.requisitar(
+            'GET', f'/api/relatorios/dashboard?mes={self.mes}&ano={self.ano}&meses=6')
+        if conteudo and conteudo.get('success'):
+            self.cursor = conteudo['data']['gastos']['next_cursor']
+
+    def abrir(self):
+        """inicializarApp: página, categorias e dashboard"""
+        if self.args.pagina:
+            self.requisitar('GET', '/')
+        _, conteudo = self.requisitar('GET', '/api/categorias')
+        if conteudo and conteudo.get('success'):
+            self.categorias = [c['id'] for c in conteudo['data']]
+        self.carregar_dados()
+
+    def trocar_mes(self):
+        mes_base = self.args.mes - self.rng.randint(0, 5)
+        self.ano = self.args.ano + (mes_base - 1) // 12
+        self.mes = (mes_base - 1) % 12 + 1
+        self.carregar_dados()
+
+    def carregar_mais(self):
+        if not self.cursor:
+            return self.carregar_dados()
+        _, conteudo = self.requisitar(
+            'GET', f'/api/gastos?mes={self.mes}&ano={self.ano}&limit=50&cursor={self.cursor}')
+        if conteudo and conteudo.get('success'):
+            self.cursor = conteudo.get('next_cursor')
+
+    def recarregar(self):
+        self.abrir()
+
+    def _formulario(self):
+        return {
+            'descricao': f'carga {self.rng.randint(1, 10 ** 6)}',
+            'valor': round(self.rng.uniform(5, 500), 2),
+            'data': f'{self.ano}-{self.mes:02d}-{self.rng.randint(1, 28):02d}',
+            'categoria_id': self.rng.choice(self.categorias) if self.categorias else None,
+            'tipo': 'despesa' if self.rng.random() < 0.9 else 'receita',
+            'forma_pagamento': self.rng.choice(FORMAS_PAGAMENTO),
+        }
+
+    def criar(self):
+        status, conteudo = self.requisitar('POST', '/api/gastos', self._formulario())
+        if status == 201:
+            self.criados.append(conteudo['data']['id'])
+        self.carregar_dados()
+
+    def editar(self):
+        if not self.criados:
+            return self.criar()
+        self.requisitar('PUT', f'/api/gastos/{self.rng.choice(self.criados)}', self._formulario())
+        self.carregar_dados()
+
+    def excluir(self):
+        if not self.criados:
+            return self.criar()
+        self.requisitar('DELETE', f'/api/gastos/{self.criados.pop()}')
+        self.carregar_dados()
+
+    def executar(self, fim):
+        while time.monotonic() < fim:
+            self.etags.clear()
+            self.respostas.clear()
+            self.mes, self.ano = self.args.mes, self.args.ano
+            self.abrir()
+            with self.medicoes.lock:
+                self.medicoes.sessoes += 1
+
+            for _ in range(self.args.acoes):
+                if time.monotonic() >= fim:
+                    break
+                grupo = ESCRITAS if self.rng.random() < self.args.escritas else LEITURAS
+                acao = self.rng.choices([a for a, _ in grupo], weights=[p for _, p in grupo])[0]
+                getattr(self, acao)()
+                if self.args.pausa:
+                    time.sleep(self.rng.expovariate(1 / self.args.pausa))
+
+    def limpar(self):
+        """Exclui os gastos criados que sobraram"""
+        while self.criados:
+            self.requisitar('DELETE', f'/api/gastos/{self.criados.pop()}')
+
+
+def rodada(args, usuarios):
+    """Executa uma rodada de carga e retorna o resumo"""
+    alvo = urlsplit(args.url)
+    medicoes = Medicoes()
+    participantes = [Usuario(alvo, medicoes, args, random.Random(args.semente + i)) for i in range(usuarios)]
+
+    fim = time.monotonic() + args.duracao
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=u.executar, args=(fim,)) for u in participantes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+
+    # A limpeza não entra nas medições
+    limpeza = Medicoes()
+    for usuario in participantes:
+        usuario.medicoes = limpeza
+        usuario.limpar()
+
+    todas = [v for valores in medicoes.latencias.values() for v in valores]
+    erros = sum(medicoes.erros.values())
+    return {
+        'usuarios': usuarios,
+        'duracao_s': round(decorrido, 1),
+        'requisicoes': len(todas),
+        'sessoes': medicoes.sessoes,
+        'req_s': round(len(todas) / decorrido, 1),
+        'taxa_erro': round(erros / len(todas), 4) if todas else 0,
+        'erros_por_status': dict(medicoes.status_erros),
+        'p50_ms': round(_percentil(todas, 50), 1),
+        'p95_ms': round(_percentil(todas, 95), 1),
+        'p99_ms': round(_percentil(todas, 99), 1),
+        'endpoints': {
+            endpoint: {
+                'requisicoes': len(valores),
+                'p50_ms': round(_percentil(valores, 50), 1),
+                'p95_ms': round(_percentil(valores, 95), 1),
+                'p99_ms': round(_percentil(valores, 99), 1),
+                'max_ms': round(max(valores), 1),
+                'erros': medicoes.erros[endpoint],
+                'nao_modificados': medicoes.nao_modificados[endpoint],
+            }
+            for endpoint, valores in sorted(medicoes.latencias.items())
+        },
+    }
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def imprimir(resumo):
+    print(f'\n{resumo["usuarios"]} usuários, {resumo["duracao_s"]}s: {resumo["req_s"]} req/s, '
+          f'{resumo["sessoes"]} sessões, p50 {resumo["p50_ms"]} ms, p95 {resumo["p95_ms"]} ms, '
+          f'p99 {resumo["p99_ms"]} ms, erros {resumo["taxa_erro"]:.2%} {resumo["erros_por_status"] or ""}')
+    print(f'  {"endpoint":<36}{"req":>7}{"p50":>9}{"p95":>9}{"p99":>9}{"max":>9}{"304":>7}{"erros":>7}')
+    for endpoint, dados in resumo['endpoints'].items():
+        print(f'  {endpoint:<36}{dados["requisicoes"]:>7}{dados["p50_ms"]:>9}{dados["p95_ms"]:>9}'
+              f'{dados["p99_ms"]:>9}{dados["max_ms"]:>9}{dados["nao_modificados"]:>7}{dados["erros"]:>7}')
+
+
+def main():
+    hoje = date.today()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--usuarios', type=int, default=8, help='usuários simultâneos (padrão 8)')
+    parser.add_argument('--rampa', help='lista de concorrências, ex.: 1,2,4,8,16,32')
+    parser.add_argument('--duracao', type=float, default=30, help='segundos por rodada (padrão 30)')
+    parser.add_argument('--escritas', type=float, default=0.2, help='fração das ações que são escritas (padrão 0.2)')
+    parser.add_argument('--acoes', type=int, default=10, help='ações por sessão antes de recarregar (padrão 10)')
+    parser.add_argument('--pausa', type=float, default=0, help='tempo médio de pensar entre ações, em s (padrão 0)')
+    parser.add_argument('--pagina', action='store_true', help='inclui GET / na abertura')
+    parser.add_argument('--mes', type=int, default=hoje.month)
+    parser.add_argument('--ano', type=int, default=hoje.year)
+    parser.add_argument('--slo-ms', type=float, default=500, help='p95 máximo aceitável na rampa (padrão 500)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--saida', help='salva os resumos em JSON')
+    args = parser.parse_args()
+
+    concorrencias = [int(n) for n in args.rampa.split(',')] if args.rampa else [args.usuarios]
+    resumos = []
+    for usuarios in concorrencias:
+        resumo = rodada(args, usuarios)
+        imprimir(resumo)
+        resumos.append(resumo)
+
+    if len(resumos) > 1:
+        print(f'\n{"usuários":>9}{"req/s":>9}{"p95 ms":>9}{"erros":>9}')
+        limite = None
+        for resumo in resumos:
+            print(f'{resumo["usuarios"]:>9}{resumo["req_s"]:>9}{resumo["p95_ms"]:>9}{resumo["taxa_erro"]:>9.2%}')
+            if limite is None and (resumo['p95_ms'] > args.slo_ms or resumo['taxa_erro'] > 0.01):
+                limite = resumo['usuarios']
+        if limite is None:
+            print(f'Nenhuma concorrência testada ultrapassou p95 {args.slo_ms:g} ms ou 1% de erros')
+        else:
+            print(f'Ponto de saturação: {limite} usuários (p95 > {args.slo_ms:g} ms ou erros > 1%)')
+
+    if args.saida:
+        with open(args.saida, 'w') as arquivo:
+            json.dump(resumos, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
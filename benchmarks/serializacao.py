@@ -0,0 +1,102 @@
+"""Micro-benchmark da serialização das listagens de gastos.
+
+Compara, para os gastos de um mês, o caminho anterior (instâncias do ORM com
+selectinload, to_dict() e json da biblioteca padrão) com a projeção em tuplas
+(app.serializacao) e o codificador orjson, separando o tempo de consulta e
+montagem do tempo de codificação. Antes de medir, confere que todos os
+caminhos produzem exatamente os mesmos bytes.
+
+Uso:
+  DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/serializacao.py --mes 10 --ano 2026
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from app import create_app, db, serializacao  # noqa: E402
+from app.models import Gasto, serializar_com_categorias  # noqa: E402
+from app.periodos import filtro_mes  # noqa: E402
+
+
+def _montar_orm(filtros, sideload):
+    gastos = Gasto.query.options(selectinload(Gasto.categoria)).filter(*filtros).order_by(Gasto.data.desc()).all()
+    return serializar_com_categorias(gastos, sideload)
+
+
+def _montar_projecao(filtros, sideload):
+    linhas = serializacao.projetar_gastos(Gasto.query).filter(*filtros).order_by(Gasto.data.desc()).all()
+    return serializacao.serializar_linhas(linhas, sideload)
+
+
+def _medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+        # Cada repetição começa sem instâncias no identity map
+        db.session.expire_all()
+        db.session.close()
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mes', type=int, help='mês listado (padrão: o mês com mais gastos)')
+    parser.add_argument('--ano', type=int)
+    parser.add_argument('--repeticoes', type=int, default=15)
+    parser.add_argument('--sideload', action='store_true', help='categorias em mapa separado')
+    args = parser.parse_args()
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    if not serializacao.orjson:
+        print('orjson não instalado: o caminho rápido usa o json da biblioteca padrão')
+
+    with app.app_context():
+        if not (args.mes and args.ano):
+            mes = func.extract('month', Gasto.data)
+            ano = func.extract('year', Gasto.data)
+            args.ano, args.mes, _ = db.session.query(ano, mes, func.count()).group_by(ano, mes) \
+                .order_by(func.count().desc()).first()
+            args.ano, args.mes = int(args.ano), int(args.mes)
+        filtros = [filtro_mes(Gasto.data, args.mes, args.ano)]
+
+        padrao = DefaultJSONProvider(app)
+        rapido = serializacao.ProvedorJSON(app)
+
+        t_orm, dados_orm = _medir(lambda: _montar_orm(filtros, args.sideload), args.repeticoes)
+        t_proj, dados_proj = _medir(lambda: _montar_projecao(filtros, args.sideload), args.repeticoes)
+        t_json, saida_padrao = _medir(lambda: padrao.response(dados_orm).get_data(), args.repeticoes)
+        t_rapido, saida_rapida = _medir(
+            lambda: rapido.response(serializacao.Projetado(dados_proj)).get_data(), args.repeticoes
+        )
+
+        if not (saida_padrao == padrao.response(dados_proj).get_data() == saida_rapida):
+            raise SystemExit('❌ As saídas diferem: a serialização rápida não é equivalente')
+
+        linhas = len(dados_orm['data'])
+        print(f'{linhas} gastos em {args.mes:02d}/{args.ano}, {len(saida_padrao) / 1024:.0f} KiB, '
+              f'saídas idênticas ✅\n')
+        print(f"{'caminho':<34} {'ms':>8} {'linhas/s':>12}")
+        for nome, tempo in [
+            ('ORM + to_dict()', t_orm),
+            ('projeção em tuplas', t_proj),
+            ('json (biblioteca padrão)', t_json),
+            ('orjson' if rapido.rapido else 'json (sem orjson)', t_rapido),
+            ('total anterior (ORM + json)', t_orm + t_json),
+            ('total novo (projeção + orjson)', t_proj + t_rapido),
+        ]:
+            print(f'{nome:<34} {tempo * 1000:>8.1f} {linhas / tempo:>12,.0f}')
+        print(f'\nGanho total: {(t_orm + t_json) / (t_proj + t_rapido):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""busca textual
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 20:31:42.905113
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# Índice FTS5 com conteúdo externo (a própria tabela gastos), mantido por triggers
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE gastos_fts USING fts5("
+    "descricao, observacao, content='gastos', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER gastos_fts_ai AFTER INSERT ON gastos BEGIN "
+    "INSERT INTO gastos_fts(rowid, descricao, observacao) VALUES (new.id, new.descricao, new.observacao); "
+    "END",
+    "CREATE TRIGGER gastos_fts_ad AFTER DELETE ON gastos BEGIN "
+    "INSERT INTO gastos_fts(gastos_fts, rowid, descricao, observacao) "
+    "VALUES ('delete', old.id, old.descricao, old.observacao); "
+    "END",
+    "CREATE TRIGGER gastos_fts_au AFTER UPDATE OF descricao, observacao ON gastos BEGIN "
+    "INSERT INTO gastos_fts(gastos_fts, rowid, descricao, observacao) "
+    "VALUES ('delete', old.id, old.descricao, old.observacao); "
+    "INSERT INTO gastos_fts(rowid, descricao, observacao) VALUES (new.id, new.descricao, new.observacao); "
+    "END",
+    # Indexa os gastos já existentes
+    "INSERT INTO gastos_fts(gastos_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'mysql':
+        op.create_index('ix_gastos_texto', 'gastos', ['descricao', 'observacao'], mysql_prefix='FULLTEXT')
+    elif dialeto == 'sqlite':
+        for comando in SQLITE_FTS:
+            op.execute(comando)
+
+
+def downgrade():
+    dialeto = op.get_bind().dialect.name
+    if dialeto == 'mysql':
+        op.drop_index('ix_gastos_texto', table_name='gastos')
+    elif dialeto == 'sqlite':
+        for trigger in ('gastos_fts_ai', 'gastos_fts_ad', 'gastos_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS gastos_fts')
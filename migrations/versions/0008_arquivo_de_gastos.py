@@ -0,0 +1,97 @@
+"""arquivo de gastos
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 21:02:47.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# Triggers que mantêm o índice FTS5 da busca textual (0007); o SQLite os
+# descarta junto com a tabela gastos recriada
+SQLITE_TRIGGERS_FTS = [
+    "CREATE TRIGGER IF NOT EXISTS gastos_fts_ai AFTER INSERT ON gastos BEGIN "
+    "INSERT INTO gastos_fts(rowid, descricao, observacao) VALUES (new.id, new.descricao, new.observacao); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS gastos_fts_ad AFTER DELETE ON gastos BEGIN "
+    "INSERT INTO gastos_fts(gastos_fts, rowid, descricao, observacao) "
+    "VALUES ('delete', old.id, old.descricao, old.observacao); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS gastos_fts_au AFTER UPDATE OF descricao, observacao ON gastos BEGIN "
+    "INSERT INTO gastos_fts(gastos_fts, rowid, descricao, observacao) "
+    "VALUES ('delete', old.id, old.descricao, old.observacao); "
+    "INSERT INTO gastos_fts(rowid, descricao, observacao) VALUES (new.id, new.descricao, new.observacao); "
+    "END",
+]
+
+
+def _recriar_gastos_sqlite(autoincremento):
+    # No SQLite, AUTOINCREMENT exige recriar a tabela; os triggers da busca
+    # textual são descartados junto com ela e precisam ser recriados
+    with op.batch_alter_table('gastos', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincremento}):
+        pass
+    for comando in SQLITE_TRIGGERS_FTS:
+        op.execute(comando)
+
+
+def upgrade():
+    op.create_table('gastos_arquivo',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('descricao', sa.String(length=255), nullable=False),
+    sa.Column('valor', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('data', sa.Date(), nullable=False),
+    sa.Column('categoria_id', sa.Integer(), nullable=True),
+    sa.Column('tipo', sa.String(length=20), nullable=True),
+    sa.Column('forma_pagamento', sa.String(length=50), nullable=True),
+    sa.Column('observacao', sa.Text(), nullable=True),
+    sa.Column('comprovante', sa.String(length=255), nullable=True),
+    sa.Column('recorrente', sa.Boolean(), nullable=True),
+    sa.Column('hash_importacao', sa.String(length=40), nullable=True),
+    sa.Column('recorrencia_origem_id', sa.Integer(), nullable=True),
+    sa.Column('recorrencia_periodo', sa.String(length=7), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['categoria_id'], ['categorias.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('gastos_arquivo', schema=None) as batch_op:
+        batch_op.create_index('ix_gastos_arquivo_categoria_data', ['categoria_id', 'data'], unique=False)
+        batch_op.create_index('ix_gastos_arquivo_data_id', ['data', 'id'], unique=False)
+        batch_op.create_index('ix_gastos_arquivo_hash_importacao', ['hash_importacao'], unique=False)
+        batch_op.create_index('ix_gastos_arquivo_recorrencia', ['recorrencia_origem_id', 'recorrencia_periodo'], unique=False)
+        batch_op.create_index('ix_gastos_arquivo_tipo_data', ['tipo', 'data'], unique=False)
+
+    op.create_table('anos_arquivados',
+    sa.Column('ano', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('arquivado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('ano')
+    )
+
+    # Ids de gastos nunca reaproveitados, pois os arquivados voltam com o mesmo id
+    if op.get_bind().dialect.name == 'sqlite':
+        _recriar_gastos_sqlite(True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        _recriar_gastos_sqlite(False)
+
+    op.drop_table('anos_arquivados')
+    with op.batch_alter_table('gastos_arquivo', schema=None) as batch_op:
+        batch_op.drop_index('ix_gastos_arquivo_tipo_data')
+        batch_op.drop_index('ix_gastos_arquivo_recorrencia')
+        batch_op.drop_index('ix_gastos_arquivo_hash_importacao')
+        batch_op.drop_index('ix_gastos_arquivo_data_id')
+        batch_op.drop_index('ix_gastos_arquivo_categoria_data')
+
+    op.drop_table('gastos_arquivo')
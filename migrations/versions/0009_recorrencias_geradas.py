@@ -0,0 +1,51 @@
+"""recorrencias geradas
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 10:12:41.307215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recorrencias_geradas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('descricao', sa.String(length=255), nullable=False),
+    sa.Column('valor', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('forma_pagamento', sa.String(length=50), nullable=False),
+    sa.Column('periodo', sa.String(length=7), nullable=False),
+    sa.Column('gerado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('descricao', 'valor', 'categoria_id', 'tipo', 'forma_pagamento', 'periodo', name='unique_recorrencia_gerada')
+    )
+
+    # Registra os meses das ocorrências já geradas, inclusive as arquivadas
+    op.execute("""
+        INSERT INTO recorrencias_geradas (descricao, valor, categoria_id, tipo, forma_pagamento, periodo, gerado_em)
+        SELECT descricao, valor, categoria_id, tipo, forma_pagamento, periodo, MIN(created_at)
+        FROM (
+            SELECT descricao, valor, COALESCE(categoria_id, 0) AS categoria_id, COALESCE(tipo, '') AS tipo,
+                   COALESCE(forma_pagamento, '') AS forma_pagamento, recorrencia_periodo AS periodo, created_at
+            FROM gastos WHERE recorrencia_periodo IS NOT NULL
+            UNION ALL
+            SELECT descricao, valor, COALESCE(categoria_id, 0), COALESCE(tipo, ''),
+                   COALESCE(forma_pagamento, ''), recorrencia_periodo, created_at
+            FROM gastos_arquivo WHERE recorrencia_periodo IS NOT NULL
+        ) ocorrencias
+        GROUP BY descricao, valor, categoria_id, tipo, forma_pagamento, periodo
+    """)
+
+
+def downgrade():
+    op.drop_table('recorrencias_geradas')
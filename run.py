@@ -1,43 +1,19 @@
+"""Servidor de desenvolvimento (Werkzeug).
+
+Em produção use o gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+O esquema do banco é criado/atualizado com: flask --app wsgi db upgrade
+"""
 import os
-import time
-from app import create_app, db
-from app.models import Categoria, Gasto, OrcamentoMensal
+from app import create_app
 
 app = create_app(os.getenv('FLASK_ENV', 'development'))
 
 
-def wait_for_db():
-    """Aguarda o banco de dados estar disponível"""
-    max_retries = 30
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            with app.app_context():
-                db.engine.connect()
-                print("✅ Conexão com banco de dados estabelecida!")
-                return True
-        except Exception as e:
-            retry_count += 1
-            print(f"⏳ Aguardando banco de dados... ({retry_count}/{max_retries})")
-            time.sleep(2)
-    
-    print("❌ Não foi possível conectar ao banco de dados")
-    return False
-
-
-def init_db():
-    """Inicializa o banco de dados"""
-    with app.app_context():
-        db.create_all()
-        print("✅ Tabelas criadas com sucesso!")
-
-
 if __name__ == '__main__':
-    print("🚀 Iniciando Sistema de Controle de Gastos...")
+    print("🚀 Iniciando Sistema de Controle de Gastos (desenvolvimento)...")
     
-    if wait_for_db():
-        init_db()
-        port = int(os.getenv('PORT', 5000))
-        print(f"🌐 Servidor rodando na porta {port}")
-        app.run(host='0.0.0.0', port=port, debug=False)
+    # A porta é aberta imediatamente; a conexão com o banco é aquecida em
+    # segundo plano e /ready indica quando ela está disponível
+    port = int(os.getenv('PORT', 5000))
+    print(f"🌐 Servidor rodando na porta {port}")
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
@@ -0,0 +1,61 @@
+"""Testes da manutenção incremental dos agregados mensais"""
+import pytest
+from app import create_app, db, agregados
+from app.models import AgregadoMensal
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        cliente.post('/api/categorias/seed')
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def _criar(cliente, **campos):
+    return cliente.post('/api/gastos', json={'descricao': 'Gasto', **campos}).get_json()['data']
+
+
+def _resumo(cliente, mes, ano=2026):
+    return cliente.get(f'/api/relatorios/resumo-mensal?mes={mes}&ano={ano}').get_json()['data']
+
+
+def test_escritas_mantem_os_agregados(cliente):
+    mercado = _criar(cliente, valor=10.5, data='2026-01-02', categoria_id=1, forma_pagamento='pix')
+    _criar(cliente, valor=20, data='2026-01-03', categoria_id=1)
+    salario = _criar(cliente, valor=100, data='2026-01-05', tipo='receita')
+    assert agregados.verificar() == []
+    assert _resumo(cliente, 1) == {
+        'ano': 2026,
+        'mes': 1,
+        'quantidade_transacoes': 3,
+        'saldo': 69.5,
+        'total_despesas': 30.5,
+        'total_receitas': 100.0
+    }
+    
+    # Alteração que muda valor, mês e categoria move a contribuição
+    cliente.put(f"/api/gastos/{mercado['id']}", json={'valor': 12, 'data': '2026-02-10', 'categoria_id': 2})
+    cliente.delete(f"/api/gastos/{salario['id']}")
+    assert agregados.verificar() == []
+    assert _resumo(cliente, 1)['total_despesas'] == 20.0
+    assert _resumo(cliente, 1)['total_receitas'] == 0
+    assert _resumo(cliente, 2)['total_despesas'] == 12.0
+    
+    categorias = cliente.get('/api/relatorios/por-categoria?mes=2&ano=2026').get_json()['data']['categorias']
+    assert [(c['categoria_id'], c['total'], c['quantidade']) for c in categorias] == [(2, 12.0, 1)]
+
+
+def test_reconstrucao_corrige_divergencias(cliente):
+    _criar(cliente, valor=10, data='2026-03-01', categoria_id=1)
+    AgregadoMensal.query.delete()
+    db.session.commit()
+    assert len(agregados.verificar()) == 1
+    
+    agregados.recalcular()
+    db.session.commit()
+    assert agregados.verificar() == []
@@ -0,0 +1,59 @@
+"""Testes do arquivamento de anos fechados de gastos"""
+import pytest
+from app import create_app, db, agregados, arquivo
+from app.models import Gasto
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        for data in ('2024-03-10', '2024-07-01', '2025-01-15'):
+            cliente.post('/api/gastos', json={'descricao': 'Gasto', 'valor': 10, 'data': data})
+        arquivo.arquivar(2024)
+        db.session.commit()
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def test_leituras_incluem_o_arquivo(cliente):
+    assert Gasto.query.count() == 1
+    assert cliente.get('/api/gastos/anos-arquivados').get_json()['data'] == [2024]
+    
+    datas = [gasto['data'] for gasto in cliente.get('/api/gastos').get_json()['data']]
+    assert datas == ['2025-01-15', '2024-07-01', '2024-03-10']
+    assert cliente.get('/api/gastos/1').status_code == 200
+    assert agregados.verificar() == []
+
+
+@pytest.mark.parametrize('metodo, url, corpo', [
+    ('put', '/api/gastos/1', {'valor': 20}),
+    ('delete', '/api/gastos/1', None),
+    ('delete', '/api/gastos/bulk', {'ids': [1, 3]}),
+    ('delete', '/api/gastos/bulk', {'filtros': {'ano': 2024, 'mes': 3}}),
+    ('patch', '/api/gastos/bulk', {'filtros': {'data_inicio': '2024-06-01'}, 'alteracoes': {'valor': 1}}),
+])
+def test_escritas_em_ano_arquivado(cliente, metodo, url, corpo):
+    resposta = getattr(cliente, metodo)(url, json=corpo)
+    assert resposta.status_code == 409
+    assert 'restaure' in resposta.get_json()['error']
+    
+    # Nada foi alterado, nem fora do arquivo
+    assert db.session.get(Gasto, 3).valor == 10
+    assert len(cliente.get('/api/gastos').get_json()['data']) == 3
+
+
+def test_gasto_inexistente_continua_404(cliente):
+    assert cliente.put('/api/gastos/99', json={'valor': 20}).status_code == 404
+
+
+def test_restaurar_libera_as_escritas(cliente):
+    arquivo.restaurar(2024)
+    db.session.commit()
+    assert Gasto.query.count() == 3
+    assert cliente.put('/api/gastos/1', json={'valor': 20}).status_code == 200
+    assert cliente.get('/api/gastos/anos-arquivados').get_json()['data'] == []
+    assert agregados.verificar() == []
@@ -0,0 +1,40 @@
+"""Testes do nome único das categorias (app/catalogo.py)"""
+import pytest
+from app import create_app, db, versoes
+from app.models import Categoria
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        cliente.post('/api/categorias/seed')
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def test_nome_repetido_sem_diferenciar_maiusculas(cliente):
+    resposta = cliente.post('/api/categorias', json={'nome': 'alimentação'})
+    assert resposta.status_code == 400
+    
+    outra = cliente.post('/api/categorias', json={'nome': 'Viagens'}).get_json()['data']
+    resposta = cliente.put(f"/api/categorias/{outra['id']}", json={'nome': 'ALIMENTAÇÃO'})
+    assert resposta.status_code == 400
+    
+    # Trocar apenas as maiúsculas do próprio nome é permitido
+    resposta = cliente.put(f"/api/categorias/{outra['id']}", json={'nome': 'viagens'})
+    assert resposta.status_code == 200
+
+
+def test_nome_criado_por_outro_processo(cliente):
+    cliente.get('/api/categorias')
+    # Escrita de outro processo: não descarta o catálogo deste
+    db.session.add(Categoria(nome='Pets'))
+    versoes.incrementar(versoes.CATEGORIAS)
+    db.session.commit()
+    
+    resposta = cliente.post('/api/categorias', json={'nome': 'pets'})
+    assert resposta.status_code == 400
@@ -0,0 +1,62 @@
+"""Testes do GET condicional (ETag / 304) das listagens e relatórios"""
+import pytest
+from app import create_app, db
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        cliente.post('/api/categorias/seed')
+        cliente.post('/api/gastos', json={'descricao': 'Mercado', 'valor': 10, 'data': '2026-01-02', 'categoria_id': 1})
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def _revalidar(cliente, url, etag):
+    return cliente.get(url, headers={'If-None-Match': etag}).status_code
+
+
+@pytest.mark.parametrize('url', [
+    '/api/gastos',
+    '/api/gastos?mes=1&ano=2026',
+    '/api/categorias',
+    '/api/orcamentos',
+    '/api/relatorios/resumo-mensal?mes=1&ano=2026',
+])
+def test_revalidacao_sem_mudancas(cliente, url):
+    resposta = cliente.get(url)
+    assert resposta.status_code == 200
+    assert resposta.headers['Cache-Control'] == 'private, no-cache'
+    
+    revalidada = cliente.get(url, headers={'If-None-Match': resposta.headers['ETag']})
+    assert revalidada.status_code == 304
+    assert revalidada.get_data() == b''
+    assert revalidada.headers['ETag'] == resposta.headers['ETag']
+
+
+def test_escritas_mudam_apenas_os_escopos_afetados(cliente):
+    geral = cliente.get('/api/gastos').headers['ETag']
+    janeiro = cliente.get('/api/gastos?mes=1&ano=2026').headers['ETag']
+    categorias = cliente.get('/api/categorias').headers['ETag']
+    
+    # Escrita em outro mês: muda a listagem geral, não a de janeiro
+    fevereiro = cliente.post('/api/gastos', json={'descricao': 'Luz', 'valor': 5, 'data': '2026-02-01'}).get_json()['data']
+    assert _revalidar(cliente, '/api/gastos', geral) == 200
+    assert _revalidar(cliente, '/api/gastos?mes=1&ano=2026', janeiro) == 304
+    assert _revalidar(cliente, '/api/categorias', categorias) == 304
+    
+    # Exclusão também muda o validador
+    geral = cliente.get('/api/gastos').headers['ETag']
+    cliente.delete(f"/api/gastos/{fevereiro['id']}")
+    assert _revalidar(cliente, '/api/gastos', geral) == 200
+    
+    cliente.post('/api/categorias', json={'nome': 'Viagens'})
+    assert _revalidar(cliente, '/api/categorias', categorias) == 200
+
+
+def test_etag_depende_dos_parametros(cliente):
+    assert cliente.get('/api/gastos?tipo=despesa').headers['ETag'] != cliente.get('/api/gastos').headers['ETag']
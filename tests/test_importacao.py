@@ -0,0 +1,72 @@
+"""Testes da importação de gastos (POST /api/gastos/import)"""
+import io
+import pytest
+from app import create_app, db, agregados
+from app.models import Gasto
+
+CSV = '''data;descricao;valor;categoria
+2026-01-05;Padaria;12,50;Alimentação
+2026-01-05;Padaria;12,50;Alimentação
+2026-01-06;Farmácia;1.234,56;
+2026-01-07;Livro;1,234;
+'''
+
+OFX = '''OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260110120000<TRNAMT>-45.90<FITID>A1<MEMO>Mercado
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260111<TRNAMT>3000.00<FITID>A2<NAME>Salário
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+'''
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        cliente.post('/api/categorias/seed')
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def _importar(cliente, conteudo, nome):
+    return cliente.post('/api/gastos/import', data={
+        'arquivo': (io.BytesIO(conteudo.encode()), nome)
+    }, content_type='multipart/form-data')
+
+
+def test_csv_linhas_identicas_e_reimportacao(cliente):
+    dados = _importar(cliente, CSV, 'extrato.csv').get_json()['data']
+    # As duas padarias iguais são gastos distintos; '1,234' é ambíguo
+    assert (dados['importados'], dados['duplicados'], dados['total_erros']) == (3, 0, 1)
+    assert dados['erros'][0]['linha'] == 5
+    assert 'ambíguo' in dados['erros'][0]['erro']
+    assert sorted(str(gasto.valor) for gasto in Gasto.query) == ['12.50', '12.50', '1234.56']
+    
+    dados = _importar(cliente, CSV, 'extrato.csv').get_json()['data']
+    assert (dados['importados'], dados['duplicados']) == (0, 3)
+    assert Gasto.query.count() == 3
+    assert agregados.verificar() == []
+
+
+def test_ofx_pelo_fitid(cliente):
+    dados = _importar(cliente, OFX, 'extrato.ofx').get_json()['data']
+    assert dados['importados'] == 2
+    receita = Gasto.query.filter_by(tipo='receita').one()
+    assert (receita.descricao, receita.data.isoformat(), str(receita.valor)) == ('Salário', '2026-01-11', '3000.00')
+    
+    dados = _importar(cliente, OFX, 'extrato.ofx').get_json()['data']
+    assert (dados['importados'], dados['duplicados']) == (0, 2)
+
+
+def test_arquivo_invalido(cliente):
+    assert _importar(cliente, CSV, 'extrato.xls').status_code == 400
+    resposta = cliente.post('/api/gastos/import', data={
+        'arquivo': (io.BytesIO(b'data,descricao,valor\n\xff\xfe'), 'x.csv')
+    }, content_type='multipart/form-data')
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'].startswith('Arquivo inválido')
@@ -0,0 +1,90 @@
+"""Testes da alteração e exclusão de gastos em lote (/api/gastos/bulk)"""
+import pytest
+from app import create_app, db
+from app.models import AgregadoMensal, Gasto
+from app.routes.gastos import _condicoes_lote
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        cliente.post('/api/categorias/seed')
+        for dia, categoria_id, valor in ((5, 1, 10), (6, 1, 20), (7, 2, 30)):
+            cliente.post('/api/gastos', json={
+                'descricao': f'Gasto {dia}',
+                'valor': valor,
+                'data': f'2026-01-{dia:02d}',
+                'categoria_id': categoria_id
+            })
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def _agregados_conferem():
+    totais = {}
+    for gasto in Gasto.query.all():
+        chave = (gasto.data.year, gasto.data.month, gasto.tipo, gasto.categoria_id or 0)
+        total, quantidade = totais.get(chave, (0, 0))
+        totais[chave] = (total + gasto.valor, quantidade + 1)
+    agregados = {
+        (a.ano, a.mes, a.tipo, a.categoria_id): (a.total, a.quantidade)
+        for a in AgregadoMensal.query.all() if a.quantidade
+    }
+    return totais == agregados
+
+
+@pytest.mark.parametrize('filtros', [
+    {'categoria_id': 0},
+    {'mes': 1, 'ano': 0},
+    {'categoria_id': -1},
+    {'desconhecido': 1},
+    {},
+])
+def test_filtros_invalidos_nao_excluem_nada(cliente, filtros):
+    resposta = cliente.delete('/api/gastos/bulk', json={'filtros': filtros})
+    assert resposta.status_code == 400
+    assert Gasto.query.count() == 3
+
+
+def test_filtros_que_nao_restringem_sao_recusados(cliente):
+    # Mesmo que um filtro passe pela validação e seja descartado pela
+    # listagem, ele não vira um UPDATE/DELETE sem WHERE
+    with pytest.raises(ValueError):
+        _condicoes_lote({'filtros': {'tipo': ''}})
+
+
+def test_alteracoes_invalidas(cliente):
+    resposta = cliente.patch('/api/gastos/bulk', json={'ids': [1], 'alteracoes': {'categoria_id': 999}})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'Categoria não encontrada'
+    
+    resposta = cliente.patch('/api/gastos/bulk', json={'ids': [1], 'alteracoes': {'tipo': 'outro'}})
+    assert resposta.status_code == 400
+    assert db.session.get(Gasto, 1).tipo == 'despesa'
+    
+    resposta = cliente.patch('/api/gastos/bulk', json={'ids': [1], 'alteracoes': {'recorrente': 'sim'}})
+    assert resposta.status_code == 400
+    assert db.session.get(Gasto, 1).recorrente is False
+
+
+def test_atualizar_por_filtros(cliente):
+    resposta = cliente.patch('/api/gastos/bulk', json={
+        'filtros': {'categoria_id': 1, 'mes': 1, 'ano': 2026},
+        'alteracoes': {'categoria_id': 3, 'data': '2026-02-01'}
+    })
+    dados = resposta.get_json()['data']
+    assert dados['afetados'] == 2
+    assert dados['meses'] == ['2026-01', '2026-02']
+    assert Gasto.query.filter_by(categoria_id=3).count() == 2
+    assert _agregados_conferem()
+
+
+def test_excluir_por_ids(cliente):
+    resposta = cliente.delete('/api/gastos/bulk', json={'ids': [1, 3, 99]})
+    assert resposta.get_json()['data']['afetados'] == 2
+    assert [gasto.id for gasto in Gasto.query.all()] == [2]
+    assert _agregados_conferem()
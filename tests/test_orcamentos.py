@@ -0,0 +1,40 @@
+"""Testes da definição em lote dos orçamentos de um mês"""
+import pytest
+from app import create_app, db
+from app.models import OrcamentoMensal
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        cliente.post('/api/categorias/seed')
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.mark.parametrize('corpo', [
+    [1],
+    {'orcamentos': [1]},
+    {'orcamentos': [{'categoria_id': 1, 'valor_limite': 100}, 'texto']},
+    {'orcamentos': [None]},
+])
+def test_itens_que_nao_sao_objetos(cliente, corpo):
+    resposta = cliente.put('/api/orcamentos/2026/1', json=corpo)
+    assert resposta.status_code == 400
+    assert OrcamentoMensal.query.count() == 0
+
+
+def test_define_e_atualiza_o_mes(cliente):
+    resposta = cliente.put('/api/orcamentos/2026/1', json={'orcamentos': [
+        {'categoria_id': 1, 'valor_limite': 100},
+        {'categoria_id': 2, 'valor_limite': 50},
+    ]})
+    assert resposta.status_code == 200
+    
+    cliente.put('/api/orcamentos/2026/1', json={'orcamentos': [{'categoria_id': 1, 'valor_limite': 80}]})
+    limites = {o.categoria_id: o.valor_limite for o in OrcamentoMensal.query.filter_by(ano=2026, mes=1)}
+    assert limites == {1: 80, 2: 50}
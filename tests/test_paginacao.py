@@ -0,0 +1,54 @@
+"""Testes da paginação por cursor de GET /api/gastos"""
+import pytest
+from app import create_app, db
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        # Vários gastos na mesma data: o id desempata a ordem
+        for indice, dia in enumerate((3, 3, 3, 2, 2, 1, 5)):
+            cliente.post('/api/gastos', json={
+                'descricao': f'Gasto {indice}',
+                'valor': 10,
+                'data': f'2026-01-{dia:02d}'
+            })
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def _paginas(cliente, consulta):
+    cursor = None
+    while True:
+        url = f'/api/gastos?{consulta}' + (f'&cursor={cursor}' if cursor else '')
+        dados = cliente.get(url).get_json()
+        yield dados
+        cursor = dados['next_cursor']
+        if cursor is None:
+            break
+
+
+def test_percorre_todos_os_gastos_sem_repetir(cliente):
+    paginas = list(_paginas(cliente, 'limit=2&incluir_total=true'))
+    assert [len(pagina['data']) for pagina in paginas] == [2, 2, 2, 1]
+    assert {pagina['total'] for pagina in paginas} == {7}
+    
+    gastos = [gasto for pagina in paginas for gasto in pagina['data']]
+    posicoes = [(gasto['data'], gasto['id']) for gasto in gastos]
+    assert posicoes == sorted(posicoes, reverse=True)
+    assert len({gasto['id'] for gasto in gastos}) == 7
+
+
+def test_filtros_valem_em_todas_as_paginas(cliente):
+    paginas = list(_paginas(cliente, 'limit=1&data_inicio=2026-01-02&data_fim=2026-01-03'))
+    assert [gasto['data'] for pagina in paginas for gasto in pagina['data']] == ['2026-01-03'] * 3 + ['2026-01-02'] * 2
+
+
+@pytest.mark.parametrize('consulta', ['limit=0', 'limit=abc', 'cursor=invalido'])
+def test_parametros_invalidos(cliente, consulta):
+    resposta = cliente.get(f'/api/gastos?{consulta}')
+    assert resposta.status_code == 400
@@ -0,0 +1,71 @@
+"""Testes da materialização dos gastos recorrentes"""
+from decimal import Decimal
+import pytest
+from app import create_app, db, agregados, recorrencias
+from app.models import AgregadoMensal, Gasto
+
+
+@pytest.fixture
+def cliente():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        cliente = app.test_client()
+        cliente.post('/api/categorias/seed')
+        cliente.post('/api/gastos', json={
+            'descricao': 'Aluguel',
+            'valor': 1500,
+            'data': '2026-01-31',
+            'categoria_id': 1,
+            'recorrente': True
+        })
+        yield cliente
+        db.session.remove()
+        db.drop_all()
+
+
+def _materializar(desde, ate):
+    resultado = recorrencias.materializar(desde, ate)
+    db.session.commit()
+    return resultado
+
+
+def test_agregados_recebem_apenas_o_delta(cliente):
+    # Contribuição de uma escrita concorrente no mesmo mês, já somada ao
+    # agregado: a materialização não pode sobrescrevê-la
+    agregados.aplicar_delta((2026, 2, 'despesa', 1, ''), Decimal('7'), 1)
+    db.session.commit()
+    
+    assert _materializar((2026, 2), (2026, 3))['criados'] == 2
+    fevereiro = AgregadoMensal.query.filter_by(ano=2026, mes=2, categoria_id=1).one()
+    assert (fevereiro.total, fevereiro.quantidade) == (Decimal('1507'), 2)
+    
+    agregados.aplicar_delta((2026, 2, 'despesa', 1, ''), Decimal('-7'), -1)
+    db.session.commit()
+    assert agregados.verificar() == []
+
+
+def test_materializacao_idempotente(cliente):
+    assert _materializar((2026, 2), (2026, 4))['criados'] == 3
+    assert _materializar((2026, 2), (2026, 4))['criados'] == 0
+    datas = [gasto.data.isoformat() for gasto in Gasto.query.order_by(Gasto.data)]
+    assert datas == ['2026-01-31', '2026-02-28', '2026-03-31', '2026-04-30']
+    
+    # Ocorrência excluída pelo usuário não volta
+    marco = Gasto.query.filter_by(recorrencia_periodo='2026-03').one()
+    assert cliente.delete(f'/api/gastos/{marco.id}').status_code == 200
+    assert _materializar((2026, 2), (2026, 4))['criados'] == 0
+    assert Gasto.query.filter_by(recorrencia_periodo='2026-03').count() == 0
+    assert agregados.verificar() == []
+
+
+def test_relancamento_continua_na_mesma_serie(cliente):
+    cliente.post('/api/gastos', json={
+        'descricao': 'Aluguel',
+        'valor': 1500,
+        'data': '2026-02-10',
+        'categoria_id': 1,
+        'recorrente': True
+    })
+    assert _materializar((2026, 2), (2026, 3))['series'] == 1
+    assert Gasto.query.filter_by(recorrencia_periodo='2026-03').one().data.day == 10
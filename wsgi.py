@@ -0,0 +1,5 @@
+"""Ponto de entrada WSGI de produção (gunicorn -c gunicorn.conf.py wsgi:app)"""
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))